@@ -1,16 +1,41 @@
 """Main entry point for the Daily Task Bot application.
 
 Initializes logging, loads configuration, and runs the bot with graceful shutdown.
+With `--plan`, computes what a run would write without touching any Doc.
+With `--shard i/N` or `--shards N`, the blocks are split by destination Doc
+across nodes or local worker processes. `--enqueue-only`, `--drain-only`, and
+`--writers N` split reading and writing around a durable local queue.
+With `--watch`, the bot stays running and rewrites only the Docs whose sheet
+tabs changed. `--sync-schedule` copies the sheet tabs into a local SQLite
+schedule, which `--from-schedule` then reads instead of the sheets.
+`--prerender` renders tomorrow's Docs ahead of time; the next day's run
+writes them without rendering if their source rows are unchanged.
+`--deadline SECONDS` bounds each run, enqueue and drain; work not done by
+then is cut off and reported.
 """
 
+import argparse
+import json
 import signal
+import sys
 import threading
-from typing import Callable
+from pathlib import Path
+from typing import Callable, Optional, Sequence
 
-from src.config import load_config
-from src.constants import BOT_CONFIG_PATH
-from src.daily_task_bot import DailyTaskBot
-from src.observability.logging_setup import configure_logging
+from src.concurrency import concurrency_stats
+from src.config_manager import ConfigManager
+from src.constants import BOT_CONFIG_PATH, BOT_STATE_DIR
+from src.daily_task_bot import DailyTaskBot, ShardedRun
+from src.observability.logging_setup import (
+    configure_logging,
+    flush_logging,
+    shutdown_logging,
+)
+from src.observability.profiling import configure_profiling, install_signal_handler
+from src.observability.tracing import configure_tracing
+from src.sharding import parse_shard
+from src.template import configure_render_cache, render_cache_stats
+from src.transport import close_sessions, transport_stats
 
 # Global shutdown event that signal handlers can set
 _shutdown_event = threading.Event()
@@ -32,6 +57,11 @@ def _install_signal_handlers(bot: DailyTaskBot, log) -> None:
     `stop()`, `shutdown()`, `close()`, `cancel()`.
     If none exist, it simply sets the global shutdown event. Your bot can
     optionally poll `is_shutting_down()` if you wire that in.
+
+    `DailyTaskBot.stop()` stops the run after the current block and flushes
+    the run journal, so a later `--resume` knows exactly which Docs were
+    already written. Queued log records are flushed last so
+    nothing logged before the signal is lost if the process is killed.
     """
 
     def handler(signum, frame):  # noqa: ARG001 - signature required by signal
@@ -46,6 +76,8 @@ def _install_signal_handlers(bot: DailyTaskBot, log) -> None:
                 _maybe_call(getattr(bot, name), log)
                 break
 
+        _maybe_call(flush_logging, log)
+
     # Register for Ctrl+C and `docker stop`
     signal.signal(signal.SIGINT, handler)
     signal.signal(signal.SIGTERM, handler)
@@ -56,20 +88,222 @@ def is_shutting_down() -> bool:
     return _shutdown_event.is_set()
 
 
-def main():
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(prog="python -m src", description=__doc__)
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Read, match, and render every block, then report what each Doc "
+        "would receive and the API calls a real run would cost. Writes nothing.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip Docs that today's run journal shows as already written.",
+    )
+    parser.add_argument(
+        "--plan-output",
+        default="-",
+        help="File to write the plan report to (default: stdout).",
+    )
+    queue = parser.add_mutually_exclusive_group()
+    queue.add_argument(
+        "--enqueue-only",
+        action="store_true",
+        help="Render every Doc and add its write to the local queue, writing nothing.",
+    )
+    queue.add_argument(
+        "--drain-only",
+        action="store_true",
+        help="Write Docs already in the local queue, reading no sheets.",
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        help="Route writes through the local queue, drained by this many "
+        "writer threads (default: 1 with --enqueue-only/--drain-only). Docs "
+        "calls in flight are further capped by the adaptive API limit.",
+    )
+    shard = parser.add_mutually_exclusive_group()
+    shard.add_argument(
+        "--shard",
+        type=_shard_arg,
+        help="Process only shard i of N (zero-based, e.g. 0/4), for running "
+        "one shard per node against a shared state directory.",
+    )
+    shard.add_argument(
+        "--shards",
+        type=int,
+        help="Split the run across N local worker processes.",
+    )
+    parser.add_argument(
+        "--docs-batch",
+        type=int,
+        default=1,
+        help="Write finished Docs N at a time through HTTP batch requests "
+        "(default: 1, each Doc as soon as it is ready); with --plan, the "
+        "round trips are estimated for N.",
+    )
+    parser.add_argument(
+        "--prefetch-tabs",
+        action="store_true",
+        help="Read every sheet tab concurrently up front, as many at once as "
+        "the adaptive API concurrency limit allows.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: poll the spreadsheet for changes and rewrite only "
+        "the Docs whose sheet tabs changed.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between change polls in --watch mode (default: 60).",
+    )
+    parser.add_argument(
+        "--sync-schedule",
+        action="store_true",
+        help="Copy every enabled block's sheet tab into the local schedule "
+        "store, writing only changed rows, then exit.",
+    )
+    parser.add_argument(
+        "--from-schedule",
+        action="store_true",
+        help="Look up today's tasks in the local schedule store with one "
+        "query instead of reading the sheets.",
+    )
+    parser.add_argument(
+        "--prerender",
+        action="store_true",
+        help="Read and render tomorrow's Docs (in the sheets' time zone) and "
+        "save them for tomorrow's run to write, then exit.",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds a run, enqueue or drain may take; API calls time out "
+        "within the time left and work not done by then is cut off "
+        "(default: the config's run_deadline_seconds, else none).",
+    )
+    args = parser.parse_args(argv)
+
+    queued = args.enqueue_only or args.drain_only or args.writers is not None
+    if args.resume and (args.plan or queued):
+        parser.error("--resume only applies to a direct run")
+    if args.shards is not None and (args.plan or queued):
+        parser.error("--shards only applies to a direct run; use --shard i/N instead")
+    if args.docs_batch != 1 and queued:
+        parser.error("--docs-batch only applies to a direct run or --plan")
+    if args.watch and (args.plan or queued or args.resume or args.shards is not None):
+        parser.error("--watch cannot be combined with --plan, --resume, --shards, "
+                     "or the queue options")
+    if args.prefetch_tabs and args.drain_only:
+        parser.error("--prefetch-tabs has no effect with --drain-only")
+    if args.watch_interval <= 0:
+        parser.error("--watch-interval must be positive")
+    if args.enqueue_only and args.writers is not None:
+        parser.error("--writers has no effect with --enqueue-only")
+    if args.sync_schedule and (
+        args.plan or queued or args.resume or args.shard or args.shards is not None
+        or args.watch or args.docs_batch != 1 or args.prefetch_tabs or args.from_schedule
+    ):
+        parser.error("--sync-schedule cannot be combined with other run options")
+    if args.prerender and (
+        args.plan or queued or args.resume or args.shard or args.shards is not None
+        or args.watch or args.docs_batch != 1 or args.sync_schedule
+    ):
+        parser.error("--prerender cannot be combined with --plan, --resume, --shard(s), "
+                     "--watch, --docs-batch, --sync-schedule, or the queue options")
+    if args.deadline is not None and args.deadline <= 0:
+        parser.error("--deadline must be positive")
+    if args.deadline is not None and (args.plan or args.sync_schedule or args.prerender):
+        parser.error("--deadline has no effect with --plan, --sync-schedule, or --prerender")
+    if args.from_schedule and (args.watch or args.drain_only or args.prefetch_tabs):
+        parser.error("--from-schedule cannot be combined with --watch, --drain-only, "
+                     "or --prefetch-tabs")
+    return args
+
+
+def _shard_arg(value: str):
+    """argparse type for `--shard`, reporting bad specs as usage errors."""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _write_plan(report: dict, destination: str) -> None:
+    """Write a plan report as JSON to a file, or to stdout for '-'."""
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if destination == "-":
+        sys.stdout.write(payload + "\n")
+        sys.stdout.flush()
+    else:
+        with open(destination, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+
+
+def main(argv: Optional[Sequence[str]] = None):
     """Initialize logging, load configuration, and start the bot."""
+    args = _parse_args(argv)
+
     # Configure logging once at process startup
     log = configure_logging(service_name="daily-task-bot")
+    configure_tracing(service_name="daily-task-bot")
+    configure_profiling()
+    configure_render_cache(Path(BOT_STATE_DIR) / "render_cache.sqlite")
+    install_signal_handler()
     log.info("application_starting")
 
-    config = load_config(BOT_CONFIG_PATH)
-    bot = DailyTaskBot(config)
+    config_manager = ConfigManager(
+        BOT_CONFIG_PATH, cache_dir=Path(BOT_STATE_DIR) / "config_cache"
+    )
+    config = config_manager.current.config
+    queued = args.enqueue_only or args.drain_only or args.writers is not None
+    if args.shards and not (args.plan or queued):
+        bot = ShardedRun(
+            config,
+            state_dir=BOT_STATE_DIR,
+            shards=args.shards,
+            docs_batch_size=args.docs_batch,
+            prefetch_tabs=args.prefetch_tabs,
+            from_schedule=args.from_schedule,
+            deadline=args.deadline,
+        )
+    else:
+        bot = DailyTaskBot(
+            config,
+            state_dir=BOT_STATE_DIR,
+            shard=args.shard,
+            config_manager=config_manager,
+            docs_batch_size=args.docs_batch,
+            prefetch_tabs=args.prefetch_tabs,
+            from_schedule=args.from_schedule,
+            deadline=args.deadline,
+        )
 
     # Wire signal handlers so `docker stop` triggers a clean exit
     _install_signal_handlers(bot, log)
 
     try:
-        bot.run()
+        if args.sync_schedule:
+            bot.sync_schedule()
+        elif args.prerender:
+            bot.prerender()
+        elif args.plan:
+            _write_plan(bot.plan(), args.plan_output)
+        elif args.watch:
+            bot.watch(interval=args.watch_interval)
+        elif queued:
+            if not args.drain_only:
+                bot.enqueue()
+            if not args.enqueue_only:
+                bot.drain(writers=args.writers or 1)
+        else:
+            bot.run(resume=args.resume)
         log.info("application_exited", status="success")
     except Exception as e:
         log.exception("application_exited", status="failure", error=str(e))
@@ -78,7 +312,12 @@ def main():
         for name in ("cleanup", "close"):
             if hasattr(bot, name) and callable(getattr(bot, name)):
                 _maybe_call(getattr(bot, name), log)
+        log.info("http_transport_stats", **transport_stats())
+        log.info("api_concurrency_stats", **concurrency_stats())
+        log.info("render_cache_stats", **render_cache_stats())
+        close_sessions()
         log.info("application_cleanup_complete")
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -8,25 +8,35 @@ from google.oauth2.service_account import Credentials
 
 from src.constants import GOOGLE_CREDENTIALS_PATH
 from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
 
 log = get_logger(__name__)
 
+DEFAULT_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/documents",
+]
 
+# Needed only when the Calendar event stage is configured
+CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar.events"
+
+# Needed only in watch mode, to poll the spreadsheet's Drive version
+DRIVE_METADATA_SCOPE = "https://www.googleapis.com/auth/drive.metadata.readonly"
+
+
+@traced("auth.credentials")
 def get_service_account_credentials(scopes=None) -> Credentials:
     """Load and return Google service account credentials with the specified scopes.
 
     Args:
-        scopes (list, optional): List of OAuth2 scopes. Defaults to basic
-        Sheets and Docs scopes.
+        scopes (list, optional): List of OAuth2 scopes. Defaults to
+        `DEFAULT_SCOPES` (basic Sheets and Docs scopes).
 
     Returns:
         Credentials: Authenticated service account credentials.
     """
     if scopes is None:
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets.readonly",
-            "https://www.googleapis.com/auth/documents"
-        ]
+        scopes = list(DEFAULT_SCOPES)
 
     try:
         creds = Credentials.from_service_account_file(
@@ -0,0 +1,287 @@
+"""Circuit breakers that stop writes to known-bad Docs and a failing API.
+
+A Doc that was deleted or unshared fails every write, and a degraded Docs
+API fails most of them; retrying either on every run only burns time and
+quota. Every Doc, and the Docs API as a whole, has a breaker:
+
+* closed: writes go through, and consecutive failures are counted.
+* open: after `threshold` consecutive failures, writes are refused without
+  an API call until the cooldown ends.
+* half-open: once the cooldown ends, a single probe write is let through.
+  Success closes the breaker; failure opens it again with the cooldown
+  doubled, up to BREAKER_MAX_COOLDOWN.
+
+Failures are blamed by cause (see `failure_scope`): 403, 404 and other
+client errors count against the Doc, while 429, 5xx and network errors
+count against the API, so an outage does not open every Doc's breaker.
+Breaker state is persisted like `DocRevisionStore`'s, so it carries over
+from one run to the next.
+
+Environment:
+    BREAKER_DOC_THRESHOLD: Consecutive failures that open a Doc's breaker
+        (default 2).
+    BREAKER_DOC_COOLDOWN: Seconds a Doc's breaker first stays open
+        (default 21600, 6 hours).
+    BREAKER_API_THRESHOLD: Consecutive failures that open the API breaker
+        (default 5).
+    BREAKER_API_COOLDOWN: Seconds the API breaker first stays open
+        (default 60).
+    BREAKER_MAX_COOLDOWN: Longest a breaker stays open, in seconds
+        (default 604800, 7 days).
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Set
+
+import requests
+
+from src.concurrency import OVERLOAD_STATUSES, error_status
+from src.deadline import DeadlineExceeded
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BreakerPolicy(NamedTuple):
+    """When a breaker opens and for how long.
+
+    Attributes:
+        threshold: Consecutive failures that open the breaker.
+        cooldown: Seconds the breaker first stays open.
+        max_cooldown: Longest the breaker stays open after failed probes.
+    """
+    threshold: int
+    cooldown: float
+    max_cooldown: float
+
+
+def _policy(scope: str, threshold: str, cooldown: str) -> BreakerPolicy:
+    """Return the policy for `scope` from the environment."""
+    return BreakerPolicy(
+        threshold=int(os.getenv(f"BREAKER_{scope}_THRESHOLD", threshold)),
+        cooldown=float(os.getenv(f"BREAKER_{scope}_COOLDOWN", cooldown)),
+        max_cooldown=float(os.getenv("BREAKER_MAX_COOLDOWN", "604800")),
+    )
+
+
+@dataclass
+class Breaker:
+    """Persisted state of one breaker.
+
+    Attributes:
+        failures: Consecutive failures since the last success.
+        opened_at: Time the breaker last opened, or None while closed.
+        cooldown: Seconds it stays open from `opened_at`.
+        last_error: Message of the most recent failure.
+    """
+    failures: int = 0
+    opened_at: Optional[float] = None
+    cooldown: float = 0.0
+    last_error: Optional[str] = None
+
+    def state(self, now: float) -> str:
+        """Return CLOSED, OPEN or HALF_OPEN at time `now`."""
+        if self.opened_at is None:
+            return CLOSED
+        return OPEN if now < self.opened_at + self.cooldown else HALF_OPEN
+
+
+def failure_scope(error: Optional[BaseException]) -> Optional[str]:
+    """Return what a failed write says is broken.
+
+    Returns:
+        "api" for overload, server and network errors; "doc" for client
+        errors such as a deleted (404) or unshared (403) Doc; None for
+        errors that blame neither, such as the run deadline passing.
+    """
+    if error is None or isinstance(error, DeadlineExceeded):
+        return None
+    status = error_status(error)
+    if status is not None:
+        if status in OVERLOAD_STATUSES or status >= 500:
+            return "api"
+        return "doc" if 400 <= status < 500 else None
+    if isinstance(error, (requests.RequestException, ConnectionError, TimeoutError)):
+        return "api"
+    return None
+
+
+class CircuitBreakerStore:
+    """Breakers for every Doc and API, optionally persisted to a JSON file.
+
+    State is served from memory. `save()` merges this store's changes into
+    the current file under an exclusive lock, like `DocRevisionStore`, so
+    shards sharing a state directory never drop each other's breakers.
+    Which breakers have a probe in flight is tracked per process.
+
+    Attributes:
+        path: JSON file backing the store, or None for in-memory only.
+        doc_policy: Policy of the per-Doc breakers.
+        api_policy: Policy of the per-API breakers.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        doc_policy: Optional[BreakerPolicy] = None,
+        api_policy: Optional[BreakerPolicy] = None,
+    ):  # noqa: D107
+        self.path = Path(path) if path else None
+        self.doc_policy = doc_policy or _policy("DOC", "2", "21600")
+        self.api_policy = api_policy or _policy("API", "5", "60")
+        self._lock = threading.RLock()
+        self._breakers: Dict[str, Breaker] = {}
+        self._changed: Set[str] = set()
+        self._probing: Set[str] = set()
+        if self.path and self.path.exists():
+            self._breakers = self._read(self.path)
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Breaker]:
+        """Load stored breakers, ignoring a corrupt file rather than failing."""
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            return {key: Breaker(**value) for key, value in raw.items()}
+        except (ValueError, TypeError) as e:
+            log.warning("circuit_breakers_unreadable", path=str(path), error=str(e))
+            return {}
+
+    def _policy_for(self, key: str) -> BreakerPolicy:
+        """Return the policy of breaker `key`."""
+        return self.api_policy if key.startswith("api:") else self.doc_policy
+
+    def state(self, key: str) -> str:
+        """Return the state of breaker `key` ("doc:<id>" or "api:<name>")."""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            return breaker.state(time.time()) if breaker else CLOSED
+
+    def allow_write(self, doc_id: str, api: str = "docs") -> bool:
+        """Return whether a write to `doc_id` may be sent now.
+
+        A write is allowed only if neither the Doc's nor the API's breaker
+        is open, and takes the probe of any half-open one; it is refused
+        while another write is probing. Every allowed write must be
+        followed by `record_write`.
+        """
+        keys = (f"api:{api}", f"doc:{doc_id}")
+        now = time.time()
+        with self._lock:
+            probes = []
+            for key in keys:
+                breaker = self._breakers.get(key)
+                state = breaker.state(now) if breaker else CLOSED
+                if state == OPEN or (state == HALF_OPEN and key in self._probing):
+                    return False
+                if state == HALF_OPEN:
+                    probes.append(key)
+            self._probing.update(probes)
+        for key in probes:
+            log.info("circuit_probe", breaker=key)
+        return True
+
+    def retry_after(self, doc_id: str, api: str = "docs") -> float:
+        """Return the seconds until a write to `doc_id` may be allowed again."""
+        now = time.time()
+        with self._lock:
+            breakers = [self._breakers.get(f"api:{api}"), self._breakers.get(f"doc:{doc_id}")]
+            waits = [
+                breaker.opened_at + breaker.cooldown - now
+                for breaker in breakers
+                if breaker is not None and breaker.opened_at is not None
+            ]
+        return max(waits + [1.0])
+
+    def record_write(
+        self, doc_id: str, error: Optional[BaseException], api: str = "docs"
+    ) -> None:
+        """Record the outcome of a write allowed by `allow_write`.
+
+        A success closes both breakers. A failure counts against the side
+        `failure_scope` blames; a Doc error also shows the API answered,
+        so it closes the API's breaker. An error blaming neither only ends
+        any probe.
+        """
+        doc_key, api_key = f"doc:{doc_id}", f"api:{api}"
+        scope = failure_scope(error)
+        with self._lock:
+            if error is None:
+                self._succeed(api_key)
+                self._succeed(doc_key)
+            elif scope == "doc":
+                self._succeed(api_key)
+                self._fail(doc_key, error)
+            elif scope == "api":
+                self._fail(api_key, error)
+            self._probing.difference_update((doc_key, api_key))
+
+    def cancel_write(self, doc_id: str, api: str = "docs") -> None:
+        """Release the probes of a write allowed but never sent."""
+        with self._lock:
+            self._probing.difference_update((f"doc:{doc_id}", f"api:{api}"))
+
+    def _succeed(self, key: str) -> None:
+        """Close breaker `key`."""
+        breaker = self._breakers.pop(key, None)
+        if breaker is None:
+            return
+        self._changed.add(key)
+        if breaker.opened_at is not None:
+            log.info("circuit_closed", breaker=key)
+
+    def _fail(self, key: str, error: BaseException) -> None:
+        """Count a failure of breaker `key`, opening it at the threshold."""
+        policy = self._policy_for(key)
+        now = time.time()
+        breaker = self._breakers.setdefault(key, Breaker())
+        breaker.failures += 1
+        breaker.last_error = str(error)
+        self._changed.add(key)
+        if breaker.opened_at is not None:
+            # A failed probe: open again for twice as long
+            breaker.cooldown = min(breaker.cooldown * 2, policy.max_cooldown)
+        elif breaker.failures >= policy.threshold:
+            breaker.cooldown = policy.cooldown
+        else:
+            return
+        breaker.opened_at = now
+        log.warning(
+            "circuit_opened",
+            breaker=key,
+            failures=breaker.failures,
+            cooldown=breaker.cooldown,
+            error=breaker.last_error,
+        )
+
+    def save(self) -> None:
+        """Merge changes since the last save into the file at `path`."""
+        with self._lock:
+            if not self.path or not self._changed:
+                return
+            changed = set(self._changed)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                merged = self._read(self.path) if self.path.exists() else {}
+                for key in changed:
+                    if key in self._breakers:
+                        merged[key] = self._breakers[key]
+                    else:
+                        merged.pop(key, None)
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                payload = {key: asdict(breaker) for key, breaker in merged.items()}
+                tmp.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+                os.replace(tmp, self.path)
+            self._changed -= changed
+        log.info("circuit_breakers_saved", path=str(self.path), breakers=len(payload))
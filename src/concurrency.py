@@ -0,0 +1,202 @@
+"""Adaptive limits on concurrent Google API calls.
+
+Each API (Sheets, Docs) gets an `AimdLimiter` that caps how many calls are
+in flight at once and tunes that cap from what it observes, the way TCP
+congestion control does. While calls succeed at a healthy latency the limit
+grows additively, by about one per limit's worth of successes. A 429 or 503
+response cuts it multiplicatively. Callers can therefore be given generous
+worker counts, e.g. many queue writers, and the limiter finds the highest
+concurrency the quota currently allows.
+
+Environment:
+    API_CONCURRENCY_INITIAL: Starting limit per API (default 4).
+    API_CONCURRENCY_MAX: Upper bound per API (default 16).
+    API_OVERLOAD_RETRIES: Retries of a call rejected with 429/503 (default 3).
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+# HTTP statuses that mean "slow down" rather than "this request is wrong"
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+# Latency allowed above the tolerance, so jitter on very fast calls is not
+# mistaken for the API slowing down
+_LATENCY_SLACK = 0.05
+
+_limiters: Dict[str, "AimdLimiter"] = {}
+_registry_lock = threading.Lock()
+
+
+def error_status(error: Optional[BaseException]) -> Optional[int]:
+    """Return the HTTP status carried by a googleapiclient or gspread error."""
+    resp = getattr(error, "resp", None)  # googleapiclient HttpError
+    if resp is not None and getattr(resp, "status", None) is not None:
+        return int(resp.status)
+    response = getattr(error, "response", None)  # gspread APIError
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return int(response.status_code)
+    return None
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """Return True if `error` is the API asking us to slow down."""
+    return error_status(error) in OVERLOAD_STATUSES
+
+
+class AimdLimiter:
+    """Additive-increase/multiplicative-decrease limit on in-flight calls.
+
+    Attributes:
+        name: API the limiter guards, used in logs and metrics.
+        minimum: Lowest limit; at least one call is always allowed.
+        maximum: Highest limit.
+        decrease: Factor the limit is multiplied by on overload.
+        latency_tolerance: A success counts as healthy, and grows the
+            limit, if its latency is within this multiple of the fastest
+            success seen.
+        retries: Times `call` retries a call rejected as overload.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = 4,
+        minimum: float = 1,
+        maximum: float = 16,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        retries: int = 3,
+    ):  # noqa: D107
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.retries = retries
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._counts = {"successes": 0, "overloads": 0, "retries": 0}
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        with self._cond:
+            return int(self._limit)
+
+    def acquire(self) -> float:
+        """Wait for a free slot and take it.
+
+        Returns:
+            The monotonic start time to pass back to `release`.
+        """
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        return time.monotonic()
+
+    def release(self, started: float, error: Optional[BaseException] = None) -> None:
+        """Free a slot and adjust the limit from the call's outcome.
+
+        Args:
+            started: Value returned by the matching `acquire`.
+            error: The call's exception, or None if it succeeded.
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self._in_flight -= 1
+            before = int(self._limit)
+            if is_overload(error):
+                self._counts["overloads"] += 1
+                # Calls already in flight when the limit was last cut saw the
+                # old limit; only newer ones are evidence it is still too high.
+                if started >= self._last_decrease:
+                    self._limit = max(self.minimum, self._limit * self.decrease)
+                    self._last_decrease = now
+            elif error is None:
+                self._counts["successes"] += 1
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                if latency <= self._baseline * self.latency_tolerance + _LATENCY_SLACK:
+                    self._limit = min(self.maximum, self._limit + 1 / self._limit)
+            self._cond.notify_all()
+            after = int(self._limit)
+        if after < before:
+            log.info("concurrency_limit_decreased", api=self.name, limit=after)
+        elif after > before:
+            log.debug("concurrency_limit_increased", api=self.name, limit=after)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call `func` in a slot, retrying with backoff while it is overloaded.
+
+        Raises:
+            Exception: Whatever `func` raises, once retries are exhausted.
+        """
+        for attempt in range(self.retries + 1):
+            started = self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                self.release(started, e)
+                if not is_overload(e) or attempt == self.retries:
+                    raise
+                with self._cond:
+                    self._counts["retries"] += 1
+                delay = min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                log.warning(
+                    "api_overloaded_retrying",
+                    api=self.name,
+                    status=error_status(e),
+                    attempt=attempt + 1,
+                    delay=round(delay, 2),
+                )
+                time.sleep(delay)
+            else:
+                self.release(started)
+                return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limit and counters as metrics."""
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "max_in_flight": self._max_in_flight,
+                **self._counts,
+            }
+
+
+def limiter(name: str) -> AimdLimiter:
+    """Return the process-wide limiter for API `name`, creating it on first use."""
+    with _registry_lock:
+        found = _limiters.get(name)
+        if found is None:
+            found = _limiters[name] = AimdLimiter(
+                name,
+                initial=float(os.getenv("API_CONCURRENCY_INITIAL", "4")),
+                maximum=float(os.getenv("API_CONCURRENCY_MAX", "16")),
+                retries=int(os.getenv("API_OVERLOAD_RETRIES", "3")),
+            )
+        return found
+
+
+def concurrency_stats() -> Dict[str, Dict[str, Any]]:
+    """Return every limiter's metrics, keyed by API name."""
+    with _registry_lock:
+        limiters = dict(_limiters)
+    return {name: found.stats() for name, found in limiters.items()}
+
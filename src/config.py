@@ -1,7 +1,7 @@
 """Loads and validates the application's YAML configuration.
 
-Provides a helper function to read a YAML config file from disk,
-parse it, and return a validated `Config` object based on the schema.
+Provides helpers to read a YAML config file from disk (or parse YAML text
+already in memory) and return a validated `Config` object based on the schema.
 """
 
 from pathlib import Path
@@ -40,14 +40,33 @@ def load_config(path: str) -> Config:
 
     try:
         raw_text = path_obj.read_text(encoding="utf-8")
-        data: Any = yaml.safe_load(raw_text)
-    except yaml.YAMLError as ye:
-        log.exception("config_yaml_error", path=str(path_obj), error=str(ye))
-        raise
     except Exception as e:
         log.exception("config_read_error", path=str(path_obj), error=str(e))
         raise
 
+    return parse_config(raw_text, source=str(path_obj))
+
+
+def parse_config(raw_text: str, source: str = "<string>") -> Config:
+    """Parse YAML text into a validated Config object.
+
+    Args:
+        raw_text: YAML configuration text.
+        source: Where the text came from, used in log events.
+
+    Returns:
+        Config: Parsed and validated configuration object.
+
+    Raises:
+        yaml.YAMLError: If the text is not valid YAML.
+        pydantic.ValidationError: If the config does not match schema.
+    """
+    try:
+        data: Any = yaml.safe_load(raw_text)
+    except yaml.YAMLError as ye:
+        log.exception("config_yaml_error", path=source, error=str(ye))
+        raise
+
     try:
         cfg = Config(**data)  # validates automatically (Pydantic v1/2 compat kwargs)
         log.info(
@@ -63,5 +82,5 @@ def load_config(path: str) -> Config:
             errs = ve.errors()  # pydantic v1/v2 both expose .errors()
         except Exception:
             errs = str(ve)
-        log.exception("config_validation_error", path=str(path_obj), errors=errs)
+        log.exception("config_validation_error", path=source, errors=errs)
         raise
@@ -0,0 +1,219 @@
+"""Cached, hot-reloadable access to the validated application config.
+
+`ConfigManager` turns the YAML config file into an immutable
+`CompiledConfig` snapshot. It re-checks the file cheaply by stat,
+revalidates only when the content actually changed, and swaps the new
+snapshot in atomically so readers never observe a half-loaded config. Every
+block's template is compiled before a snapshot is accepted, so a broken
+template rejects the reload; compiled templates live in the
+`src.template` cache that rendering reads from.
+
+Validated configs can be cached on disk as JSON keyed by the file's content
+hash, letting later processes skip YAML parsing.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pydantic
+
+from src import config_schema
+from src.config import parse_config
+from src.config_schema import Config
+from src.observability.logging_setup import get_logger
+from src.template import load_template
+
+log = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    """An immutable, ready-to-use config snapshot.
+
+    Attributes:
+        config: The validated configuration.
+        source_hash: SHA-256 of the config file content it was built from.
+        loaded_at: Wall-clock time the snapshot was built.
+    """
+    config: Config
+    source_hash: str
+    loaded_at: float
+
+
+def _schema_fingerprint() -> str:
+    """Identify the schema version, so cached configs are dropped on upgrade."""
+    source = Path(config_schema.__file__).read_bytes()
+    return hashlib.sha256(source + pydantic.VERSION.encode()).hexdigest()[:16]
+
+
+class ConfigManager:
+    """Load, cache, and hot-reload the config file.
+
+    Attributes:
+        path: Path to the YAML config file.
+        cache_dir: Directory for validated-config cache files, or None to
+            disable the on-disk cache.
+        poll_interval: Seconds between file checks while watching.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_dir: Optional[Path] = None,
+        poll_interval: float = 5.0,
+    ):  # noqa: D107
+        self.path = Path(path)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.poll_interval = poll_interval
+        self._snapshot: Optional[CompiledConfig] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> CompiledConfig:
+        """Return the current snapshot, loading it on first access.
+
+        Raises:
+            FileNotFoundError: If the config file does not exist.
+            yaml.YAMLError: If the file is not valid YAML.
+            pydantic.ValidationError: If the config does not match schema.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh(raise_errors=True)
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self, raise_errors: bool = False) -> bool:
+        """Reload the config if the file changed since the last check.
+
+        A stat comparison short-circuits unchanged files; a touched file with
+        identical content only updates the recorded stat. An invalid new
+        config is logged and the previous snapshot stays active unless
+        `raise_errors` is set.
+
+        Args:
+            raise_errors: Re-raise load errors instead of keeping the old snapshot.
+
+        Returns:
+            True if a new snapshot was swapped in.
+        """
+        with self._lock:
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                log.exception("config_not_found", path=str(self.path))
+                if raise_errors or self._snapshot is None:
+                    raise FileNotFoundError(f"Config file not found: {self.path}")
+                return False
+
+            version = (stat.st_mtime_ns, stat.st_size)
+            if self._snapshot is not None and version == self._stat:
+                return False
+
+            raw = self.path.read_bytes()
+            source_hash = hashlib.sha256(raw).hexdigest()
+            self._stat = version
+            if self._snapshot is not None and source_hash == self._snapshot.source_hash:
+                return False
+
+            try:
+                snapshot = self._compile(raw, source_hash)
+            except Exception as e:
+                log.exception("config_reload_failed", path=str(self.path), error=str(e))
+                if raise_errors or self._snapshot is None:
+                    raise
+                return False
+
+            self._snapshot = snapshot
+            log.info(
+                "config_snapshot_swapped",
+                path=str(self.path),
+                source_hash=source_hash[:12],
+                blocks=len(snapshot.config.doc_blocks),
+            )
+            return True
+
+    def _compile(self, raw: bytes, source_hash: str) -> CompiledConfig:
+        """Build a snapshot from file content, via the on-disk cache if possible."""
+        cfg = self._read_cache(source_hash)
+        if cfg is None:
+            cfg = parse_config(raw.decode("utf-8"), source=str(self.path))
+            self._write_cache(source_hash, cfg)
+
+        for path in {block.template_path for block in cfg.doc_blocks}:
+            load_template(path)
+
+        return CompiledConfig(config=cfg, source_hash=source_hash, loaded_at=time.time())
+
+    def _cache_path(self, source_hash: str) -> Optional[Path]:
+        """Return the cache file for a config hash, or None when disabled."""
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"config-{source_hash[:32]}-{_schema_fingerprint()}.json"
+
+    def _read_cache(self, source_hash: str) -> Optional[Config]:
+        """Return a previously validated Config for this content, if cached.
+
+        The cache holds plain JSON that is validated again on load, so a
+        tampered or stale file can never produce anything but a `Config`.
+        """
+        path = self._cache_path(source_hash)
+        if path is None or not path.exists():
+            return None
+        try:
+            cfg = Config.model_validate_json(path.read_bytes())
+        except (OSError, pydantic.ValidationError) as e:
+            log.warning("config_cache_unreadable", path=str(path), error=str(e))
+            return None
+        log.info("config_cache_hit", path=str(path))
+        return cfg
+
+    def _write_cache(self, source_hash: str, cfg: Config) -> None:
+        """Store a validated Config for later processes and drop older entries."""
+        path = self._cache_path(source_hash)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(cfg.model_dump_json(), encoding="utf-8")
+            os.replace(tmp, path)
+            for old in path.parent.glob("config-*"):
+                if old != path:
+                    old.unlink(missing_ok=True)
+        except OSError as e:
+            log.warning("config_cache_write_failed", path=str(path), error=str(e))
+
+    def start_watching(self) -> None:
+        """Poll the config file in a daemon thread and hot-swap on change."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="config-watcher", daemon=True
+        )
+        self._watcher.start()
+        log.info("config_watch_started", path=str(self.path), interval=self.poll_interval)
+
+    def stop_watching(self) -> None:
+        """Stop the polling thread started by `start_watching`."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        """Polling loop run by the watcher thread."""
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:  # noqa: BLE001 - keep watching after errors
+                log.exception("config_watch_error", error=str(e))
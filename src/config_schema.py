@@ -6,9 +6,9 @@ and the overall application configuration schema.
 
 
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class GoogleSheetsConfig(BaseModel):
@@ -25,6 +25,30 @@ class GoogleSheetsConfig(BaseModel):
     date_column_name: str = Field(default="Date")
 
 
+class DataSourceConfig(BaseModel):
+    """A local file a block reads its rows from instead of Google Sheets.
+
+    Attributes:
+        type: "csv", "xlsx" or "sqlite". The block's `sheet_name` is the
+            worksheet of an XLSX file or the table of a SQLite database;
+            a CSV file holds a single tab.
+        path: Path of the file.
+    """
+    type: Literal["csv", "xlsx", "sqlite"]
+    path: Path
+
+
+class FileSinkConfig(BaseModel):
+    """A local directory a block's Doc is written to instead of Google Docs.
+
+    Attributes:
+        directory: Directory the file is written to; created if missing.
+        format: "text", "markdown" or "html". Defaults to "text".
+    """
+    directory: Path
+    format: Literal["text", "markdown", "html"] = "text"
+
+
 class DocBlockConfig(BaseModel):
     """Configuration for a single document-generation block.
 
@@ -35,6 +59,13 @@ class DocBlockConfig(BaseModel):
         block_title_template: Template for the generated block title.
         doc_id: Destination Google Doc ID to write into.
         enabled: Whether this block should be processed. Defaults to True.
+        format: "text" to insert the rendered template as is, or "markdown"
+            to apply its headings, lists, bold/italic text and links as Doc
+            formatting. Defaults to "text".
+        source: Optional local file to read rows from; the spreadsheet in
+            `google_sheets` is read when omitted.
+        sink: Optional local directory to write the Doc to, as a file named
+            after `doc_id`; the Google Doc `doc_id` is written when omitted.
     """
     name: str
     sheet_name: str
@@ -42,6 +73,28 @@ class DocBlockConfig(BaseModel):
     block_title_template: str
     doc_id: str
     enabled: bool = True
+    format: Literal["text", "markdown"] = "text"
+    source: Optional[DataSourceConfig] = None
+    sink: Optional[FileSinkConfig] = None
+
+
+class GoogleCalendarConfig(BaseModel):
+    """Configuration for the optional Google Calendar event stage.
+
+    Attributes:
+        calendar_id: Calendar to create events in (e.g. an email address).
+        start_time: Local start time of each event as "HH:MM", in the
+            sheets' `time_zone`. Defaults to "09:00".
+        duration_minutes: Event length in minutes. Defaults to 60.
+        summary_template: Template for the event title. Defaults to the
+            block's rendered title.
+        description_template: Optional template for the event description.
+    """
+    calendar_id: str
+    start_time: str = Field(default="09:00", pattern=r"^([01]\d|2[0-3]):[0-5]\d$")
+    duration_minutes: int = Field(default=60, gt=0)
+    summary_template: Optional[str] = None
+    description_template: Optional[str] = None
 
 
 class Config(BaseModel):
@@ -50,6 +103,25 @@ class Config(BaseModel):
     Attributes:
         google_sheets: Settings for connecting to and reading Google Sheets.
         doc_blocks: Ordered list of document-generation blocks to process.
+        google_calendar: Optional settings for creating a Calendar event per
+            written block. Events are skipped when omitted.
+        run_deadline_seconds: Optional time budget of a run, in seconds.
+            API calls time out within the time left, and work not done by
+            then is cut off and reported.
     """
     google_sheets: GoogleSheetsConfig
     doc_blocks: List[DocBlockConfig]
+    google_calendar: Optional[GoogleCalendarConfig] = None
+    run_deadline_seconds: Optional[float] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def _one_sink_per_doc(self) -> "Config":
+        """Require every block writing to a Doc to use the same sink."""
+        sinks = {}
+        for block in self.doc_blocks:
+            sink = block.sink.model_dump() if block.sink is not None else None
+            if sinks.setdefault(block.doc_id, sink) != sink:
+                raise ValueError(
+                    f"Blocks writing to Doc {block.doc_id!r} must use the same sink"
+                )
+        return self
@@ -2,7 +2,8 @@
 
 Environment variables are read from a `.env` file (if present) and
 validated for required values. This includes paths to Google service
-account credentials and the bot configuration file.
+account credentials, the bot configuration file, and the directory where
+state is kept between runs.
 
 Raises:
     RuntimeError: If the required environment variable
@@ -22,3 +23,6 @@ if not GOOGLE_CREDENTIALS_PATH:
     raise RuntimeError("Missing required environment variable: GOOGLE_CREDENTIALS_PATH")
 
 BOT_CONFIG_PATH = os.getenv("BOT_CONFIG_PATH")
+
+# Directory for state persisted between runs (e.g. tracked Doc revisions)
+BOT_STATE_DIR = os.getenv("BOT_STATE_DIR", ".bot_state")
@@ -4,111 +4,1399 @@ Coordinates the daily task workflow: reads tasks from Google Sheets,
 renders template content, and updates Google Docs accordingly.
 """
 
-from src.auth import get_service_account_credentials
-from src.google_docs import overwrite_doc_contents
+import contextvars
+import math
+import multiprocessing
+import signal
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import time
+from pathlib import Path
+
+from src.auth import (
+    CALENDAR_SCOPE,
+    DEFAULT_SCOPES,
+    DRIVE_METADATA_SCOPE,
+    get_service_account_credentials,
+)
+from src.circuit_breaker import CircuitBreakerStore
+from src.concurrency import concurrency_stats, limiter
+from src.doc_output import DocOutput, DocOutputBuilder
+from src.deadline import expired as deadline_expired
+from src.deadline import run_deadline
+from src.doc_state import DocRevisionStore
+from src.google_calendar import EventSpec, doc_url, sync_events
+from src.google_docs import (
+    BATCH_LIMIT as DOCS_BATCH_LIMIT,
+    overwrite_doc_sections,
+    overwrite_docs_batch,
+    update_calls,
+)
 from src.google_sheets import get_sheet_rows
-from src.observability.logging_setup import get_logger
+from src.journal import RunJournal
+from src.markdown_docs import compile_markdown
+from src.observability.logging_setup import configure_logging, get_logger, shutdown_logging
+from src.observability.profiling import checkpoint, configure_profiling, profile_run
+from src.observability.tracing import configure_tracing, flush_tracing, span, start_trace
+from src.prerender import (
+    Prerender,
+    PrerenderedDoc,
+    PrerenderStore,
+    config_fingerprint,
+    source_hash,
+)
+from src.schedule_store import ScheduleStore
 from src.scheduler import find_today_task
-from src.template import render_template
+from src.sharding import DocLeaseStore, HashRing, merge_results
+from src.sheet_watch import SnapshotStore, affected_docs, file_version
+from src.sinks import BATCH_SIZE as SINK_BATCH_SIZE, FileSink
+from src.sources import get_source_rows, source_key, source_version
+from src.template import (
+    configure_render_cache,
+    render_cache_stats,
+    render_template,
+    render_template_string,
+)
+from src.transport import transport_stats
+from src.utils import get_date_str, get_today_str
+from src.work_queue import WorkQueue
 
 log = get_logger(__name__)
 
 
+def _tab_blocks(blocks):
+    """Return one block reading each tab, by `source_key`, in first-use order."""
+    tabs = {}
+    for block in blocks:
+        tabs.setdefault(source_key(block), block)
+    return tabs
+
+
+def _file_sinks(blocks):
+    """Return the `FileSink` each file-sink Doc is written to, by Doc ID.
+
+    Docs writing to the same directory in the same format share a sink.
+    """
+    sinks, by_target = {}, {}
+    for block in blocks:
+        if block.sink is None:
+            continue
+        target = (str(block.sink.directory), block.sink.format)
+        if target not in by_target:
+            by_target[target] = FileSink(block.sink.directory, block.sink.format)
+        sinks[block.doc_id] = by_target[target]
+    return sinks
+
+
+def _task_context(task):
+    """Return a task row as template variables, with spaces in keys as underscores."""
+    return {k.replace(" ", "_"): v for k, v in task.items()}
+
+
 class DailyTaskBot:
     """Orchestrates pulling tasks from Sheets and writing content to Docs.
 
     Attributes:
         config: Application configuration object containing Google Sheets
             settings and a list of document-generation blocks to process.
+        state_dir: Directory for state persisted between runs, or None to
+            keep all state in memory.
+        revisions: Locally tracked revision state of the Docs we write.
+        journal: Write-ahead journal of the current run, if one is active.
+        shard: Zero-based (index, count) of the shard this bot processes, or
+            None to process every block.
+        leases: Cross-process write leases, so concurrent shards or nodes
+            never write the same Doc at once.
+        breakers: Persisted circuit breakers per Doc and for the Docs API;
+            writes to a Doc whose breaker is open are skipped.
+        config_manager: Optional `ConfigManager`; when set, each run,
+            plan, or enqueue starts from its latest config snapshot.
+        docs_batch_size: Finished Docs written together through HTTP batch
+            requests; 1 writes each Doc as soon as it is ready.
+        prefetch_tabs: Read every sheet tab concurrently up front, as many
+            at once as the adaptive "sheets" limiter allows, instead of
+            each one when its first block comes up.
+        from_schedule: Look up each block's task in the local schedule
+            store, filled by `sync_schedule()`, instead of reading its tab.
+        deadline: Seconds each run, enqueue or drain may take; overrides
+            the config's `run_deadline_seconds`. None for no deadline.
     """
 
-    def __init__(self, config):  # noqa: D107
+    def __init__(
+        self,
+        config,
+        state_dir=None,
+        shard=None,
+        config_manager=None,
+        docs_batch_size=1,
+        prefetch_tabs=False,
+        from_schedule=False,
+        deadline=None,
+    ):  # noqa: D107
         self.config = config
+        self.deadline = deadline
+        self.config_manager = config_manager
+        self.docs_batch_size = max(1, docs_batch_size)
+        self.prefetch_tabs = prefetch_tabs
+        self.from_schedule = from_schedule
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.revisions = DocRevisionStore(
+            self.state_dir / "doc_revisions.json" if self.state_dir else None
+        )
+        self.leases = DocLeaseStore(
+            self.state_dir / "leases.sqlite" if self.state_dir else None
+        )
+        self.breakers = CircuitBreakerStore(
+            self.state_dir / "circuit_breakers.json" if self.state_dir else None
+        )
+        self.shard = shard
+        self._ring = HashRing(shard[1]) if shard else None
+        self.journal = None
+        self._queue = None
+        self._schedule = None
+        self._stop_requested = threading.Event()
 
-    def run(self):
+    def run(self, resume=False, only_docs=None, rows_by_sheet=None):
         """Execute the end-to-end task pipeline for all enabled blocks.
 
         Steps:
             1. Acquire Google service account credentials.
-            2. Gather rendered content for each destination Doc.
-            3. Overwrite each target Doc with the new content.
+            2. Render content for each destination Doc.
+            3. Overwrite each target Doc, one titled section per block, as soon
+               as all of its blocks are rendered. With `docs_batch_size` above
+               1, ready Docs are buffered and written together, using one HTTP
+               batch round trip for the gets and one for the updates. Docs
+               whose blocks have a `sink` are written to local files instead,
+               buffered and written in parallel batches of SINK_BATCH_SIZE.
+            4. If `google_calendar` is configured, create or update one event
+               per rendered block whose Google Doc was written, linking to
+               the Doc.
+
+        Every write is journaled before and after it happens. With `resume`,
+        Docs the journal shows as already written today are skipped without
+        reading their sheets, so only outstanding Docs are processed.
+
+        With a deadline (see `deadline`), every API call times out within
+        the time left. Once it passes, no further block is rendered and no
+        further Doc is written; the Docs left unwritten and the blocks left
+        unrendered are reported, and a `--resume` run picks them up.
+
+        Google Docs whose circuit breaker, or the Docs API's, is open are
+        skipped without a call and counted as short-circuited; see
+        `src.circuit_breaker`.
+
+        Docs pre-rendered for today by `prerender()` are written first,
+        without rendering, if their source rows are unchanged; see
+        `_usable_prerender`.
+
+        Args:
+            resume: Skip Docs completed by an earlier run today.
+            only_docs: If given, write only these Docs (an incremental run).
+            rows_by_sheet: Optional dict of sheet rows already read, by tab
+                name. Tabs in it are not read again, and tabs read during
+                the run are added to it.
+
+        Returns:
+            A summary of the run: `docs_updated`, `docs_failed`,
+            `docs_leased` (held by another process), `docs_short_circuited`,
+            `docs_skipped_completed`, `docs_prerendered`, `sheet_reads`, `interrupted`,
+            `deadline_exceeded`, and the `docs_cut_off` and `blocks_cut_off`
+            by the deadline.
         """
-        log.info(
-            "run_started",
-            blocks=len(getattr(self.config, "doc_blocks", []) or []),
-            spreadsheet_id=self.config.google_sheets.spreadsheet_id,
+        self._refresh_config()
+        with self._traced("run", resume=resume, shard=self._shard_label()), \
+                run_deadline(self._deadline_seconds()):
+            log.info(
+                "run_started",
+                blocks=len(getattr(self.config, "doc_blocks", []) or []),
+                spreadsheet_id=self.config.google_sheets.spreadsheet_id,
+                shard=self._shard_label(),
+            )
+
+            today = self._today()
+            prerender = self._prerenders().load(today) if self.state_dir else None
+            credentials = self._load_credentials(
+                extra_scopes=[DRIVE_METADATA_SCOPE] if prerender else ()
+            )
+
+            journal = self.journal = self._open_journal(today)
+            exclude_docs = frozenset(journal.completed()) if resume else frozenset()
+            if resume:
+                log.info(
+                    "run_resuming",
+                    docs_completed=len(exclude_docs),
+                    docs_outstanding=journal.outstanding(),
+                )
+
+            counts = {"updated": 0, "failed": 0, "leased": 0, "short_circuited": 0}
+            sinks = _file_sinks(self.config.doc_blocks)
+            batch = []
+            file_batch = []
+            rendered = []
+            written_docs = set()
+            docs_cut_off = []
+
+            def cut_off(output):
+                docs_cut_off.append(output.doc_id)
+                self.leases.release(output.doc_id, journal.run_id)
+
+            def finish_doc(output, error):
+                if error is None:
+                    written_docs.add(output.doc_id)
+                    journal.record_completed(output.doc_id, output.content_hash)
+                    counts["updated"] += 1
+                    log.info("doc_updated", doc_id=output.doc_id)
+                else:
+                    counts["failed"] += 1
+                self.leases.release(output.doc_id, journal.run_id)
+
+            def write_batch():
+                outputs = batch[:]
+                batch.clear()
+                if not outputs:
+                    return
+                if deadline_expired():
+                    for output in outputs:
+                        self.breakers.cancel_write(output.doc_id)
+                        cut_off(output)
+                    return
+                try:
+                    errors = overwrite_docs_batch(
+                        [(o.doc_id, o.sections) for o in outputs],
+                        credentials,
+                        revisions=self.revisions,
+                    )
+                except Exception as e:
+                    log.exception("docs_batch_failed", docs=len(outputs), error=str(e))
+                    errors = {o.doc_id: e for o in outputs}
+                for output in outputs:
+                    self.breakers.record_write(output.doc_id, errors.get(output.doc_id))
+                    finish_doc(output, errors.get(output.doc_id))
+
+            def write_files():
+                outputs = file_batch[:]
+                file_batch.clear()
+                by_sink = {}
+                for output in outputs:
+                    if deadline_expired():
+                        cut_off(output)
+                        continue
+                    by_sink.setdefault(sinks[output.doc_id], []).append(output)
+                for sink, group in by_sink.items():
+                    try:
+                        errors = sink.write_many(group)
+                    except Exception as e:
+                        log.exception("files_write_failed", directory=str(sink.directory),
+                                      docs=len(group), error=str(e))
+                        errors = {o.doc_id: e for o in group}
+                    for output in group:
+                        finish_doc(output, errors.get(output.doc_id))
+
+            def write_doc(output):
+                if deadline_expired():
+                    docs_cut_off.append(output.doc_id)
+                    return
+                to_docs = output.doc_id not in sinks
+                if to_docs and not self.breakers.allow_write(output.doc_id):
+                    counts["short_circuited"] += 1
+                    log.info("doc_short_circuited", doc_id=output.doc_id)
+                    return
+                if not self.leases.acquire(output.doc_id, journal.run_id):
+                    counts["leased"] += 1
+                    if to_docs:
+                        self.breakers.cancel_write(output.doc_id)
+                    return
+                journal.record_planned(output.doc_id, output.content_hash)
+                if output.doc_id in sinks:
+                    file_batch.append(output)
+                    if len(file_batch) >= SINK_BATCH_SIZE:
+                        write_files()
+                    return
+                if self.docs_batch_size > 1:
+                    batch.append(output)
+                    if len(batch) >= self.docs_batch_size:
+                        write_batch()
+                    return
+                error = None
+                try:
+                    overwrite_doc_sections(
+                        output.doc_id, output.sections, credentials, revisions=self.revisions
+                    )
+                except Exception as e:
+                    error = e
+                    log.exception("doc_update_failed", doc_id=output.doc_id, error=str(e))
+                self.breakers.record_write(output.doc_id, error)
+                finish_doc(output, error)
+
+            if rows_by_sheet is None:
+                rows_by_sheet = {}
+            try:
+                prerendered, validation_reads = self._usable_prerender(
+                    prerender, credentials, rows_by_sheet, exclude_docs, only_docs
+                )
+                for doc, blocks in prerendered:
+                    write_doc(doc.output)
+                    rendered.extend(
+                        (blocks[r["index"]], r["title"], r["task"]) for r in doc.rendered
+                    )
+                stats = self._get_docs_contents(
+                    self.config.google_sheets.spreadsheet_id,
+                    credentials,
+                    write_doc,
+                    exclude_docs=exclude_docs | {doc.output.doc_id for doc, _ in prerendered},
+                    on_block_rendered=lambda *block: rendered.append(block),
+                    only_docs=only_docs,
+                    rows_by_sheet=rows_by_sheet,
+                    day=today,
+                )
+            except Exception as e:
+                log.exception("content_build_error", error=str(e))
+                raise
+            finally:
+                write_batch()
+                write_files()
+                self.revisions.save()
+                self.breakers.save()
+                journal.close()
+
+            if docs_cut_off:
+                log.warning("writes_deadline_exceeded", docs_cut_off=docs_cut_off)
+
+            events = self._schedule_events(
+                [
+                    r for r in rendered
+                    if r[0].doc_id in written_docs and r[0].doc_id not in sinks
+                ],
+                credentials,
+                today,
+            )
+
+            result = {
+                "docs_updated": counts["updated"],
+                "docs_failed": counts["failed"],
+                "docs_leased": counts["leased"],
+                "docs_short_circuited": counts["short_circuited"],
+                "docs_skipped_completed": len(exclude_docs),
+                "docs_prerendered": len(prerendered),
+                "sheet_reads": stats["sheet_reads"] + validation_reads,
+                "events_synced": events["synced"],
+                "events_failed": events["failed"],
+                "interrupted": stats["interrupted"],
+                "deadline_exceeded": deadline_expired(),
+                "docs_cut_off": docs_cut_off + stats["docs_cut_off"],
+                "blocks_cut_off": stats["blocks_cut_off"],
+            }
+            log.info("run_completed", shard=self._shard_label(), **result)
+            return result
+
+    def watch(self, interval=60.0):
+        """Keep Docs in step with the spreadsheet until `stop()` is called.
+
+        Every `interval` seconds the spreadsheet's Drive version is polled.
+        When it has changed, the tabs read by enabled blocks are fetched and
+        compared with the snapshot from the last run, and an incremental run
+        writes only the Docs with a block on a changed tab, reusing the rows
+        just fetched. A full run is done for a new day, after a config
+        change, and when there is no snapshot for today.
+
+        The snapshot only advances after a run with no failed Docs, so
+        failures are retried on the next poll. Errors during a poll are
+        logged and the watch continues.
+
+        Args:
+            interval: Seconds between polls.
+
+        Returns:
+            A summary: `polls` made and `runs` started.
+        """
+        snapshots = SnapshotStore(
+            self.state_dir / "sheet_snapshot.json" if self.state_dir else None
         )
+        snapshot = snapshots.load()
+        counts = {"polls": 0, "runs": 0}
+        if self.config_manager is not None:
+            self.config_manager.start_watching()
+        self._refresh_config()
+        config = self.config
+        log.info("watch_started", interval=interval, snapshot_day=snapshot.day)
+        try:
+            while not self._stop_requested.is_set():
+                counts["polls"] += 1
+                try:
+                    with self._traced("watch_poll"):
+                        if self._watch_poll(snapshot, config):
+                            counts["runs"] += 1
+                        snapshots.save(snapshot)
+                    config = self.config
+                except Exception as e:  # noqa: BLE001 - keep watching after errors
+                    log.exception("watch_poll_failed", error=str(e))
+                if self._stop_requested.wait(interval):
+                    break
+        finally:
+            if self.config_manager is not None:
+                self.config_manager.stop_watching()
+        log.info("watch_stopped", **counts)
+        return counts
+
+    def _watch_poll(self, snapshot, previous_config):
+        """Run once for whatever changed since `snapshot`, updating it.
+
+        Returns:
+            True if a run was started.
+        """
+        self._refresh_config()
+        spreadsheet_id = self.config.google_sheets.spreadsheet_id
+        credentials = self._load_credentials(extra_scopes=[DRIVE_METADATA_SCOPE])
+        version = self._data_version(spreadsheet_id, credentials)
+        today = self._today()
+
+        if snapshot.day != today or self.config is not previous_config:
+            log.info("watch_full_run", day=today, version=version)
+            rows = {}
+            result = self.run(rows_by_sheet=rows)
+        elif version == snapshot.version:
+            return False
+        else:
+            blocks = self._active_blocks()
+            rows = {}
+            self._read_tabs(blocks, rows, spreadsheet_id, credentials)
+            changed = snapshot.changed_tabs(rows)
+            docs = affected_docs(blocks, changed)
+            log.info(
+                "watch_change_detected",
+                version=version,
+                tabs_changed=sorted(changed),
+                docs_affected=len(docs),
+            )
+            result = self.run(only_docs=docs, rows_by_sheet=rows) if docs else None
+
+        if result is None or not (result["docs_failed"] or result["interrupted"]):
+            snapshot.update(today, version, rows)
+        return result is not None
+
+    def stop(self):
+        """Request an orderly stop and flush the run journal to disk.
+
+        Called from the process signal handler. The current block finishes,
+        no further blocks are started, and the journal is made durable
+        immediately in case the process is killed before `run()` unwinds.
+        Revision state is saved by `run()` itself: saving it here could
+        interrupt a save already in progress. If it is lost, the next write
+        to each Doc simply fetches the document first.
+        """
+        log.info("stop_requested")
+        self._stop_requested.set()
+        if self.journal is not None:
+            self.journal.flush()
+
+    @property
+    def queue(self):
+        """The durable write queue under `state_dir`, opened on first use.
+
+        Raises:
+            ValueError: If the bot has no `state_dir` to keep the queue in.
+        """
+        if self._queue is None:
+            if not self.state_dir:
+                raise ValueError("The write queue requires a state_dir")
+            self._queue = WorkQueue(self.state_dir / "queue.sqlite")
+        return self._queue
+
+    @property
+    def schedule(self):
+        """The local schedule store under `state_dir`, opened on first use.
+
+        Raises:
+            ValueError: If the bot has no `state_dir` to keep the store in.
+        """
+        if self._schedule is None:
+            if not self.state_dir:
+                raise ValueError("The schedule store requires a state_dir")
+            self._schedule = ScheduleStore(self.state_dir / "schedule.sqlite")
+        return self._schedule
+
+    def sync_schedule(self, force=False):
+        """Copy the tabs of every enabled block into the local schedule store.
+
+        Skipped when the spreadsheet's Drive version is the one recorded by
+        the last complete sync and every tab has been synced, unless
+        `force` is set. Within a tab, only rows whose hash changed are
+        written.
+
+        Args:
+            force: Read and sync every tab even if the version is unchanged.
+
+        Returns:
+            A summary: `tabs_synced`, `rows_written` (inserted, updated or
+            deleted), and `skipped` (True if the version was unchanged).
+        """
+        self._refresh_config()
+        with self._traced("sync_schedule", force=force):
+            spreadsheet_id = self.config.google_sheets.spreadsheet_id
+            credentials = self._load_credentials(extra_scopes=[DRIVE_METADATA_SCOPE])
+            store = self.schedule
+            tabs = _tab_blocks(b for b in self.config.doc_blocks if b.enabled)
+            version = self._data_version(spreadsheet_id, credentials)
+
+            if (
+                not force
+                and version == store.get_meta("version")
+                and set(tabs) <= set(store.synced_tabs())
+            ):
+                log.info("schedule_sync_skipped", version=version, tabs=len(tabs))
+                return {"tabs_synced": 0, "rows_written": 0, "skipped": True}
+
+            written = 0
+            for tab, block in sorted(tabs.items()):
+                rows = self._read_rows(block, spreadsheet_id, credentials)
+                counts = store.sync(
+                    tab, rows, date_column=self.config.google_sheets.date_column_name
+                )
+                written += counts["inserted"] + counts["updated"] + counts["deleted"]
+            # Recorded last, so a sync that failed part-way is redone in full.
+            store.set_meta("version", version)
+
+            result = {"tabs_synced": len(tabs), "rows_written": written, "skipped": False}
+            log.info("schedule_synced", version=version, **result)
+            return result
+
+    def prerender(self, day=None):
+        """Read and render a later day's Docs now, for that day's run to write.
+
+        Meant to run the evening before, so the run at the deadline only
+        checks that nothing changed and writes. The spreadsheet's Drive
+        version is taken before the tabs are read, so an edit made while
+        reading counts as a change. Pre-renders of past days are deleted.
+
+        Args:
+            day: Date to render for; defaults to tomorrow in the sheets'
+                `time_zone`.
+
+        Returns:
+            A summary: `day`, `docs_prerendered`, and `sheet_reads`.
+
+        Raises:
+            ValueError: If the bot has no `state_dir` to keep pre-renders in.
+        """
+        if not self.state_dir:
+            raise ValueError("Pre-rendering requires a state_dir")
+        self._refresh_config()
+        day = day or get_date_str(1, time_zone=self.config.google_sheets.time_zone)
+        with self._traced("prerender", day=day):
+            spreadsheet_id = self.config.google_sheets.spreadsheet_id
+            credentials = self._load_credentials(extra_scopes=[DRIVE_METADATA_SCOPE])
+            version = self._data_version(spreadsheet_id, credentials)
+            prerender = Prerender(day, version, config_fingerprint(self.config))
+            blocks_by_doc = {}
+            for block in self._active_blocks():
+                blocks_by_doc.setdefault(block.doc_id, []).append(block)
+            outputs = []
+            tasks = {}
+
+            def remember(block, title, task):
+                tasks[id(block)] = (title, task)
+
+            stats = self._get_docs_contents(
+                spreadsheet_id, credentials, outputs.append, on_block_rendered=remember, day=day
+            )
+            # A Doc is flushed before its last block is reported as rendered,
+            # so sources are collected once every block is done.
+            for output in outputs:
+                found = [tasks.get(id(block)) for block in blocks_by_doc[output.doc_id]]
+                prerender.docs[output.doc_id] = PrerenderedDoc(
+                    output=output,
+                    sources=[source_hash(f[1]) if f else None for f in found],
+                    rendered=[
+                        {"index": i, "title": f[0], "task": f[1]}
+                        for i, f in enumerate(found)
+                        if f
+                    ],
+                )
+            if stats["interrupted"]:
+                log.warning("prerender_interrupted", day=day)
+                return {"day": day, "docs_prerendered": 0, "sheet_reads": stats["sheet_reads"]}
+            store = self._prerenders()
+            store.save(prerender)
+            store.prune(before=self._today())
+
+            result = {
+                "day": day,
+                "docs_prerendered": len(prerender.docs),
+                "sheet_reads": stats["sheet_reads"],
+            }
+            log.info("prerender_completed", version=version, **result)
+            return result
+
+    def enqueue(self):
+        """Render every Doc and queue its write instead of writing it.
+
+        The reading half of a decoupled run: performs the same reads,
+        matching, and rendering as `run()`, then enqueues one write job per
+        Doc for `drain()` workers to pick up, here or in another process.
+
+        Returns:
+            A summary: `jobs_enqueued`, `sheet_reads`, and `interrupted`.
+        """
+        self._refresh_config()
+        with self._traced("enqueue", shard=self._shard_label()), \
+                run_deadline(self._deadline_seconds()):
+            credentials = self._load_credentials()
+            queue = self.queue
+            enqueued = []
+
+            def enqueue_doc(output):
+                enqueued.append(queue.enqueue(output))
+
+            try:
+                stats = self._get_docs_contents(
+                    self.config.google_sheets.spreadsheet_id, credentials, enqueue_doc
+                )
+            except Exception as e:
+                log.exception("content_build_error", error=str(e))
+                raise
+
+            result = {"jobs_enqueued": len(enqueued), **stats}
+            log.info("enqueue_completed", **result)
+            return result
+
+    def drain(self, writers=1):
+        """Write queued Docs with `writers` worker threads until the queue is empty.
+
+        The writing half of a decoupled run. Jobs are delivered at least
+        once, so a job whose content hash matches what was last written to
+        its Doc is acknowledged without calling the Docs API. Jobs for Docs
+        with a file sink are written to their file instead. A job whose
+        Doc's or API's circuit breaker is open is put back, without counting
+        as an attempt, until the breaker may let a write through. Failed jobs
+        are retried with backoff by a later claim; jobs still backing off
+        when the queue runs dry are left for the next drain. Once the
+        deadline passes, writers stop claiming jobs and the rest stay queued.
+
+        Args:
+            writers: Number of concurrent writer threads.
+
+        Returns:
+            A summary: `docs_updated`, `docs_unchanged`, `docs_failed`,
+            `docs_short_circuited`, `interrupted`, `deadline_exceeded`, and the queue's remaining
+            `pending` and `failed` jobs.
+        """
+        with self._traced("drain", writers=writers), run_deadline(self._deadline_seconds()):
+            credentials = self._load_credentials()
+            queue = self.queue
+            sinks = _file_sinks(self.config.doc_blocks)
+            counts = {"updated": 0, "unchanged": 0, "failed": 0, "short_circuited": 0}
+            counts_lock = threading.Lock()
+
+            def count(key):
+                with counts_lock:
+                    counts[key] += 1
+
+            def worker():
+                while not self._stop_requested.is_set() and not deadline_expired():
+                    job = queue.claim()
+                    if job is None:
+                        return
+                    known = self.revisions.get(job.doc_id)
+                    if known is not None and known.content_hash == job.content_hash:
+                        queue.complete(job)
+                        count("unchanged")
+                        log.info("doc_unchanged", doc_id=job.doc_id, job_id=job.job_id)
+                        continue
+                    sink = sinks.get(job.doc_id)
+                    if sink is None and not self.breakers.allow_write(job.doc_id):
+                        queue.defer(job, self.breakers.retry_after(job.doc_id), "circuit_open")
+                        count("short_circuited")
+                        continue
+                    try:
+                        if sink is not None:
+                            sink.write(DocOutput(job.doc_id, job.sections))
+                        else:
+                            overwrite_doc_sections(
+                                job.doc_id, job.sections, credentials, revisions=self.revisions
+                            )
+                    except Exception as e:
+                        if sink is None:
+                            self.breakers.record_write(job.doc_id, e)
+                        queue.fail(job, str(e))
+                        count("failed")
+                        log.exception("doc_update_failed", doc_id=job.doc_id, error=str(e))
+                        continue
+                    if sink is None:
+                        self.breakers.record_write(job.doc_id, None)
+                    queue.complete(job)
+                    count("updated")
+                    log.info("doc_updated", doc_id=job.doc_id, job_id=job.job_id)
+
+            # Each writer runs in a copy of this context so its spans and
+            # logs stay in the drain's trace.
+            threads = [
+                threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(worker,),
+                    name=f"doc-writer-{i}",
+                )
+                for i in range(writers)
+            ]
+            try:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            finally:
+                self.revisions.save()
+                self.breakers.save()
 
+            queue.prune()
+            remaining = queue.counts()
+            result = {
+                "docs_updated": counts["updated"],
+                "docs_unchanged": counts["unchanged"],
+                "docs_failed": counts["failed"],
+                "docs_short_circuited": counts["short_circuited"],
+                "interrupted": self._stop_requested.is_set(),
+                "deadline_exceeded": deadline_expired(),
+                "pending": remaining["pending"],
+                "failed": remaining["failed"],
+            }
+            log.info("drain_completed", writers=writers, **result)
+            return result
+
+    def _today(self):
+        """Return today's date in the sheets' `time_zone`."""
+        return get_today_str(time_zone=self.config.google_sheets.time_zone)
+
+    def _open_journal(self, day):
+        """Open `day`'s run journal under `state_dir` (in memory without one)."""
+        path = None
+        if self.state_dir:
+            path = self.state_dir / "journal" / f"{day}.jsonl"
+        return RunJournal(path, run_id=uuid.uuid4().hex[:12])
+
+    def plan(self):
+        """Compute what a run would write to every Doc without writing.
+
+        Performs the same reads, matching, and rendering as `run()` but makes
+        no Docs API calls. Each Doc is compared with the content hash recorded
+        after our last write to it, and the Docs calls a real run would make
+        are estimated from the locally tracked revision state and from how
+        many chunks each Doc is written in. Docs with a file sink cost no
+        Docs calls and report the file they would write.
+
+        Returns:
+            A JSON-serializable report with one entry per Doc and the API
+            call counts a real run would cost, including the HTTP round
+            trips the Docs calls take with `docs_batch_size`.
+        """
+        self._refresh_config()
+        with self._traced("plan"):
+            log.info(
+                "plan_started",
+                blocks=len(getattr(self.config, "doc_blocks", []) or []),
+                spreadsheet_id=self.config.google_sheets.spreadsheet_id,
+            )
+
+            credentials = self._load_credentials()
+
+            docs = []
+            calls = []
+            sinks = _file_sinks(self.config.doc_blocks)
+
+            def plan_doc(output):
+                known = self.revisions.get(output.doc_id)
+                sink = sinks.get(output.doc_id)
+                if not sink:
+                    calls.append((0 if known else 1, update_calls(output.sections)))
+                docs_calls = 0 if sink else sum(calls[-1])
+                docs.append(
+                    {
+                        "doc_id": output.doc_id,
+                        "changed": known is None or known.content_hash != output.content_hash,
+                        "content_hash": output.content_hash,
+                        "bytes": output.size_bytes,
+                        "sections": [
+                            {"block": s.block_name, "title": s.title, "bytes": s.size_bytes}
+                            for s in output.sections
+                        ],
+                        "docs_calls": docs_calls,
+                        "text": output.text,
+                    }
+                )
+                if sink:
+                    docs[-1]["file"] = str(sink.path_for(output.doc_id))
+
+            try:
+                stats = self._get_docs_contents(
+                    self.config.google_sheets.spreadsheet_id, credentials, plan_doc
+                )
+            except Exception as e:
+                log.exception("content_build_error", error=str(e))
+                raise
+
+            report = {
+                "spreadsheet_id": self.config.google_sheets.spreadsheet_id,
+                "docs": docs,
+                "api_calls": {
+                    "sheet_reads": stats["sheet_reads"],
+                    "docs_get": sum(gets for gets, _ in calls),
+                    "docs_batch_update": sum(updates for _, updates in calls),
+                    "docs_round_trips": self._docs_round_trips(calls),
+                },
+            }
+            log.info(
+                "plan_completed",
+                docs=len(docs),
+                docs_changed=sum(1 for d in docs if d["changed"]),
+                **report["api_calls"],
+            )
+            return report
+
+    def _docs_round_trips(self, calls):
+        """Return the Docs API HTTP requests a run makes for `calls`.
+
+        `calls` holds the `(gets, updates)` of each Doc written to Google
+        Docs, in write order. Every call is a request of its own unless
+        `docs_batch_size` groups Docs: the gets and updates of a group then
+        share batch requests of up to `BATCH_LIMIT` calls each, except for
+        chunked Docs, which are still written one request at a time.
+        """
+        if self.docs_batch_size == 1:
+            return sum(gets + updates for gets, updates in calls)
+        trips = 0
+        for start in range(0, len(calls), self.docs_batch_size):
+            group = calls[start:start + self.docs_batch_size]
+            batched = [gets for gets, updates in group if updates == 1]
+            trips += sum(gets + updates for gets, updates in group if updates > 1)
+            trips += math.ceil(sum(batched) / DOCS_BATCH_LIMIT)
+            trips += math.ceil(len(batched) / DOCS_BATCH_LIMIT)
+        return trips
+
+    def _deadline_seconds(self):
+        """Return the time budget of a run, enqueue or drain, if any."""
+        if self.deadline is not None:
+            return self.deadline
+        return getattr(self.config, "run_deadline_seconds", None)
+
+    @contextmanager
+    def _traced(self, name, **attributes):
+        """Run the enclosed block as the root span of a new trace, then export.
+
+        The block is also profiled when a capture is armed.
+        """
+        start_trace()
         try:
-            credentials = get_service_account_credentials()
-        except Exception as e:
-            log.exception("credentials_error", error=str(e))
-            raise
+            with profile_run(name), span(name, **attributes):
+                yield
+        finally:
+            flush_tracing()
+
+    def _schedule_events(self, rendered, credentials, today):
+        """Create or update a Calendar event for each rendered block.
+
+        Args:
+            rendered: `(block, title, task)` for each block whose Doc was
+                written this run.
+            credentials: Credentials including the Calendar scope.
+            today: The run's date, in the sheets' `time_zone`.
+
+        Returns:
+            Counts of `synced` and `failed` events; both 0 when the Calendar
+            stage is not configured.
+        """
+        calendar = getattr(self.config, "google_calendar", None)
+        if calendar is None or not rendered:
+            return {"synced": 0, "failed": 0}
+        if deadline_expired():
+            log.warning("calendar_sync_skipped", reason="deadline_exceeded")
+            return {"synced": 0, "failed": 0}
+
+        start = time.fromisoformat(calendar.start_time)
+        specs = []
+        for block, title, task in rendered:
+            context = {"date": today, "block": block.name, "title": title, **task}
+            summary = title
+            if calendar.summary_template:
+                summary = render_template_string(calendar.summary_template, context)
+            description = doc_url(block.doc_id)
+            if calendar.description_template:
+                description = render_template_string(calendar.description_template, context)
+            specs.append(
+                EventSpec(
+                    block_name=block.name,
+                    day=today,
+                    summary=summary,
+                    description=description,
+                    doc_id=block.doc_id,
+                    start=start,
+                    duration_minutes=calendar.duration_minutes,
+                )
+            )
 
         try:
-            doc_contents = self._get_docs_contents(
-                self.config.google_sheets.spreadsheet_id, credentials
+            errors = sync_events(
+                specs,
+                calendar.calendar_id,
+                self.config.google_sheets.time_zone,
+                credentials,
             )
         except Exception as e:
-            log.exception("content_build_error", error=str(e))
-            raise
+            log.exception("calendar_sync_failed", error=str(e))
+            return {"synced": 0, "failed": len(specs)}
+        failed = sum(1 for error in errors.values() if error is not None)
+        return {"synced": len(errors) - failed, "failed": failed}
 
-        updated, failed = 0, 0
-        for doc_id, content in doc_contents.items():
-            try:
-                overwrite_doc_contents(doc_id, content, credentials)
-                updated += 1
-                log.info("doc_updated", doc_id=doc_id)
-            except Exception as e:
-                failed += 1
-                log.exception("doc_update_failed", doc_id=doc_id, error=str(e))
+    def _refresh_config(self):
+        """Switch to the config manager's latest snapshot, if there is one.
+
+        A config edit that fails to load is logged by the manager and the
+        previous snapshot stays in use.
+        """
+        if self.config_manager is not None:
+            self.config_manager.refresh()
+            self.config = self.config_manager.current.config
+
+    def _active_blocks(self):
+        """Return the enabled blocks whose Doc belongs to this bot's shard."""
+        return [
+            block for block in self.config.doc_blocks
+            if block.enabled
+            and not (self._ring and self._ring.shard_for(block.doc_id) != self.shard[0])
+        ]
 
-        log.info("run_completed", docs_updated=updated, docs_failed=failed)
+    def _shard_label(self):
+        """Return the shard as a human-readable 'i/N' string, or None."""
+        return f"{self.shard[0]}/{self.shard[1]}" if self.shard else None
 
-    def _get_docs_contents(self, spreadsheet_id, credentials):
-        """Build a mapping of Google Doc IDs to rendered content.
+    def _load_credentials(self, extra_scopes=()):
+        """Return service account credentials, logging any failure.
+
+        The Calendar scope is requested only when the Calendar stage is
+        configured.
+
+        Args:
+            extra_scopes: Scopes needed beyond the default Sheets and Docs ones.
+        """
+        scopes = list(extra_scopes)
+        if getattr(self.config, "google_calendar", None) is not None:
+            scopes.append(CALENDAR_SCOPE)
+        try:
+            if scopes:
+                return get_service_account_credentials(scopes=[*DEFAULT_SCOPES, *scopes])
+            return get_service_account_credentials()
+        except Exception as e:
+            log.exception("credentials_error", error=str(e))
+            raise
+
+    def _get_docs_contents(
+        self,
+        spreadsheet_id,
+        credentials,
+        on_doc_ready,
+        exclude_docs=frozenset(),
+        on_block_rendered=None,
+        only_docs=None,
+        rows_by_sheet=None,
+        day=None,
+    ):
+        """Render every enabled block and stream finished Docs to a writer.
 
         Iterates over configured document blocks, fetches today's task from the
-        corresponding sheet tab, preprocesses the row keys, renders the
-        template, and aggregates content per destination Doc.
+        corresponding sheet tab (or the block's local `source`), preprocesses
+        the row keys, renders the template and the block's title template
+        (with `date` bound to today), and collects the titled sections per
+        destination Doc in a `DocOutputBuilder`. Each Doc is handed to `on_doc_ready` as soon as
+        the last block targeting it has been processed, so early Docs are
+        written while later blocks are still being rendered. Each sheet tab
+        is read at most once per call, however many blocks use it; with
+        `prefetch_tabs`, all of them are read concurrently up front. With
+        `from_schedule`, no tab is read: every block's task comes from one
+        query against the local schedule store. When the bot is sharded,
+        only blocks whose Doc hashes to this shard are processed.
 
         Args:
             spreadsheet_id: The Google Sheets spreadsheet ID to read from.
             credentials: Authenticated Google credentials used for API calls.
+            on_doc_ready: Callback receiving a `DocOutput` for each finished Doc.
+            exclude_docs: Doc IDs whose blocks are skipped entirely.
+            on_block_rendered: Optional callback receiving each rendered
+                block, its title, and its preprocessed task row.
+            only_docs: If given, only blocks for these Doc IDs are processed.
+            rows_by_sheet: Optional dict of rows already read, by tab name,
+                which tabs read here are added to.
+            day: Date to render tasks for instead of today.
 
         Returns:
-            A mapping from destination Google Doc ID to the full rendered
-            content that should be written to that document.
+            A dict of build statistics: `sheet_reads` is the number of sheet
+            tabs fetched, `interrupted` is True if `stop()` cut the build
+            short, and `blocks_cut_off` and `docs_cut_off` list the blocks
+            not rendered and the Docs not finished because the deadline
+            passed.
         """
-        doc_ids: dict[str, str] = {}
-
+        today = day or self._today()
+        blocks = []
         for block in self.config.doc_blocks:
             if not block.enabled:
                 log.info("block_skipped_disabled", block=block.name)
                 continue
+            if self._ring and self._ring.shard_for(block.doc_id) != self.shard[0]:
+                continue
+            if block.doc_id in exclude_docs:
+                log.info("block_skipped_completed", block=block.name, doc_id=block.doc_id)
+                continue
+            if only_docs is not None and block.doc_id not in only_docs:
+                continue
+            blocks.append(block)
 
-            log.info("block_processing", block=block.name, sheet=block.sheet_name)
+        builder = DocOutputBuilder(blocks, on_doc_ready)
+        if rows_by_sheet is None:
+            rows_by_sheet = {}
+        due = self._due_from_schedule(today, blocks) if self.from_schedule else None
+        prefetched = {} if due is not None else self._prefetch_tabs(
+            blocks, rows_by_sheet, spreadsheet_id, credentials
+        )
+        sheet_reads = 0
+        interrupted = False
+        blocks_cut_off = []
 
-            rows = get_sheet_rows(
-                sheet_name=block.sheet_name,
-                spreadsheet_id=spreadsheet_id,
-                credentials=credentials,
-            )
+        for position, block in enumerate(blocks):
+            if self._stop_requested.is_set():
+                interrupted = True
+                log.warning("run_interrupted", blocks_remaining=len(blocks) - position)
+                break
+            if deadline_expired():
+                blocks_cut_off = [b.name for b in blocks[position:]]
+                break
+            checkpoint()
+
+            try:
+                with span("block", block=block.name, sheet=block.sheet_name):
+                    log.debug("block_processing", block=block.name, sheet=block.sheet_name)
+
+                    tab = source_key(block)
+                    if due is not None:
+                        task = due.get(tab)
+                    else:
+                        if tab in prefetched and tab not in rows_by_sheet:
+                            rows_by_sheet[tab] = prefetched[tab].result()
+                            sheet_reads += 1
+                        elif tab not in rows_by_sheet:
+                            rows_by_sheet[tab] = self._read_rows(
+                                block, spreadsheet_id, credentials
+                            )
+                            sheet_reads += 1
+                        rows = rows_by_sheet[tab]
+
+                        task = find_today_task(
+                            rows, date_column=self.config.google_sheets.date_column_name,
+                            day=today,
+                        )
+
+                    if not task:
+                        log.info("no_task_today", block=block.name)
+                        builder.skip(position)
+                        continue
+
+                    preprocessed_task = _task_context(task)
+                    new_content = render_template(block.template_path, preprocessed_task)
+                    title = render_template_string(
+                        block.block_title_template, {"date": today, **preprocessed_task}
+                    )
+                    formatting = ()
+                    if block.format == "markdown":
+                        new_content, formatting = compile_markdown(new_content)
+                    builder.add(
+                        position, block.name, new_content, title=title, formatting=formatting
+                    )
+                    if on_block_rendered is not None:
+                        on_block_rendered(block, title, preprocessed_task)
+            except Exception:
+                # A call timed out or was refused because the deadline passed
+                if not deadline_expired():
+                    raise
+                blocks_cut_off = [b.name for b in blocks[position:]]
+                break
+
+        # Reads still queued when the build stopped early are not needed.
+        for future in prefetched.values():
+            future.cancel()
+
+        docs_cut_off = builder.pending_docs() if blocks_cut_off else []
+        if blocks_cut_off:
+            log.warning("build_deadline_exceeded", blocks_cut_off=blocks_cut_off,
+                        docs_cut_off=docs_cut_off)
+        return {
+            "sheet_reads": sheet_reads,
+            "interrupted": interrupted,
+            "blocks_cut_off": blocks_cut_off,
+            "docs_cut_off": docs_cut_off,
+        }
+
+    def _prerenders(self):
+        """Return the store of pre-rendered Docs under `state_dir`."""
+        return PrerenderStore(self.state_dir / "prerender")
+
+    def _usable_prerender(self, prerender, credentials, rows_by_sheet, exclude_docs, only_docs):
+        """Return the pre-rendered Docs still valid for this run.
+
+        A pre-render made with a different config or templates is discarded.
+        Otherwise, if the spreadsheet's Drive version is the one it was
+        rendered at, every Doc is valid. If not, the tabs are read (into
+        `rows_by_sheet`, so the run reuses them) and a Doc is valid only if
+        every one of its blocks still has the same source row.
 
-            task = find_today_task(
-                rows, date_column=self.config.google_sheets.date_column_name
+        Returns:
+            A list of (PrerenderedDoc, blocks targeting its Doc) pairs, and
+            the number of sheet tabs read to validate them.
+        """
+        if prerender is None:
+            return [], 0
+        if prerender.config != config_fingerprint(self.config):
+            log.info("prerender_discarded", day=prerender.day, reason="config_changed")
+            return [], 0
+
+        blocks_by_doc = {}
+        for block in self._active_blocks():
+            blocks_by_doc.setdefault(block.doc_id, []).append(block)
+        candidates = [
+            (doc, blocks_by_doc[doc_id])
+            for doc_id, doc in prerender.docs.items()
+            if doc_id in blocks_by_doc
+            and doc_id not in exclude_docs
+            and (only_docs is None or doc_id in only_docs)
+        ]
+        if not candidates:
+            return [], 0
+
+        spreadsheet_id = self.config.google_sheets.spreadsheet_id
+        reads = 0
+        version = self._data_version(spreadsheet_id, credentials)
+        if version != prerender.version:
+            reads = self._read_tabs(
+                [block for _, blocks in candidates for block in blocks],
+                rows_by_sheet,
+                spreadsheet_id,
+                credentials,
             )
+            valid = []
+            for doc, blocks in candidates:
+                sources = []
+                for block in blocks:
+                    task = find_today_task(
+                        rows_by_sheet[source_key(block)],
+                        date_column=self.config.google_sheets.date_column_name,
+                        day=prerender.day,
+                    )
+                    sources.append(source_hash(_task_context(task) if task else None))
+                if sources == doc.sources:
+                    valid.append((doc, blocks))
+            candidates = valid
 
-            if not task:
-                log.info("no_task_today", block=block.name)
-                continue
+        log.info(
+            "prerender_validated",
+            day=prerender.day,
+            version_changed=version != prerender.version,
+            docs_valid=len(candidates),
+            docs_prerendered=len(prerender.docs),
+        )
+        return candidates, reads
+
+    def _due_from_schedule(self, day, blocks):
+        """Return the row due on `day` for each tab `blocks` read, by tab name.
+
+        Tabs never synced into the store are logged, since their blocks
+        will find no task until `sync_schedule()` has run.
+        """
+        tabs = {source_key(block) for block in blocks}
+        missing = tabs - set(self.schedule.synced_tabs())
+        if missing:
+            log.warning("schedule_tabs_not_synced", tabs=sorted(missing))
+        due = self.schedule.due(day, tabs)
+        log.info("schedule_due_loaded", day=day, tabs=len(tabs), due=len(due))
+        return due
+
+    def _read_rows(self, block, spreadsheet_id, credentials):
+        """Return every row of the tab `block` reads, from its configured source."""
+        if block.source is not None:
+            return get_source_rows(block.source, block.sheet_name)
+        return get_sheet_rows(
+            sheet_name=block.sheet_name,
+            spreadsheet_id=spreadsheet_id,
+            credentials=credentials,
+        )
+
+    def _read_tabs(self, blocks, rows_by_sheet, spreadsheet_id, credentials):
+        """Read every tab `blocks` need that is not in `rows_by_sheet` into it.
 
-            preprocessed_task = {k.replace(" ", "_"): v for k, v in task.items()}
-            new_content = render_template(block.template_path, preprocessed_task)
+        Returns:
+            The number of tabs read.
+        """
+        tabs = {
+            tab: block for tab, block in _tab_blocks(blocks).items() if tab not in rows_by_sheet
+        }
+        for tab, block in sorted(tabs.items()):
+            rows_by_sheet[tab] = self._read_rows(block, spreadsheet_id, credentials)
+        return len(tabs)
+
+    def _data_version(self, spreadsheet_id, credentials):
+        """Return a version that changes whenever any enabled block's source does.
+
+        The spreadsheet's Drive version is only fetched if a block reads
+        Google Sheets; local sources add their file versions.
+        """
+        blocks = [block for block in self.config.doc_blocks if block.enabled]
+        parts = []
+        if any(block.source is None for block in blocks):
+            parts.append(file_version(spreadsheet_id, credentials))
+        parts.extend(sorted(
+            f"{tab}@{source_version(block.source)}"
+            for tab, block in _tab_blocks(blocks).items()
+            if block.source is not None
+        ))
+        return "|".join(parts)
+
+    def _prefetch_tabs(self, blocks, rows_by_sheet, spreadsheet_id, credentials):
+        """Start concurrent reads of every tab `blocks` need, if prefetching.
+
+        Returns:
+            A future per tab being read, by `source_key`; empty when
+            `prefetch_tabs` is off.
+        """
+        tabs = {
+            tab: block for tab, block in _tab_blocks(blocks).items() if tab not in rows_by_sheet
+        }
+        if not self.prefetch_tabs or not tabs:
+            return {}
+        pool = ThreadPoolExecutor(
+            max_workers=min(len(tabs), int(limiter("sheets").maximum)),
+            thread_name_prefix="tab-prefetch",
+        )
+        try:
+            # Each read runs in a copy of this context so its spans and logs
+            # stay in the run's trace.
+            return {
+                tab: pool.submit(
+                    contextvars.copy_context().run,
+                    self._read_rows,
+                    block,
+                    spreadsheet_id,
+                    credentials,
+                )
+                for tab, block in tabs.items()
+            }
+        finally:
+            pool.shutdown(wait=False)
+
+
+def _run_shard(
+    config,
+    state_dir,
+    index,
+    count,
+    resume,
+    docs_batch_size=1,
+    prefetch_tabs=False,
+    from_schedule=False,
+    deadline=None,
+):
+    """Run one shard in a worker process and return its run summary.
+
+    SIGTERM from the parent stops the shard the same way a signal stops a
+    single-process run; SIGINT is left to the parent.
+    """
+    configure_logging(service_name="daily-task-bot")
+    configure_tracing(service_name="daily-task-bot")
+    configure_profiling()
+    configure_render_cache(Path(state_dir) / "render_cache.sqlite" if state_dir else None)
+    bot = DailyTaskBot(
+        config,
+        state_dir=state_dir,
+        shard=(index, count),
+        docs_batch_size=docs_batch_size,
+        prefetch_tabs=prefetch_tabs,
+        from_schedule=from_schedule,
+        deadline=deadline,
+    )
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.stop())
+    try:
+        return bot.run(resume=resume)
+    finally:
+        log.info("http_transport_stats", shard=f"{index}/{count}", **transport_stats())
+        log.info("api_concurrency_stats", shard=f"{index}/{count}", **concurrency_stats())
+        log.info("render_cache_stats", shard=f"{index}/{count}", **render_cache_stats())
+        shutdown_logging()
+
+
+class ShardedRun:
+    """Run every shard of a config in parallel local worker processes.
+
+    Each worker is an independent `DailyTaskBot` for one shard, so the Docs
+    it writes are disjoint from every other worker's. Workers share
+    `state_dir`, which holds their journals, revision state and write leases.
+
+    Attributes:
+        config: Application configuration shared by all shards.
+        state_dir: Directory for state shared between the workers.
+        shards: Number of worker processes.
+        docs_batch_size: Passed to each shard's `DailyTaskBot`.
+        prefetch_tabs: Passed to each shard's `DailyTaskBot`.
+        from_schedule: Passed to each shard's `DailyTaskBot`.
+        deadline: Passed to each shard's `DailyTaskBot`.
+    """
+
+    def __init__(
+        self,
+        config,
+        state_dir=None,
+        shards=2,
+        docs_batch_size=1,
+        prefetch_tabs=False,
+        from_schedule=False,
+        deadline=None,
+    ):  # noqa: D107
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.config = config
+        self.state_dir = state_dir
+        self.shards = shards
+        self.docs_batch_size = docs_batch_size
+        self.prefetch_tabs = prefetch_tabs
+        self.from_schedule = from_schedule
+        self.deadline = deadline
+
+    def run(self, resume=False):
+        """Run all shards and return their merged run summary.
+
+        Raises:
+            RuntimeError: If any shard failed; the others still complete.
+        """
+        log.info("sharded_run_started", shards=self.shards)
+        results, failures = [], 0
+        with ProcessPoolExecutor(max_workers=self.shards) as pool:
+            futures = [
+                pool.submit(
+                    _run_shard, self.config, self.state_dir, i, self.shards, resume,
+                    self.docs_batch_size, self.prefetch_tabs, self.from_schedule,
+                    self.deadline,
+                )
+                for i in range(self.shards)
+            ]
+            for index, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    failures += 1
+                    log.exception("shard_failed", shard=f"{index}/{self.shards}", error=str(e))
 
-            if block.doc_id not in doc_ids:
-                doc_ids[block.doc_id] = new_content
-            else:
-                doc_ids[block.doc_id] = doc_ids[block.doc_id] + "\n" + new_content
+        result = merge_results(results)
+        log.info("sharded_run_completed", shards=self.shards, shards_failed=failures, **result)
+        if failures:
+            raise RuntimeError(f"{failures} of {self.shards} shards failed")
+        return result
 
-        return doc_ids
+    def stop(self):
+        """Ask every running shard to stop after its current block."""
+        log.info("stop_requested", shards=self.shards)
+        for child in multiprocessing.active_children():
+            child.terminate()
@@ -0,0 +1,89 @@
+"""Run deadlines and the per-call timeouts derived from them.
+
+Every Google API request gets a timeout, GOOGLE_HTTP_TIMEOUT by default, so
+a hung connection fails instead of stalling the run. Inside `run_deadline()`
+that timeout is further cut to the time left before the deadline, so no
+single call can outlast the run's budget. Once the deadline has passed,
+requests fail with `DeadlineExceeded` without being sent, and the bot stops
+starting new blocks and writes.
+
+The deadline is held in a context variable, so work run in a copy of the
+caller's context (tab prefetches, queue writers) is bound by it too.
+
+Environment:
+    GOOGLE_HTTP_TIMEOUT: Seconds a single Google API request may take
+        (default 60).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Monotonic time the current work must finish by, if it has a deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised for an API call attempted after the run deadline passed."""
+
+
+def http_timeout() -> float:
+    """Return the configured timeout of a single Google API request."""
+    return float(os.getenv("GOOGLE_HTTP_TIMEOUT", "60"))
+
+
+@contextmanager
+def run_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound the enclosed work to finish within `seconds` from now.
+
+    A deadline already in force that ends sooner is kept.
+
+    Args:
+        seconds: Time budget; None adds no deadline.
+    """
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Return the seconds left before the deadline, or None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    """Return True if the current deadline has passed."""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def call_timeout(limit: Optional[float] = None) -> float:
+    """Return the timeout for one API request.
+
+    Args:
+        limit: Longest the request may take; defaults to GOOGLE_HTTP_TIMEOUT.
+
+    Returns:
+        `limit`, cut to the time left before the deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed.
+    """
+    if limit is None:
+        limit = http_timeout()
+    left = remaining()
+    if left is None:
+        return limit
+    if left <= 0:
+        raise DeadlineExceeded("Run deadline passed")
+    return min(limit, left)
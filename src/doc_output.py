@@ -0,0 +1,150 @@
+"""Per-document output assembly for rendered blocks.
+
+Collects the rendered sections of every block that targets a Google Doc,
+keeps them in config order, and hands the finished Doc to a writer as soon
+as its last contributing block has been processed.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.docs_requests import Format, document_fingerprint, document_text, section_text
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+
+@dataclass
+class BlockSection:
+    """Rendered output of a single block.
+
+    Attributes:
+        block_name: Name of the block that produced the section.
+        title: Rendered section heading; empty for untitled sections.
+        content: Rendered body text for the block.
+        formatting: `Format`s applied to `content`, e.g. from Markdown.
+        size_bytes: UTF-8 encoded size of the section's title and body.
+    """
+    block_name: str
+    title: str
+    content: str
+    formatting: Tuple[Format, ...] = ()
+    size_bytes: int = field(init=False)
+
+    def __post_init__(self):  # noqa: D105
+        self.size_bytes = len(section_text(self).encode("utf-8"))
+
+
+@dataclass
+class DocOutput:
+    """Finished output for one destination Doc.
+
+    Attributes:
+        doc_id: Destination Google Doc ID.
+        sections: Block sections in config order.
+        separator: String placed between consecutive sections.
+    """
+    doc_id: str
+    sections: List[BlockSection] = field(default_factory=list)
+    separator: str = "\n"
+
+    @property
+    def text(self) -> str:
+        """Return the full document text, joined once from its sections."""
+        return document_text(self.sections, self.separator)
+
+    @property
+    def content_hash(self) -> str:
+        """Return the fingerprint of the text and formatting, as recorded after a write."""
+        return document_fingerprint(self.sections, self.separator)
+
+    @property
+    def size_bytes(self) -> int:
+        """Return the UTF-8 size of `text` without building it."""
+        sep = len(self.separator.encode("utf-8")) * max(len(self.sections) - 1, 0)
+        return sum(s.size_bytes for s in self.sections) + sep
+
+
+class DocOutputBuilder:
+    """Assemble rendered blocks per Doc and flush each Doc once complete.
+
+    Every block is addressed by its position in the sequence passed to the
+    constructor, so sections land in config order even if blocks are
+    rendered out of order. Once all blocks targeting a Doc have been either
+    added or skipped, the Doc is passed to `on_doc_ready` and its parts are
+    released. Docs whose blocks were all skipped are never flushed.
+
+    Attributes:
+        on_doc_ready: Callback invoked with a `DocOutput` for each finished Doc.
+    """
+
+    def __init__(
+        self,
+        blocks: Sequence,
+        on_doc_ready: Callable[[DocOutput], None],
+        separator: str = "\n",
+    ):  # noqa: D107
+        self.on_doc_ready = on_doc_ready
+        self._separator = separator
+        self._doc_of: List[str] = [block.doc_id for block in blocks]
+        self._slot_of: List[int] = []
+        self._slots: Dict[str, List[Optional[BlockSection]]] = {}
+        self._outstanding: Dict[str, int] = {}
+
+        for doc_id in self._doc_of:
+            slots = self._slots.setdefault(doc_id, [])
+            self._slot_of.append(len(slots))
+            slots.append(None)
+            self._outstanding[doc_id] = self._outstanding.get(doc_id, 0) + 1
+
+    def add(
+        self,
+        position: int,
+        block_name: str,
+        content: str,
+        title: str = "",
+        formatting: Tuple[Format, ...] = (),
+    ) -> None:
+        """Record rendered content for the block at `position`.
+
+        Args:
+            position: Index of the block in the constructor's sequence.
+            block_name: Name of the block, kept for reporting.
+            content: Rendered body text for the block.
+            title: Rendered section heading; empty for an untitled section.
+            formatting: `Format`s applied to `content`.
+        """
+        doc_id = self._doc_of[position]
+        self._slots[doc_id][self._slot_of[position]] = BlockSection(
+            block_name=block_name, title=title, content=content, formatting=formatting
+        )
+        self._complete(doc_id)
+
+    def skip(self, position: int) -> None:
+        """Mark the block at `position` as contributing nothing to its Doc."""
+        self._complete(self._doc_of[position])
+
+    def pending_docs(self) -> List[str]:
+        """Return IDs of Docs still waiting on at least one block."""
+        return [doc_id for doc_id, left in self._outstanding.items() if left > 0]
+
+    def _complete(self, doc_id: str) -> None:
+        """Decrement a Doc's outstanding count and flush it when it hits zero."""
+        self._outstanding[doc_id] -= 1
+        if self._outstanding[doc_id] > 0:
+            return
+
+        sections = [s for s in self._slots.pop(doc_id) if s is not None]
+        if not sections:
+            log.info("doc_output_empty", doc_id=doc_id)
+            return
+
+        output = DocOutput(doc_id=doc_id, sections=sections, separator=self._separator)
+        log.info(
+            "doc_output_ready",
+            doc_id=doc_id,
+            bytes=output.size_bytes,
+            blocks=[s.block_name for s in sections],
+            block_bytes=[s.size_bytes for s in sections],
+        )
+        self.on_doc_ready(output)
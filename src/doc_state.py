@@ -0,0 +1,129 @@
+"""Locally tracked revision state for Google Docs the bot writes to.
+
+After every write the bot records the document's new `revisionId` and the
+body end index implied by what it inserted. The next write can then send a
+`batchUpdate` guarded by `writeControl.requiredRevisionId` without first
+fetching the document.
+"""
+
+import fcntl
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class DocRevision:
+    """Last known state of a document after one of our writes.
+
+    Attributes:
+        revision_id: Revision ID returned by the Docs API for our write.
+        end_index: End index of the document body after our write.
+        content_hash: Fingerprint of the text we wrote, if recorded.
+    """
+    revision_id: str
+    end_index: int
+    content_hash: Optional[str] = None
+
+
+class DocRevisionStore:
+    """Per-doc revision state, optionally persisted to a JSON file.
+
+    Reads are served from memory; `save()` writes the file atomically via a
+    temporary file and `os.replace`. Saves merge this store's changes into
+    the current file under an exclusive lock, so several processes writing
+    disjoint Docs (e.g. shards) never drop each other's state. With no
+    `path`, state lives only for the lifetime of the store.
+
+    Attributes:
+        path: JSON file backing the store, or None for in-memory only.
+    """
+
+    def __init__(self, path: Optional[Path] = None):  # noqa: D107
+        self.path = Path(path) if path else None
+        self._lock = threading.RLock()
+        self._changed: Set[str] = set()
+        self._saving = False
+        self._docs: Dict[str, DocRevision] = {}
+        if self.path and self.path.exists():
+            self._docs = self._read(self.path)
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, DocRevision]:
+        """Load stored state, ignoring a corrupt file rather than failing."""
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            return {doc_id: DocRevision(**value) for doc_id, value in raw.items()}
+        except (ValueError, TypeError) as e:
+            log.warning("doc_state_unreadable", path=str(path), error=str(e))
+            return {}
+
+    def get(self, doc_id: str) -> Optional[DocRevision]:
+        """Return the last known state for `doc_id`, if any."""
+        with self._lock:
+            return self._docs.get(doc_id)
+
+    def set(
+        self,
+        doc_id: str,
+        revision_id: str,
+        end_index: int,
+        content_hash: Optional[str] = None,
+    ) -> None:
+        """Record the state of `doc_id` after a successful write."""
+        with self._lock:
+            self._docs[doc_id] = DocRevision(
+                revision_id=revision_id,
+                end_index=end_index,
+                content_hash=content_hash,
+            )
+            self._changed.add(doc_id)
+
+    def forget(self, doc_id: str) -> None:
+        """Drop stored state for `doc_id`, e.g. after a revision mismatch."""
+        with self._lock:
+            if self._docs.pop(doc_id, None) is not None:
+                self._changed.add(doc_id)
+
+    def save(self) -> None:
+        """Merge changes since the last save into the file at `path`.
+
+        A call made while a save is already in progress on the same thread
+        (e.g. from a signal handler) returns immediately: re-taking the file
+        lock there would block on the process's own lock forever.
+        """
+        with self._lock:
+            if not self.path or not self._changed or self._saving:
+                return
+            self._saving = True
+            try:
+                payload = self._merge_into_file(set(self._changed))
+            finally:
+                self._saving = False
+        log.info("doc_state_saved", path=str(self.path), docs=len(payload))
+
+    def _merge_into_file(self, changed: Set[str]) -> Dict[str, dict]:
+        """Write `changed` Docs over the current file under an exclusive lock."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = self._read(self.path) if self.path.exists() else {}
+            for doc_id in changed:
+                if doc_id in self._docs:
+                    merged[doc_id] = self._docs[doc_id]
+                else:
+                    merged.pop(doc_id, None)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            payload = {doc_id: asdict(rev) for doc_id, rev in merged.items()}
+            tmp.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+        self._changed -= changed
+        return payload
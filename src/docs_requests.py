@@ -0,0 +1,271 @@
+"""Builders for Google Docs `batchUpdate` request payloads.
+
+All index arithmetic is done locally: Docs addresses text in UTF-16 code
+units, so offsets are computed from the UTF-16 length of each piece of text
+rather than from Python string lengths.
+"""
+
+import json
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+from src.utils import content_hash
+
+HEADING_STYLE = "HEADING_2"
+BODY_STYLE = "NORMAL_TEXT"
+
+BULLET_PRESETS = {
+    "bullet": "BULLET_DISC_CIRCLE_SQUARE",
+    "numbered": "NUMBERED_DECIMAL_ALPHA_ROMAN",
+}
+
+
+class Format(NamedTuple):
+    """Formatting applied to part of a section's content.
+
+    Attributes:
+        start: First UTF-16 offset covered, relative to the content.
+        end: UTF-16 offset just past the covered text.
+        kind: "heading", "bullet" or "numbered" for paragraphs; "bold",
+            "italic" or "link" for text.
+        value: Named style of a heading, or URL of a link.
+    """
+    start: int
+    end: int
+    kind: str
+    value: str = ""
+
+
+class DocSection(NamedTuple):
+    """A titled section of a document.
+
+    Attributes:
+        title: Heading text; an empty title emits no heading paragraph.
+        content: Body text placed under the heading.
+        formatting: `Format`s applied to `content`.
+    """
+    title: str
+    content: str
+    formatting: Tuple[Format, ...] = ()
+
+
+def utf16_len(text: str) -> int:
+    """Return the length of `text` in UTF-16 code units, as Docs counts it."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def section_text(section) -> str:
+    """Return the text inserted for a section (title line, then body)."""
+    if section.title:
+        return section.title + "\n" + section.content
+    return section.content
+
+
+def document_text(sections: Sequence, separator: str = "\n") -> str:
+    """Return the full text inserted for `sections`, joined by `separator`."""
+    return separator.join(section_text(s) for s in sections)
+
+
+def document_fingerprint(sections: Sequence, separator: str = "\n") -> str:
+    """Return the fingerprint of what writing `sections` puts in a Doc.
+
+    For unformatted sections this is the hash of the text alone, so it
+    matches fingerprints recorded before formatting existed.
+    """
+    text = document_text(sections, separator)
+    formats = [
+        [index, *fmt]
+        for index, section in enumerate(sections)
+        for fmt in getattr(section, "formatting", ())
+    ]
+    if not formats:
+        return content_hash(text)
+    return content_hash(text + "\0" + json.dumps(formats))
+
+
+def _format_request(fmt: Format, base: int) -> Dict[str, Any]:
+    """Return the request applying `fmt` to content starting at index `base`."""
+    start, end = base + fmt.start, base + fmt.end
+    if fmt.kind == "heading":
+        return _paragraph_style(start, end, fmt.value)
+    if fmt.kind in BULLET_PRESETS:
+        return {
+            "createParagraphBullets": {
+                "range": {"startIndex": start, "endIndex": end},
+                "bulletPreset": BULLET_PRESETS[fmt.kind],
+            }
+        }
+    if fmt.kind == "link":
+        style, fields = {"link": {"url": fmt.value}}, "link"
+    else:
+        style, fields = {fmt.kind: True}, fmt.kind
+    return {
+        "updateTextStyle": {
+            "range": {"startIndex": start, "endIndex": end},
+            "textStyle": style,
+            "fields": fields,
+        }
+    }
+
+
+def _paragraph_style(start: int, end: int, style: str) -> Dict[str, Any]:
+    """Return an `updateParagraphStyle` request for [start, end)."""
+    return {
+        "updateParagraphStyle": {
+            "range": {"startIndex": start, "endIndex": end},
+            "paragraphStyle": {"namedStyleType": style},
+            "fields": "namedStyleType",
+        }
+    }
+
+
+def build_overwrite_requests(
+    sections: Sequence,
+    end_index: int,
+    separator: str = "\n",
+    heading_style: str = HEADING_STYLE,
+) -> List[Dict[str, Any]]:
+    """Compile sections into one request list that replaces a doc's body.
+
+    The list deletes the existing body, inserts the text of every section in a
+    single `insertText`, resets the inserted paragraphs to normal text, and
+    then applies `heading_style` to each section title and each section's
+    `formatting`. Ranges are computed locally from UTF-16 offsets, so no
+    document fetch is needed between sections.
+
+    Args:
+        sections: Objects with `title` and `content` attributes, and
+            optionally `formatting`, in order.
+        end_index: Current end index of the document body.
+        separator: String placed between consecutive sections.
+        heading_style: Docs named style applied to section titles.
+
+    Returns:
+        The `requests` list for a single `documents().batchUpdate` call.
+    """
+    requests: List[Dict[str, Any]] = []
+    if end_index > 2:
+        requests.append(
+            {
+                "deleteContentRange": {
+                    "range": {"startIndex": 1, "endIndex": end_index - 1}
+                }
+            }
+        )
+
+    text = document_text(sections, separator)
+    requests.append({"insertText": {"location": {"index": 1}, "text": text}})
+    requests.extend(_style_requests(sections, separator, heading_style))
+    return requests
+
+
+def _style_requests(
+    sections: Sequence, separator: str, heading_style: str
+) -> List[Dict[str, Any]]:
+    """Return the paragraph styles for `sections` inserted at index 1."""
+    total = utf16_len(document_text(sections, separator))
+    if total == 0:
+        return []
+
+    requests = [_paragraph_style(1, 1 + total, BODY_STYLE)]
+    offset = 1
+    sep_len = utf16_len(separator)
+    for section in sections:
+        content_start = offset
+        if section.title:
+            requests.append(
+                _paragraph_style(offset, offset + utf16_len(section.title), heading_style)
+            )
+            content_start += utf16_len(section.title) + 1
+        for fmt in getattr(section, "formatting", ()):
+            requests.append(_format_request(fmt, content_start))
+        offset += utf16_len(section_text(section)) + sep_len
+
+    return requests
+
+
+def split_paragraphs(text: str, max_bytes: int) -> List[str]:
+    """Split `text` into pieces of at most `max_bytes` UTF-8 bytes.
+
+    Pieces end on paragraph boundaries (after a newline) wherever possible;
+    a single paragraph longer than `max_bytes` is split between characters.
+    Joining the pieces gives back `text`.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in text.splitlines(keepends=True):
+        length = len(paragraph.encode("utf-8"))
+        if current and size + length > max_bytes:
+            chunks.append("".join(current))
+            current, size = [], 0
+        while length > max_bytes:
+            cut = _char_cut(paragraph, max_bytes)
+            chunks.append(paragraph[:cut])
+            paragraph = paragraph[cut:]
+            length = len(paragraph.encode("utf-8"))
+        if paragraph:
+            current.append(paragraph)
+            size += length
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def _char_cut(text: str, max_bytes: int) -> int:
+    """Return the most leading characters of `text` that fit in `max_bytes`."""
+    return max(1, len(text.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")))
+
+
+def build_chunked_overwrite_requests(
+    sections: Sequence,
+    end_index: int,
+    max_chunk_bytes: int,
+    separator: str = "\n",
+    heading_style: str = HEADING_STYLE,
+) -> List[List[Dict[str, Any]]]:
+    """Compile sections into several `batchUpdate` request lists, in order.
+
+    Like `build_overwrite_requests`, but the text goes in as chunks of at
+    most `max_chunk_bytes`, one `batchUpdate` each. The new text is inserted
+    ahead of the existing body, which is only deleted by the last request
+    list along with the styling. Until then the old content is untouched, so
+    a failed chunk can be undone with `build_rollback_requests`.
+
+    Args:
+        sections: Objects with `title` and `content` attributes, in order.
+        end_index: Current end index of the document body.
+        max_chunk_bytes: Upper bound on the UTF-8 size of each chunk.
+        separator: String placed between consecutive sections.
+        heading_style: Docs named style applied to section titles.
+
+    Returns:
+        One `requests` list per `batchUpdate` call.
+    """
+    text = document_text(sections, separator)
+    # The trailing newline keeps the last new paragraph apart from the old
+    # body until the old body is deleted.
+    batches: List[List[Dict[str, Any]]] = []
+    offset = 1
+    for chunk in split_paragraphs(text + "\n", max_chunk_bytes):
+        batches.append([{"insertText": {"location": {"index": offset}, "text": chunk}}])
+        offset += utf16_len(chunk)
+
+    length = utf16_len(text)
+    batches[-1].append(
+        {
+            "deleteContentRange": {
+                "range": {"startIndex": 1 + length, "endIndex": end_index + length}
+            }
+        }
+    )
+    batches[-1].extend(_style_requests(sections, separator, heading_style))
+    return batches
+
+
+def build_rollback_requests(inserted: int) -> List[Dict[str, Any]]:
+    """Return requests deleting the first `inserted` UTF-16 units of the body.
+
+    Undoes the chunks of a `build_chunked_overwrite_requests` write that
+    were applied before one failed, restoring the previous content.
+    """
+    return [{"deleteContentRange": {"range": {"startIndex": 1, "endIndex": 1 + inserted}}}]
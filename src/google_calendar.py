@@ -0,0 +1,237 @@
+"""Google Calendar helpers for scheduling an event per daily task.
+
+Each block with a task today gets one event that links to the Doc it was
+written into. Event IDs are derived from the block name and date, so a
+rerun updates the same event instead of creating a duplicate. A day's
+existing events are listed once per sync, and all inserts and updates go
+out as HTTP batch requests.
+"""
+
+import base64
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from google.oauth2.service_account import Credentials
+from googleapiclient.errors import HttpError
+
+from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
+from src.transport import execute_batch, shared_service
+
+log = get_logger(__name__)
+
+# Calls per HTTP batch request; the batch endpoint accepts up to 100.
+BATCH_LIMIT = 50
+
+# Event fields compared to decide whether an existing event needs a patch.
+_SYNCED_FIELDS = ("summary", "description", "start", "end", "attachments")
+
+
+def event_id(block_name: str, day: str) -> str:
+    """Return the deterministic Calendar event ID for a block on a day.
+
+    Calendar IDs may only use base32hex characters (a-v, 0-9), so the ID
+    is the lowercase base32hex encoding of a hash of the two values.
+    """
+    digest = hashlib.sha1(f"{block_name}\x00{day}".encode("utf-8")).digest()
+    return base64.b32hexencode(digest).decode("ascii").rstrip("=").lower()
+
+
+def doc_url(doc_id: str) -> str:
+    """Return the browser URL of a Google Doc."""
+    return f"https://docs.google.com/document/d/{doc_id}/edit"
+
+
+@dataclass(frozen=True)
+class EventSpec:
+    """The event wanted for one block on one day.
+
+    Attributes:
+        block_name: Name of the block the event belongs to.
+        day: ISO date of the task.
+        summary: Event title.
+        description: Event description.
+        doc_id: Google Doc the event links to.
+        start: Local start time.
+        duration_minutes: Event length in minutes.
+    """
+    block_name: str
+    day: str
+    summary: str
+    description: str
+    doc_id: str
+    start: time
+    duration_minutes: int
+
+    @property
+    def event_id(self) -> str:
+        """Return the event's deterministic ID."""
+        return event_id(self.block_name, self.day)
+
+    def body(self, time_zone: str) -> Dict[str, Any]:
+        """Return the Calendar API event resource."""
+        start = datetime.combine(date.fromisoformat(self.day), self.start)
+        end = start + timedelta(minutes=self.duration_minutes)
+        return {
+            "id": self.event_id,
+            "summary": self.summary,
+            "description": self.description,
+            "start": {"dateTime": start.isoformat(), "timeZone": time_zone},
+            "end": {"dateTime": end.isoformat(), "timeZone": time_zone},
+            "attachments": [{
+                "fileUrl": doc_url(self.doc_id),
+                "title": self.summary,
+                "mimeType": "application/vnd.google-apps.document",
+            }],
+        }
+
+
+def _day_bounds(day: str, time_zone: str) -> List[str]:
+    """Return RFC 3339 start and end instants of `day` in `time_zone`."""
+    start = datetime.combine(date.fromisoformat(day), time(), tzinfo=ZoneInfo(time_zone))
+    return [start.isoformat(), (start + timedelta(days=1)).isoformat()]
+
+
+def list_day_events(service, calendar_id: str, day: str, time_zone: str) -> Dict[str, Dict]:
+    """Return the calendar's events on `day`, including cancelled ones, by ID."""
+    time_min, time_max = _day_bounds(day, time_zone)
+    events: Dict[str, Dict] = {}
+    page_token = None
+    while True:
+        response = service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            showDeleted=True,
+            singleEvents=True,
+            timeZone=time_zone,
+            pageToken=page_token,
+        ).execute()
+        for event in response.get("items", []):
+            events[event["id"]] = event
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return events
+
+
+def _instant(when: Dict[str, Any]) -> Optional[datetime]:
+    """Return an event time's `dateTime` as an aware datetime.
+
+    A `dateTime` without an offset is local to the time's `timeZone`.
+    Returns None for all-day times, which have a `date` instead.
+    """
+    value = when.get("dateTime")
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None and when.get("timeZone"):
+        moment = moment.replace(tzinfo=ZoneInfo(when["timeZone"]))
+    return moment
+
+
+def _needs_update(existing: Dict[str, Any], wanted: Dict[str, Any]) -> bool:
+    """Return True if `existing` differs from `wanted` in any synced field.
+
+    Start and end compare as instants, so the same time written with a
+    different offset or zone is not a change.
+    """
+    if existing.get("status") == "cancelled":
+        return True
+    for field in _SYNCED_FIELDS:
+        if field in ("start", "end"):
+            if _instant(existing.get(field, {})) != _instant(wanted[field]):
+                return True
+        elif field == "attachments":
+            urls = [a.get("fileUrl") for a in existing.get("attachments", [])]
+            if urls != [a["fileUrl"] for a in wanted["attachments"]]:
+                return True
+        elif existing.get(field, "") != wanted[field]:
+            return True
+    return False
+
+
+@traced("calendar.sync")
+def sync_events(
+    specs: Sequence[EventSpec],
+    calendar_id: str,
+    time_zone: str,
+    credentials: Credentials,
+) -> Dict[str, Optional[Exception]]:
+    """Create or update the events for `specs`, idempotently.
+
+    Lists each day's events once, then sends inserts for missing events and
+    patches for changed ones as HTTP batch requests. Events that already
+    match are left alone. An insert that collides with an event outside the
+    listed day (e.g. one moved by hand) is retried as a patch.
+
+    Args:
+        specs: Wanted events; at most one per block and day.
+        calendar_id: Calendar to write to.
+        time_zone: IANA time zone of the events' local times.
+        credentials: Authenticated service account credentials.
+
+    Returns:
+        For each event ID, None if the event is in place, or the error that
+        prevented it. Errors are never raised.
+    """
+    service = shared_service("calendar", "v3", credentials)
+    results: Dict[str, Optional[Exception]] = {}
+    existing: Dict[str, Dict] = {}
+    for day in sorted({spec.day for spec in specs}):
+        try:
+            existing.update(list_day_events(service, calendar_id, day, time_zone))
+        except HttpError as error:
+            log.exception("calendar_list_failed", calendar_id=calendar_id, day=day)
+            for spec in specs:
+                if spec.day == day:
+                    results[spec.event_id] = error
+
+    bodies = {
+        spec.event_id: spec.body(time_zone)
+        for spec in specs
+        if spec.event_id not in results
+    }
+    inserts, patches = {}, {}
+    for eid, body in bodies.items():
+        if eid not in existing:
+            inserts[eid] = service.events().insert(
+                calendarId=calendar_id, body=body, supportsAttachments=True
+            )
+        elif _needs_update(existing[eid], body):
+            patches[eid] = _patch(service, calendar_id, eid, body)
+        else:
+            results[eid] = None
+
+    for eid, (_, error) in execute_batch(service, inserts, BATCH_LIMIT).items():
+        if getattr(getattr(error, "resp", None), "status", None) == 409:
+            patches[eid] = _patch(service, calendar_id, eid, bodies[eid])
+        else:
+            results[eid] = error
+    for eid, (_, error) in execute_batch(service, patches, BATCH_LIMIT).items():
+        results[eid] = error
+
+    failed = {eid: e for eid, e in results.items() if e is not None}
+    for eid, error in failed.items():
+        log.error("calendar_event_failed", event_id=eid, error=str(error))
+    log.info(
+        "calendar_events_synced",
+        calendar_id=calendar_id,
+        events=len(specs),
+        inserted=len(inserts),
+        patched=len(patches),
+        failed=len(failed),
+    )
+    return results
+
+
+def _patch(service, calendar_id: str, eid: str, body: Dict[str, Any]):
+    """Build a patch call that restores and updates an existing event."""
+    return service.events().patch(
+        calendarId=calendar_id,
+        eventId=eid,
+        body={**body, "status": "confirmed"},
+        supportsAttachments=True,
+    )
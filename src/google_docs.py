@@ -1,17 +1,47 @@
 """Google Docs API helpers for building a service client and updating documents.
 
 This module provides utilities to construct an authenticated Docs service
-and to overwrite a document's contents with new text.
+and to overwrite a document's contents with new text or titled sections.
+Writes reuse a Docs service per thread, sending its requests over the pooled
+session from `src.transport` that is shared with the Sheets client. Every
+API round trip goes through the adaptive "docs" limiter from
+`src.concurrency`.
 """
 
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.concurrency import limiter
+from src.doc_state import DocRevisionStore
+from src.docs_requests import (
+    DocSection,
+    build_chunked_overwrite_requests,
+    build_overwrite_requests,
+    build_rollback_requests,
+    document_fingerprint,
+    document_text,
+    split_paragraphs,
+    utf16_len,
+)
 from src.observability.logging_setup import get_logger
+from src.observability.tracing import span, traced
+from src.transport import execute_batch, shared_service
 
 log = get_logger(__name__)
 
+# Calls per HTTP batch request; the batch endpoint accepts up to 100.
+BATCH_LIMIT = 50
+
+# Documents whose text is larger than this many UTF-8 bytes are written in
+# chunks of at most this size, one batchUpdate each.
+MAX_CHUNK_BYTES = int(os.getenv("DOCS_MAX_CHUNK_BYTES", str(512 * 1024)))
+
 
 def build_docs_service(credentials: Credentials):
     """Create an authenticated Google Docs API service.
@@ -34,60 +64,371 @@ def build_docs_service(credentials: Credentials):
         raise
 
 
+def _doc_state(doc: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+    """Return the body end index and revision ID of a fetched document."""
+    content = doc.get("body", {}).get("content", [])
+    end_index: int = content[-1].get("endIndex", 1) if content else 1
+    return end_index, doc.get("revisionId")
+
+
+def _fetch_doc_state(docs_service, document_id: str) -> Tuple[int, Optional[str]]:
+    """Fetch a document and return its body end index and revision ID."""
+    request = docs_service.documents().get(documentId=document_id)
+    return _doc_state(limiter("docs").call(request.execute))
+
+
+def _batch_update_request(
+    docs_service,
+    document_id: str,
+    requests: List[Dict[str, Any]],
+    revision_id: Optional[str],
+):
+    """Build a batchUpdate call, guarded by `revision_id` when one is known."""
+    body: Dict[str, Any] = {"requests": requests}
+    if revision_id:
+        body["writeControl"] = {"requiredRevisionId": revision_id}
+    return docs_service.documents().batchUpdate(documentId=document_id, body=body)
+
+
+def _batch_update(
+    docs_service,
+    document_id: str,
+    requests: List[Dict[str, Any]],
+    revision_id: Optional[str],
+) -> Dict[str, Any]:
+    """Send a batchUpdate, guarded by `revision_id` when one is known."""
+    request = _batch_update_request(docs_service, document_id, requests, revision_id)
+    return limiter("docs").call(request.execute) or {}
+
+
+def _is_chunked(sections: Sequence) -> bool:
+    """Return True if `sections` are too large for a single `batchUpdate`."""
+    return len(document_text(sections).encode("utf-8")) > MAX_CHUNK_BYTES
+
+
+def update_calls(sections: Sequence) -> int:
+    """Return the `batchUpdate` calls a write of `sections` takes.
+
+    One for a Doc written in a single request, otherwise one per chunk,
+    split exactly as `build_chunked_overwrite_requests` splits it.
+    """
+    if not _is_chunked(sections):
+        return 1
+    return len(split_paragraphs(document_text(sections) + "\n", MAX_CHUNK_BYTES))
+
+
+def _write_sections(
+    docs_service,
+    document_id: str,
+    sections: Sequence,
+    end_index: int,
+    revision_id: Optional[str],
+) -> Dict[str, Any]:
+    """Replace a document's body with `sections`, in chunks if it is large.
+
+    Returns:
+        The response of the last `batchUpdate`.
+    """
+    if not _is_chunked(sections):
+        return _batch_update(
+            docs_service,
+            document_id,
+            build_overwrite_requests(sections, end_index),
+            revision_id,
+        )
+    return _write_chunked(docs_service, document_id, sections, end_index, revision_id)
+
+
+def _write_chunked(
+    docs_service,
+    document_id: str,
+    sections: Sequence,
+    end_index: int,
+    revision_id: Optional[str],
+) -> Dict[str, Any]:
+    """Write a large document as sequential chunked `batchUpdate` calls.
+
+    Each call is guarded by the revision the previous one produced. The old
+    content is only deleted by the last call, so if any chunk fails the
+    chunks already inserted are deleted again, leaving the document as it
+    was, and the error is raised.
+
+    Raises:
+        HttpError: If a chunk fails; the document has been rolled back.
+    """
+    batches = build_chunked_overwrite_requests(sections, end_index, MAX_CHUNK_BYTES)
+    inserted = 0
+    response: Dict[str, Any] = {}
+    for number, requests in enumerate(batches):
+        chunk = requests[0]["insertText"]["text"]
+        started = time.monotonic()
+        try:
+            with span("docs.chunk", chunk=number, chunks=len(batches)):
+                response = _batch_update(docs_service, document_id, requests, revision_id)
+        except HttpError:
+            if inserted:
+                _rollback(docs_service, document_id, inserted, revision_id)
+            raise
+        inserted += utf16_len(chunk)
+        revision_id = response.get("writeControl", {}).get("requiredRevisionId")
+        log.info(
+            "doc_chunk_written",
+            document_id=document_id,
+            chunk=number,
+            chunks=len(batches),
+            bytes=len(chunk.encode("utf-8")),
+            ms=round((time.monotonic() - started) * 1000, 1),
+        )
+    return response
+
+
+def _rollback(
+    docs_service, document_id: str, inserted: int, revision_id: Optional[str]
+) -> None:
+    """Delete the first `inserted` units written by a failed chunked write.
+
+    The request targets the revision of our last successful chunk, so the
+    range is adjusted for any edits made since. A failed rollback is logged;
+    the chunk error is what the caller sees.
+    """
+    body: Dict[str, Any] = {"requests": build_rollback_requests(inserted)}
+    if revision_id:
+        body["writeControl"] = {"targetRevisionId": revision_id}
+    try:
+        limiter("docs").call(
+            docs_service.documents().batchUpdate(documentId=document_id, body=body).execute
+        )
+        log.warning("doc_chunks_rolled_back", document_id=document_id, units=inserted)
+    except HttpError as error:
+        log.exception("doc_rollback_failed", document_id=document_id, error=str(error))
+
+
+def _is_stale_revision(error: Exception) -> bool:
+    """Return True if `error` is the API rejecting an outdated revision ID.
+
+    A `writeControl` mismatch is a 400 whose message names the revision;
+    other 400s, such as an index past the end of the body, are not stale
+    state and must fail rather than be retried.
+    """
+    if not isinstance(error, HttpError) or getattr(error.resp, "status", None) != 400:
+        return False
+    content = error.content
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    try:
+        message = json.loads(content)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        message = content
+    return "revision" in str(message).lower()
+
+
+def _record_write(
+    document_id: str,
+    sections: Sequence,
+    response: Dict[str, Any],
+    revisions: Optional[DocRevisionStore],
+    fetched: bool,
+) -> None:
+    """Record the revision state left by a successful write and log it."""
+    text = document_text(sections)
+    new_revision = (response or {}).get("writeControl", {}).get("requiredRevisionId")
+    if revisions is not None and new_revision:
+        # The body keeps its trailing newline, so it ends after our text.
+        revisions.set(
+            document_id, new_revision, utf16_len(text) + 2, document_fingerprint(sections)
+        )
+
+    log.info(
+        "doc_overwritten",
+        document_id=document_id,
+        sections=len(sections),
+        chars=len(text),
+        fetched=fetched,
+    )
+
+
 def overwrite_doc_contents(
     document_id: str,
     new_content: str,
     credentials: Credentials,
+    revisions: Optional[DocRevisionStore] = None,
 ) -> None:
     """Overwrite the entire contents of a Google Doc with new text.
 
-    Fetches the document to determine its current end index, deletes existing
-    content (if any), and inserts the provided `new_content` at the start.
+    Deletes existing content (if any) and inserts the provided `new_content`
+    at the start. See `overwrite_doc_sections` for how `revisions` is used.
 
     Args:
         document_id: The ID of the Google Doc to modify.
         new_content: The new text content to insert into the document.
         credentials: Authenticated service account credentials.
+        revisions: Optional store of locally tracked document revisions.
 
     Raises:
         HttpError: If the Google Docs API request fails.
     """
-    docs_service = build_docs_service(credentials)
+    overwrite_doc_sections(
+        document_id,
+        [DocSection(title="", content=new_content)],
+        credentials,
+        revisions=revisions,
+    )
 
-    try:
-        doc = docs_service.documents().get(documentId=document_id).execute()
-        content = doc.get("body", {}).get("content", [])
-        end_index: int = content[-1].get("endIndex", 1) if content else 1
-
-        requests = []
-        if end_index > 1:
-            requests.append(
-                {
-                    "deleteContentRange": {
-                        "range": {
-                            "startIndex": 1,
-                            "endIndex": end_index - 1,
-                        }
-                    }
-                }
-            )
 
-        requests.append(
-            {
-                "insertText": {
-                    "location": {"index": 1},
-                    "text": new_content,
-                }
-            }
-        )
+@traced("docs.overwrite")
+def overwrite_doc_sections(
+    document_id: str,
+    sections: Sequence,
+    credentials: Credentials,
+    revisions: Optional[DocRevisionStore] = None,
+) -> None:
+    """Overwrite a Google Doc with titled sections in a single batch update.
 
-        docs_service.documents().batchUpdate(
-            documentId=document_id,
-            body={"requests": requests},
-        ).execute()
+    Sends one `batchUpdate` that deletes the existing content, inserts every
+    section, and styles each section title as a heading. Heading ranges are
+    computed locally, so the request count does not grow with the number of
+    sections. Text larger than `MAX_CHUNK_BYTES` is instead inserted in
+    paragraph-aligned chunks, one `batchUpdate` each, and rolled back if a
+    chunk fails.
 
-        log.info("doc_overwritten", document_id=document_id, chars=len(new_content))
+    When `revisions` holds state from a previous write, the update is sent
+    straight away using the stored end index and guarded by
+    `writeControl.requiredRevisionId`. If the document changed since (the API
+    rejects the request with a 400 naming the revision), the state is dropped
+    and the document is fetched once to retry. The new revision ID and end
+    index are recorded in `revisions` after every successful write.
+
+    Args:
+        document_id: The ID of the Google Doc to modify.
+        sections: Objects with `title` and `content` attributes, in order.
+        credentials: Authenticated service account credentials.
+        revisions: Optional store of locally tracked document revisions.
+
+    Raises:
+        HttpError: If the Google Docs API request fails.
+    """
+    docs_service = shared_service("docs", "v1", credentials)
+    known = revisions.get(document_id) if revisions is not None else None
+
+    try:
+        response = None
+        fetched = False
+        if known is not None:
+            try:
+                response = _write_sections(
+                    docs_service, document_id, sections, known.end_index, known.revision_id
+                )
+            except HttpError as error:
+                if not _is_stale_revision(error):
+                    raise
+                log.info("doc_revision_stale", document_id=document_id)
+                revisions.forget(document_id)
+
+        if response is None:
+            fetched = True
+            end_index, revision_id = _fetch_doc_state(docs_service, document_id)
+            response = _write_sections(
+                docs_service, document_id, sections, end_index, revision_id
+            )
+
+        _record_write(document_id, sections, response, revisions, fetched)
 
     except HttpError as error:
         log.exception("doc_update_failed", document_id=document_id, error=str(error))
         raise
+
+
+@traced("docs.overwrite_batch")
+def overwrite_docs_batch(
+    docs: Sequence[Tuple[str, Sequence]],
+    credentials: Credentials,
+    revisions: Optional[DocRevisionStore] = None,
+) -> Dict[str, Optional[Exception]]:
+    """Overwrite several Docs using HTTP batch requests.
+
+    Works like `overwrite_doc_sections` for each Doc, but every
+    `documents().get` needed (for Docs without known revision state) goes
+    out in one batch round trip, and all `batchUpdate` calls in another.
+    Docs whose stored revision turns out to be stale are fetched and
+    retried together in one more get batch and one more update batch.
+    Docs too large for one request are written separately, in chunks.
+
+    Args:
+        docs: `(document_id, sections)` pairs; each Doc at most once.
+        credentials: Authenticated service account credentials.
+        revisions: Optional store of locally tracked document revisions.
+
+    Returns:
+        For every Doc ID, None if it was written, or the error that
+        prevented it. Errors are never raised.
+    """
+    docs_service = shared_service("docs", "v1", credentials)
+    sections_by_doc = dict(docs)
+    errors: Dict[str, Optional[Exception]] = {}
+    for document_id, sections in list(sections_by_doc.items()):
+        if _is_chunked(sections):
+            del sections_by_doc[document_id]
+            try:
+                overwrite_doc_sections(document_id, sections, credentials, revisions)
+                errors[document_id] = None
+            except Exception as error:  # noqa: BLE001 - reported per Doc
+                errors[document_id] = error
+    state: Dict[str, Tuple[int, Optional[str]]] = {}
+    to_fetch: List[str] = []
+    for document_id in sections_by_doc:
+        known = revisions.get(document_id) if revisions is not None else None
+        if known is not None:
+            state[document_id] = (known.end_index, known.revision_id)
+        else:
+            to_fetch.append(document_id)
+
+    fetched: Set[str] = set()
+    while True:
+        if to_fetch:
+            gets = {d: docs_service.documents().get(documentId=d) for d in to_fetch}
+            for document_id, (doc, error) in execute_batch(
+                docs_service, gets, BATCH_LIMIT, limiter("docs")
+            ).items():
+                if error is not None:
+                    errors[document_id] = error
+                else:
+                    state[document_id] = _doc_state(doc)
+                    fetched.add(document_id)
+
+        updates = {
+            document_id: _batch_update_request(
+                docs_service,
+                document_id,
+                build_overwrite_requests(sections_by_doc[document_id], end_index),
+                revision_id,
+            )
+            for document_id, (end_index, revision_id) in state.items()
+        }
+        state, to_fetch = {}, []
+        for document_id, (response, error) in execute_batch(
+            docs_service, updates, BATCH_LIMIT, limiter("docs")
+        ).items():
+            sections = sections_by_doc[document_id]
+            if error is None:
+                errors[document_id] = None
+                _record_write(document_id, sections, response, revisions,
+                              document_id in fetched)
+            elif _is_stale_revision(error) and document_id not in fetched:
+                log.info("doc_revision_stale", document_id=document_id)
+                revisions.forget(document_id)
+                to_fetch.append(document_id)
+            else:
+                errors[document_id] = error
+
+        if not to_fetch:
+            break
+
+    for document_id, error in errors.items():
+        if error is not None:
+            log.error("doc_update_failed", document_id=document_id, error=str(error))
+    log.info(
+        "docs_batch_written",
+        docs=len(errors),
+        failed=sum(1 for e in errors.values() if e is not None),
+    )
+    return errors
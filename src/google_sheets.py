@@ -2,18 +2,37 @@
 
 This module exposes a thin wrapper that authorizes a Sheets client with a
 service account and returns all records from a specific worksheet tab.
+Clients share the pooled session from `src.transport`, so repeated reads
+reuse open connections, and concurrent reads are capped by the adaptive
+"sheets" limiter from `src.concurrency`. Every request times out within
+the time left before the run deadline (see `src.deadline`).
 """
 
 from typing import Any, Dict, List
 
 import gspread
 from google.oauth2.service_account import Credentials
+from gspread.http_client import HTTPClient
 
+from src.concurrency import limiter
+from src.deadline import call_timeout
 from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
+from src.transport import authorized_session
 
 log = get_logger(__name__)
 
 
+class _DeadlineHTTPClient(HTTPClient):
+    """gspread HTTP client giving each request its own timeout."""
+
+    def request(self, *args, **kwargs):
+        """Send a request with a timeout from `call_timeout()`."""
+        self.set_timeout(call_timeout())
+        return super().request(*args, **kwargs)
+
+
+@traced("sheets.get_rows")
 def get_sheet_rows(
     sheet_name: str,
     spreadsheet_id: str,
@@ -21,9 +40,10 @@ def get_sheet_rows(
 ) -> List[Dict[str, Any]]:
     """Return all rows from a worksheet as a list of dictionaries.
 
-    Authorizes a gspread client using the provided service account credentials,
-    opens the spreadsheet by ID, selects the named worksheet tab, and returns
-    its records, where each row is mapped by the header row.
+    Authorizes a gspread client on the shared session for the provided
+    service account credentials, opens the spreadsheet by ID, selects the
+    named worksheet tab, and returns its records, where each row is mapped
+    by the header row. Reads rejected with 429/503 are retried with backoff.
 
     Args:
         sheet_name: Name of the worksheet tab to read.
@@ -38,11 +58,18 @@ def get_sheet_rows(
         WorksheetNotFound: If the named worksheet does not exist.
         APIError: For other Google Sheets API-related errors (quota, auth, etc.).
     """
-    try:
-        client = gspread.authorize(credentials)
+    def fetch():
+        client = gspread.authorize(
+            credentials,
+            http_client=_DeadlineHTTPClient,
+            session=authorized_session(credentials),
+        )
         sheet = client.open_by_key(spreadsheet_id)
         worksheet = sheet.worksheet(sheet_name)
-        rows = worksheet.get_all_records()
+        return worksheet.get_all_records()
+
+    try:
+        rows = limiter("sheets").call(fetch)
         log.info(
             "sheet_rows_fetched",
             spreadsheet_id=spreadsheet_id,
@@ -0,0 +1,111 @@
+"""Append-only journal of planned and completed Doc writes.
+
+Each run appends one JSON line per event to a per-day journal file and
+fsyncs it immediately, so the record survives the process being killed
+mid-run. A resumed run reads the journal back to find which Docs were
+already written today.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+PLANNED = "planned"
+COMPLETED = "completed"
+
+
+class RunJournal:
+    """JSONL write-ahead journal for one run.
+
+    Records are written with `os.write` on an `O_APPEND` descriptor rather
+    than through a buffered file object, so `flush()` is safe to call from a
+    signal handler while a record is being written. With no `path`, records
+    are kept in memory only.
+
+    Attributes:
+        path: Journal file, or None for an in-memory journal.
+        run_id: Identifier stamped on every record from this run.
+    """
+
+    def __init__(self, path: Optional[Path], run_id: str):  # noqa: D107
+        self.path = Path(path) if path else None
+        self.run_id = run_id
+        self._lock = threading.RLock()
+        self._records: List[dict] = self._read(self.path) if self.path else []
+        self._fd: Optional[int] = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    @staticmethod
+    def _read(path: Path) -> List[dict]:
+        """Load existing records, skipping a torn final line."""
+        if not path.exists():
+            return []
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    log.warning("journal_line_skipped", path=str(path))
+        return records
+
+    def _append(self, event: str, doc_id: str, content_hash: str) -> None:
+        """Append and fsync a single record."""
+        record = {
+            "ts": time.time(),
+            "run_id": self.run_id,
+            "event": event,
+            "doc_id": doc_id,
+            "content_hash": content_hash,
+        }
+        with self._lock:
+            self._records.append(record)
+            if self._fd is not None:
+                os.write(self._fd, (json.dumps(record) + "\n").encode("utf-8"))
+                os.fsync(self._fd)
+
+    def record_planned(self, doc_id: str, content_hash: str) -> None:
+        """Record that `doc_id` is about to be written with `content_hash`."""
+        self._append(PLANNED, doc_id, content_hash)
+
+    def record_completed(self, doc_id: str, content_hash: str) -> None:
+        """Record that `doc_id` was written with `content_hash`."""
+        self._append(COMPLETED, doc_id, content_hash)
+
+    def completed(self) -> Dict[str, str]:
+        """Return the content hash last completed for each Doc in the journal."""
+        with self._lock:
+            return {
+                r["doc_id"]: r["content_hash"]
+                for r in self._records
+                if r.get("event") == COMPLETED
+            }
+
+    def outstanding(self) -> List[str]:
+        """Return Docs planned in the journal but never completed."""
+        done = self.completed()
+        with self._lock:
+            planned = [r["doc_id"] for r in self._records if r.get("event") == PLANNED]
+        return sorted({doc_id for doc_id in planned if doc_id not in done})
+
+    def flush(self) -> None:
+        """Force journal records to stable storage."""
+        if self._fd is not None:
+            os.fsync(self._fd)
+
+    def close(self) -> None:
+        """Flush and close the journal file."""
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,128 @@
+"""Compile rendered Markdown into Doc text plus formatting.
+
+Blocks with `format: markdown` render their template as Markdown. The
+compiler strips the Markdown syntax, leaving the text that is inserted into
+the Doc, and records where headings, list items, bold and italic text, and
+links fall as `Format` ranges. `build_overwrite_requests` turns those into
+style requests. Consecutive list items are merged into one range, so a list
+costs one request however long it is.
+
+Supported syntax, one construct per line:
+    # to ###### headings, "-", "*" or "+" bullets, "1." or "1)" numbered
+    items, **bold** or __bold__, *italic*, [text](url), and backslash
+    escapes for literal characters.
+
+Compilation is memoized per line. Most lines of a rendered template are the
+same on every run, so only lines containing changed variable values are
+parsed again.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+from src.docs_requests import Format, utf16_len
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BULLET = re.compile(r"^\s*[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_INLINE = re.compile(
+    r"\\(?P<escaped>[\\`*_\[\]()#+\-.!])"
+    r"|\[(?P<link_text>[^\]]+)\]\((?P<url>[^)\s]+)\)"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold_alt>.+?)__"
+    r"|\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*"
+)
+
+
+def _inline(source: str) -> Tuple[str, List[Format]]:
+    """Strip inline markup from `source`, returning text and text formats."""
+    parts: List[str] = []
+    formats: List[Format] = []
+    offset = 0
+    position = 0
+    for match in _INLINE.finditer(source):
+        before = source[position:match.start()]
+        parts.append(before)
+        offset += utf16_len(before)
+        position = match.end()
+
+        if match.group("escaped") is not None:
+            parts.append(match.group("escaped"))
+            offset += 1
+            continue
+
+        if match.group("link_text") is not None:
+            inner, kind, value = match.group("link_text"), "link", match.group("url")
+        elif match.group("italic") is not None:
+            inner, kind, value = match.group("italic"), "italic", ""
+        else:
+            inner, kind, value = match.group("bold") or match.group("bold_alt"), "bold", ""
+
+        text, nested = _inline(inner)
+        length = utf16_len(text)
+        parts.append(text)
+        formats.append(Format(offset, offset + length, kind, value))
+        formats.extend(f._replace(start=f.start + offset, end=f.end + offset) for f in nested)
+        offset += length
+
+    parts.append(source[position:])
+    return "".join(parts), formats
+
+
+@lru_cache(maxsize=4096)
+def _compile_line(line: str) -> Tuple[str, str, str, Tuple[Format, ...]]:
+    """Compile one Markdown line.
+
+    Returns:
+        The line's text, its paragraph kind ("" for a plain paragraph), the
+        heading style if it is a heading, and its text formats relative to
+        the start of the line.
+    """
+    kind, style = "", ""
+    heading = _HEADING.match(line)
+    if heading:
+        kind, style = "heading", f"HEADING_{len(heading.group(1))}"
+        line = heading.group(2)
+    else:
+        for pattern, name in ((_BULLET, "bullet"), (_NUMBERED, "numbered")):
+            item = pattern.match(line)
+            if item:
+                kind, line = name, item.group(1)
+                break
+    text, formats = _inline(line)
+    return text, kind, style, tuple(formats)
+
+
+def compile_markdown(source: str) -> Tuple[str, Tuple[Format, ...]]:
+    """Compile rendered Markdown into plain text and its formatting.
+
+    Args:
+        source: Rendered Markdown.
+
+    Returns:
+        The text to insert and the `Format`s to apply to it, with offsets
+        in UTF-16 code units from the start of the text.
+    """
+    texts: List[str] = []
+    paragraphs: List[Format] = []
+    spans: List[Format] = []
+    offset = 0
+    for line in source.split("\n"):
+        text, kind, style, formats = _compile_line(line)
+        length = utf16_len(text)
+        if kind and length:
+            previous = paragraphs[-1] if paragraphs else None
+            if (
+                kind != "heading"
+                and previous is not None
+                and previous.kind == kind
+                and previous.end + 1 == offset
+            ):
+                paragraphs[-1] = previous._replace(end=offset + length)
+            else:
+                paragraphs.append(Format(offset, offset + length, kind, style))
+        spans.extend(f._replace(start=f.start + offset, end=f.end + offset) for f in formats)
+        texts.append(text)
+        offset += length + 1
+    return "\n".join(texts), tuple(paragraphs + spans)
@@ -21,14 +21,30 @@ Usage:
 
         log = get_logger(__name__)
         log.info("some_event", key="value")
+
+By default records are handed to a queue and rendered to JSON and written by
+a background listener thread, so logging never blocks on stdout. Set
+LOG_ASYNC=0 to render and write synchronously instead. Call
+`shutdown_logging()` before exit to drain the queue.
 """
 
+import atexit
+import itertools
+import json
 import logging
 import os
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Callable, Dict, Optional
 
 import structlog
 
+_listener: Optional[QueueListener] = None
+_queue: Optional[SimpleQueue] = None
+_handler: Optional[logging.Handler] = None
+
 
 def _level_from_env(default: str = "INFO") -> str:
     """Read the desired log level from the LOG_LEVEL environment variable.
@@ -42,25 +58,106 @@ def _level_from_env(default: str = "INFO") -> str:
     return os.getenv("LOG_LEVEL", default).upper()
 
 
-def configure_logging(service_name: str = "daily-task-bot"):
+def _json_serializer() -> Callable[..., str]:
+    """Return orjson-backed `dumps` when orjson is installed, else `json.dumps`."""
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps
+
+    def dumps(obj, default=None, **kwargs) -> str:  # noqa: ARG001 - json.dumps compat
+        return orjson.dumps(obj, default=default).decode("utf-8")
+
+    return dumps
+
+
+def _debug_sampler(every: int):
+    """Build a processor that keeps one in `every` debug events per event name.
+
+    Per-row and per-block events are logged at debug level; at high block
+    counts they dominate log volume, so only a deterministic sample of each
+    is kept. Other levels always pass through.
+
+    Args:
+        every: Keep the first of every `every` occurrences; 1 keeps all.
+
+    Returns:
+        A structlog processor.
+    """
+    counters: Dict[str, itertools.count] = {}
+
+    def sampler(logger, method_name, event_dict):  # noqa: ARG001 - processor API
+        if every <= 1 or method_name != "debug":
+            return event_dict
+        counter = counters.setdefault(str(event_dict.get("event")), itertools.count())
+        if next(counter) % every:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = every
+        return event_dict
+
+    return sampler
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves rendering to the listener thread."""
+
+    def prepare(self, record):  # noqa: D102
+        return record
+
+
+def configure_logging(service_name: str = "daily-task-bot", async_logging=None):
     """Set up structured logging for the application.
 
     Configures both the Python stdlib logger and structlog to output
     single-line JSON to stdout. This should be called once at process
     startup, typically from main.py.
 
+    Event dicts are built on the calling thread; JSON rendering (via orjson
+    when available) and the stdout write happen in the handler, which by
+    default sits behind a queue drained by a background thread. Debug events
+    are sampled according to LOG_SAMPLE_RATE (keep one in N per event name).
+
     Args:
         service_name: Value to attach to log entries identifying the service.
+        async_logging: Use the queue-backed handler. Defaults to the LOG_ASYNC
+            environment variable, which defaults to on.
 
     Returns:
         A structlog logger pre-bound with the service name.
     """
-    # Route stdlib logs to stdout with a simple formatter (message only).
-    logging.basicConfig(
-        level=_level_from_env(),
-        format="%(message)s",
-        stream=sys.stdout,
+    global _handler, _listener, _queue
+
+    if async_logging is None:
+        async_logging = os.getenv("LOG_ASYNC", "1").lower() not in ("0", "false", "no")
+
+    shared = [
+        structlog.processors.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso"),
+    ]
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processor=structlog.processors.JSONRenderer(serializer=_json_serializer()),
+        foreign_pre_chain=shared,
     )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    # Replace our own handler if logging was configured before.
+    shutdown_logging()
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+
+    handler: logging.Handler = stream_handler
+    if async_logging:
+        _queue = SimpleQueue()  # put() is reentrant, so safe in signal handlers
+        handler = _DeferredQueueHandler(_queue)
+        _listener = QueueListener(_queue, stream_handler)
+        _listener.start()
+
+    # Route stdlib logs (ours and third-party) through the chosen handler.
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(_level_from_env())
+    _handler = handler
 
     # Reduce noise from common third-party libraries.
     for noisy in ("uvicorn", "urllib3", "botocore", "google", "asyncio"):
@@ -69,10 +166,10 @@ def configure_logging(service_name: str = "daily-task-bot"):
     structlog.configure(
         processors=[
             structlog.contextvars.merge_contextvars,  # include bound contextvars
-            structlog.processors.add_log_level,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.dict_tracebacks,
-            structlog.processors.JSONRenderer(),
+            _debug_sampler(int(os.getenv("LOG_SAMPLE_RATE", "1"))),
+            *shared,
+            structlog.processors.dict_tracebacks,  # needs the caller's exc_info
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         wrapper_class=structlog.make_filtering_bound_logger(
             getattr(logging, _level_from_env())
@@ -85,6 +182,31 @@ def configure_logging(service_name: str = "daily-task-bot"):
     return structlog.get_logger().bind(service=service_name)
 
 
+def flush_logging(timeout: float = 2.0) -> None:
+    """Wait (up to `timeout` seconds) for queued records to be written.
+
+    Unlike `shutdown_logging`, the listener keeps running, so this is safe to
+    call from a signal handler while the application continues to log.
+    """
+    deadline = time.monotonic() + timeout
+    while _queue is not None and not _queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sys.stdout.flush()
+
+
+def shutdown_logging() -> None:
+    """Drain the log queue and stop the listener thread, if one is running."""
+    global _listener, _queue
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        _queue = None
+    sys.stdout.flush()
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: str | None = None):
     """Return a structlog logger for the given name.
 
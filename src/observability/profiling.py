@@ -0,0 +1,307 @@
+"""On-demand profiling of a single run.
+
+A capture records any of three views of one run and writes them to a
+directory when the run ends:
+
+* ``cpu``: a cProfile of the run's thread, saved as ``.pstats`` (open with
+  ``python -m pstats``, snakeviz, or convert with flameprof).
+* ``memory``: tracemalloc allocations still live at the end of the run,
+  saved as the top-N allocation sites in ``.alloc.txt``.
+* ``wall``: a wall-clock sampler of every thread, saved as collapsed stacks
+  in ``.folded`` for flamegraph.pl, speedscope, or inferno. Unlike cProfile
+  it sees time spent waiting on the network and in writer threads.
+
+Capture is armed for the next run by the PROFILE environment variable at
+startup or by SIGUSR1 at any time. A SIGUSR1 that arrives during a run
+starts capturing at the next block, for the rest of that run. Only one run
+is captured per request. When nothing is armed, `profile_run()` and
+`checkpoint()` only read a module-level flag, so there is no profiling
+overhead.
+
+Usage:
+    In your main entrypoint:
+
+        from src.observability.profiling import configure_profiling
+
+        configure_profiling()
+
+    Around the run:
+
+        with profile_run("run"):
+            ...
+
+Environment:
+    PROFILE: Modes to capture for the first run: a comma-separated subset of
+        cpu, memory, wall, or "all". Unset or empty disables profiling.
+    PROFILE_DIR: Directory profiles are written to (default: ./profiles).
+    PROFILE_TOP_N: Allocation sites to report (default: 25).
+    PROFILE_SAMPLE_INTERVAL: Seconds between wall-clock samples (default: 0.005).
+"""
+
+import cProfile
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+MODES = frozenset({"cpu", "memory", "wall"})
+
+_directory = Path("profiles")
+_top_n = 25
+_sample_interval = 0.005
+_default_modes: FrozenSet[str] = MODES
+
+# Modes armed for the next capture; empty when profiling is off.
+_requested: FrozenSet[str] = frozenset()
+# Name of the outermost run in progress, if any.
+_active_run: Optional[str] = None
+_capture: Optional["Capture"] = None
+
+
+def parse_modes(value: Optional[str]) -> FrozenSet[str]:
+    """Parse a PROFILE value into a set of modes.
+
+    Raises:
+        ValueError: If it names an unknown mode.
+    """
+    if not value or not value.strip():
+        return frozenset()
+    names = {part.strip().lower() for part in value.split(",") if part.strip()}
+    if names & {"1", "all", "true", "yes"}:
+        return MODES
+    unknown = names - MODES
+    if unknown:
+        raise ValueError(f"Unknown profiling mode(s): {', '.join(sorted(unknown))}")
+    return frozenset(names)
+
+
+class WallClockSampler:
+    """Samples the stacks of all threads at a fixed interval in a daemon thread.
+
+    Attributes:
+        interval: Seconds between samples.
+        stacks: Sample count per collapsed stack (``outer;...;inner``).
+    """
+
+    def __init__(self, interval: float):  # noqa: D107
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Sampling loop run by the sampler thread."""
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.sample(frame, names.get(ident, str(ident)))
+
+    def sample(self, frame, thread_name: str) -> None:
+        """Record one sample of `frame`'s stack under `thread_name`."""
+        stack: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.append(thread_name)
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Return the samples in collapsed-stack format, one stack per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Capture:
+    """The profilers running for one captured run.
+
+    Attributes:
+        name: Name of the captured run, used in output file names.
+        modes: Views being recorded.
+    """
+
+    def __init__(self, name: str, modes: Iterable[str]):  # noqa: D107
+        self.name = name
+        self.modes = frozenset(modes)
+        self.started = time.time()
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[WallClockSampler] = None
+        self._tracing_memory = False
+
+    def start(self) -> None:
+        """Start every requested profiler."""
+        if "memory" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._tracing_memory = True
+        if "wall" in self.modes:
+            self._sampler = WallClockSampler(_sample_interval)
+            self._sampler.start()
+        if "cpu" in self.modes:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        log.info("profile_capture_started", run=self.name, modes=sorted(self.modes))
+
+    def stop(self, directory: Path) -> Dict[str, str]:
+        """Stop the profilers and write their output to `directory`.
+
+        Returns:
+            The path written for each mode.
+        """
+        if self._profile is not None:
+            self._profile.disable()
+        snapshot = None
+        if self._tracing_memory:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(self.started))
+        stem = f"{stamp}-{os.getpid()}-{self.name}"
+        written = {}
+        if self._profile is not None:
+            path = directory / f"{stem}.pstats"
+            self._profile.dump_stats(str(path))
+            written["cpu"] = str(path)
+        if snapshot is not None:
+            path = directory / f"{stem}.alloc.txt"
+            path.write_text(_format_allocations(snapshot, _top_n), encoding="utf-8")
+            written["memory"] = str(path)
+        if self._sampler is not None:
+            path = directory / f"{stem}.folded"
+            path.write_text(self._sampler.folded(), encoding="utf-8")
+            written["wall"] = str(path)
+        log.info(
+            "profile_capture_written",
+            run=self.name,
+            seconds=round(time.time() - self.started, 3),
+            **written,
+        )
+        return written
+
+
+def _format_allocations(snapshot, top_n: int) -> str:
+    """Return the `top_n` allocation sites of a tracemalloc snapshot as text."""
+    stats = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in stats)
+    lines = [f"# {len(stats)} sites, {total / 1024:.1f} KiB live at end of run"]
+    for stat in stats[:top_n]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def configure_profiling(modes: Optional[str] = None, directory=None) -> FrozenSet[str]:
+    """Read profiling settings and arm a capture of the first run if asked to.
+
+    Args:
+        modes: Modes to capture, as for PROFILE; defaults to PROFILE.
+        directory: Output directory; defaults to PROFILE_DIR or ./profiles.
+
+    Returns:
+        The modes armed for the next run (empty when profiling is off).
+
+    Raises:
+        ValueError: If a mode is unknown.
+    """
+    global _directory, _top_n, _sample_interval, _default_modes, _requested
+    _directory = Path(directory or os.getenv("PROFILE_DIR") or "profiles")
+    _top_n = int(os.getenv("PROFILE_TOP_N", "25"))
+    _sample_interval = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+    armed = parse_modes(modes if modes is not None else os.getenv("PROFILE"))
+    _default_modes = armed or MODES
+    _requested = armed
+    if armed:
+        log.info("profiling_armed", modes=sorted(armed), directory=str(_directory))
+    return armed
+
+
+def request_profile(modes: Optional[Iterable[str]] = None) -> None:
+    """Arm a capture of the next run, or of the rest of the run in progress.
+
+    Only sets a flag, so it is safe to call from a signal handler; the
+    capture itself starts at the next `profile_run()` or `checkpoint()`.
+    """
+    global _requested
+    _requested = frozenset(modes) if modes else _default_modes
+
+
+def install_signal_handler() -> bool:
+    """Arm a capture whenever the process receives SIGUSR1.
+
+    Returns:
+        False on platforms without SIGUSR1.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: request_profile())
+    return True
+
+
+def checkpoint() -> None:
+    """Start an armed capture now if a run is in progress without one.
+
+    Called between units of work so a SIGUSR1 during a long run takes effect
+    before the run ends.
+    """
+    global _capture, _requested
+    if not _requested or _active_run is None or _capture is not None:
+        return
+    _capture, _requested = Capture(_active_run, _requested), frozenset()
+    _capture.start()
+
+
+@contextmanager
+def profile_run(name: str) -> Iterator[None]:
+    """Capture the enclosed run if a capture is armed.
+
+    Nested runs (e.g. a run inside a watch poll) belong to the outermost
+    one. Profiling failures are logged and never fail the run.
+
+    Args:
+        name: Run name, used in output file names.
+    """
+    global _active_run, _capture
+    if _active_run is not None:
+        yield
+        return
+
+    _active_run = name
+    try:
+        try:
+            checkpoint()
+        except Exception as e:  # noqa: BLE001 - profiling must never break a run
+            log.warning("profile_start_failed", run=name, error=str(e))
+        yield
+    finally:
+        capture, _capture, _active_run = _capture, None, None
+        if capture is not None:
+            try:
+                capture.stop(_directory)
+            except Exception as e:  # noqa: BLE001 - profiling must never break a run
+                log.warning("profile_write_failed", run=name, error=str(e))
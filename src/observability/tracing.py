@@ -0,0 +1,275 @@
+"""Lightweight tracing for the Sheets -> render -> Docs pipeline.
+
+Spans follow the OpenTelemetry data model (128-bit trace IDs, 64-bit span
+IDs, parent links, nanosecond timestamps, attributes, status) and are
+exported as OTLP/JSON, either POSTed to a local OTLP/HTTP collector or
+appended to a JSON-lines file. No OpenTelemetry packages are required.
+
+Tracing is off until `configure_tracing()` finds an exporter; until then
+`span()` does no bookkeeping at all.
+
+Usage:
+    In your main entrypoint:
+
+        from src.observability.tracing import configure_tracing
+
+        configure_tracing(service_name="daily-task-bot")
+
+    Around work you want timed:
+
+        from src.observability.tracing import span, traced
+
+        with span("block", block=block.name):
+            ...
+
+        @traced("sheets.get_rows")
+        def get_sheet_rows(...):
+            ...
+
+Environment:
+    OTEL_EXPORTER_OTLP_ENDPOINT: Collector base URL, e.g. http://localhost:4318.
+    TRACE_EXPORT_PATH: File to append OTLP/JSON span batches to.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import structlog
+
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "trace_id", default=None
+)
+
+_exporter: Optional["OtlpJsonExporter"] = None
+
+
+class Span:
+    """A single timed operation within a trace.
+
+    Attributes:
+        name: Operation name, e.g. "docs.overwrite".
+        trace_id: 32-hex-char ID shared by every span in the run.
+        span_id: 16-hex-char ID of this span.
+        parent_span_id: ID of the enclosing span, if any.
+        attributes: Key/value details attached to the span.
+    """
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id", "attributes",
+        "start_ns", "end_ns", "status", "error",
+    )
+
+    def __init__(self, name, trace_id, parent_span_id, attributes):  # noqa: D107
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = _STATUS_OK
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach or overwrite an attribute on the span."""
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Return the span in OTLP/JSON form."""
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            otlp["parentSpanId"] = self.parent_span_id
+        if self.error:
+            otlp["status"]["message"] = self.error
+        return otlp
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode one attribute as an OTLP KeyValue."""
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+class OtlpJsonExporter:
+    """Buffer finished spans and export them as OTLP/JSON batches.
+
+    Attributes:
+        service_name: Value of the `service.name` resource attribute.
+        endpoint: OTLP/HTTP collector base URL, or None.
+        path: File that batches are appended to as JSON lines, or None.
+    """
+
+    def __init__(self, service_name, endpoint=None, path=None):  # noqa: D107
+        self.service_name = service_name
+        self.endpoint = endpoint.rstrip("/") if endpoint else None
+        self.path = path
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, finished: Span) -> None:
+        """Buffer a finished span for the next flush."""
+        with self._lock:
+            self._spans.append(finished)
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """Build an OTLP ExportTraceServiceRequest for `spans`."""
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [_otlp_attribute("service.name", self.service_name)]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "daily-task-bot"},
+                    "spans": [s.to_otlp() for s in spans],
+                }],
+            }]
+        }
+
+    def flush(self) -> int:
+        """Export buffered spans; export errors are logged, never raised.
+
+        Returns:
+            The number of spans exported.
+        """
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return 0
+
+        body = json.dumps(self.payload(spans))
+        try:
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            if self.endpoint:
+                request = urllib.request.Request(
+                    self.endpoint + "/v1/traces",
+                    data=body.encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                with urllib.request.urlopen(request, timeout=5):
+                    pass
+        except Exception as e:  # noqa: BLE001 - tracing must never break a run
+            log.warning("trace_export_failed", spans=len(spans), error=str(e))
+            return 0
+
+        log.info("trace_exported", spans=len(spans))
+        return len(spans)
+
+
+def configure_tracing(service_name: str = "daily-task-bot", endpoint=None, path=None):
+    """Enable span export if an OTLP endpoint or export file is configured.
+
+    Args:
+        service_name: Value of the exported `service.name` resource attribute.
+        endpoint: OTLP/HTTP base URL; defaults to OTEL_EXPORTER_OTLP_ENDPOINT.
+        path: JSON-lines export file; defaults to TRACE_EXPORT_PATH.
+
+    Returns:
+        The active exporter, or None if tracing stays disabled.
+    """
+    global _exporter
+    endpoint = endpoint or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    path = path or os.getenv("TRACE_EXPORT_PATH")
+    _exporter = OtlpJsonExporter(service_name, endpoint, path) if endpoint or path else None
+    if _exporter:
+        log.info("tracing_configured", endpoint=endpoint, path=path)
+    return _exporter
+
+
+def start_trace() -> str:
+    """Begin a new trace for a run and bind its ID into structlog contextvars.
+
+    Returns:
+        The new 32-hex-char trace ID.
+    """
+    trace_id = secrets.token_hex(16)
+    _trace_id.set(trace_id)
+    structlog.contextvars.bind_contextvars(trace_id=trace_id)
+    return trace_id
+
+
+def flush_tracing() -> int:
+    """Export spans buffered so far. Returns the number exported."""
+    return _exporter.flush() if _exporter else 0
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span.
+
+    Yields the span (or None when tracing is disabled) so callers can add
+    attributes discovered along the way. Exceptions mark the span as failed
+    and propagate unchanged.
+
+    Args:
+        name: Operation name.
+        **attributes: Initial span attributes.
+    """
+    exporter = _exporter
+    if exporter is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    trace_id = _trace_id.get() or start_trace()
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = _STATUS_ERROR
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        exporter.add(current)
+
+
+def traced(name: str) -> Callable:
+    """Decorate a function so each call is recorded as a span named `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,161 @@
+"""Docs rendered ahead of the day they are written for.
+
+The evening before, `DailyTaskBot.prerender()` reads and renders tomorrow's
+content for every block and saves it here, together with what it was
+rendered from: the spreadsheet's Drive version, a hash of each block's
+source row, and a fingerprint of the config and templates. At the morning
+trigger the run only has to check those. An unchanged Drive version means
+every Doc is still valid with a single metadata call; otherwise the tabs
+are read again and only Docs whose source rows changed are rendered again.
+A config or template change discards the whole pre-render.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.doc_output import BlockSection, DocOutput
+from src.docs_requests import Format
+from src.observability.logging_setup import get_logger
+from src.utils import content_hash
+
+log = get_logger(__name__)
+
+
+def source_hash(task: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Return the fingerprint of a block's source row, or None for no row."""
+    if task is None:
+        return None
+    return content_hash(json.dumps(task, sort_keys=True, default=str))
+
+
+def config_fingerprint(config) -> str:
+    """Return a fingerprint of everything besides rows that shapes the output.
+
+    Covers the sheet settings, every block's config, and the contents of
+    every enabled block's template file.
+    """
+    templates = {
+        str(block.template_path): Path(block.template_path).read_text(encoding="utf-8")
+        for block in config.doc_blocks
+        if block.enabled
+    }
+    return content_hash(json.dumps(
+        {
+            "sheets": config.google_sheets.model_dump(mode="json"),
+            "blocks": [block.model_dump(mode="json") for block in config.doc_blocks],
+            "templates": templates,
+        },
+        sort_keys=True,
+    ))
+
+
+@dataclass
+class PrerenderedDoc:
+    """One Doc rendered ahead of time.
+
+    Attributes:
+        output: The sections to write.
+        sources: Source row hash of each block targeting the Doc, in config
+            order; None for a block that had no row for the day.
+        rendered: The index (into the Doc's blocks), title and task row of
+            each rendered block, for the run's `on_block_rendered` callback.
+    """
+    output: DocOutput
+    sources: List[Optional[str]]
+    rendered: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class Prerender:
+    """Every Doc rendered ahead of time for one day.
+
+    Attributes:
+        day: Date the content was rendered for.
+        version: Drive version of the spreadsheet before its tabs were read.
+        config: `config_fingerprint` of the config used.
+        docs: Rendered Docs, by Doc ID.
+    """
+    day: str
+    version: Optional[str]
+    config: str
+    docs: Dict[str, PrerenderedDoc] = field(default_factory=dict)
+
+
+class PrerenderStore:
+    """Pre-rendered Docs saved as one JSON file per day, written atomically.
+
+    Attributes:
+        directory: Directory holding the files.
+    """
+
+    def __init__(self, directory):  # noqa: D107
+        self.directory = Path(directory)
+
+    def _path(self, day: str) -> Path:
+        """Return the file holding the pre-render for `day`."""
+        return self.directory / f"{day}.json"
+
+    def save(self, prerender: Prerender) -> None:
+        """Write `prerender`, replacing any earlier one for its day."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "day": prerender.day,
+            "version": prerender.version,
+            "config": prerender.config,
+            "docs": [
+                {
+                    "doc_id": doc_id,
+                    "sections": [
+                        {"block": s.block_name, "title": s.title, "content": s.content,
+                         "formatting": s.formatting}
+                        for s in doc.output.sections
+                    ],
+                    "sources": doc.sources,
+                    "rendered": doc.rendered,
+                }
+                for doc_id, doc in prerender.docs.items()
+            ],
+        }
+        path = self._path(prerender.day)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(payload, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load(self, day: str) -> Optional[Prerender]:
+        """Return the pre-render for `day`, or None if there is no usable one."""
+        path = self._path(day)
+        if not path.exists():
+            return None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            docs = {
+                doc["doc_id"]: PrerenderedDoc(
+                    output=DocOutput(doc["doc_id"], [
+                        BlockSection(
+                            s["block"],
+                            s["title"],
+                            s["content"],
+                            tuple(Format(*f) for f in s.get("formatting", ())),
+                        )
+                        for s in doc["sections"]
+                    ]),
+                    sources=doc["sources"],
+                    rendered=doc["rendered"],
+                )
+                for doc in raw["docs"]
+            }
+            return Prerender(raw["day"], raw["version"], raw["config"], docs)
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning("prerender_unreadable", path=str(path), error=str(e))
+            return None
+
+    def prune(self, before: str) -> None:
+        """Delete pre-renders for days before `before`."""
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob("*.json"):
+            if path.stem < before:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,146 @@
+"""Local SQLite copy of the schedule held in the spreadsheet.
+
+Plans that span years make every run fetch and scan thousands of rows per
+tab just to find one. `ScheduleStore` keeps each tab's rows in an indexed
+SQLite table instead, so "what is due today" is one indexed query. A sync
+compares each row's hash with the stored one and only writes rows that
+changed, and is skipped entirely while the spreadsheet's Drive version is
+the one last synced.
+
+Rows are stored once per tab rather than once per block: blocks that share
+a tab share its rows, and the bot maps each block to its tab's due row.
+"""
+
+import json
+import time
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.observability.logging_setup import get_logger
+from src.sheet_watch import rows_hash
+from src.sqlite_store import connect_store, open_store
+
+log = get_logger(__name__)
+
+
+class ScheduleStore:
+    """Sheet rows indexed by date in a SQLite database.
+
+    Attributes:
+        path: SQLite database file.
+    """
+
+    def __init__(self, path):  # noqa: D107
+        self.path = open_store(path)
+        with closing(connect_store(self.path)) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schedule ("
+                " sheet TEXT NOT NULL, row_index INTEGER NOT NULL,"
+                " day TEXT NOT NULL, row_hash TEXT NOT NULL, payload TEXT NOT NULL,"
+                " PRIMARY KEY (sheet, row_index))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS schedule_day ON schedule (day, sheet, row_index)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tabs ("
+                " sheet TEXT PRIMARY KEY, rows INTEGER NOT NULL, synced_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def sync(
+        self, sheet: str, rows: List[Dict[str, Any]], date_column: str = "Date"
+    ) -> Dict[str, int]:
+        """Bring the stored copy of a tab in line with `rows`.
+
+        Rows are matched by position; a row is rewritten only if its hash
+        changed, and stored rows past the end of `rows` are deleted.
+
+        Args:
+            sheet: Name of the worksheet tab.
+            rows: The tab's rows, as returned by `get_sheet_rows`.
+            date_column: Column holding each row's date string.
+
+        Returns:
+            Counts of rows `inserted`, `updated`, `deleted`, and `unchanged`.
+
+        Raises:
+            KeyError: If a row has no `date_column`; the stored copy is left
+                unchanged.
+        """
+        for i, row in enumerate(rows):
+            if date_column not in row:
+                log.exception("date_column_missing", sheet=sheet, row_index=i,
+                              date_column=date_column)
+                raise KeyError(f"Missing required date column: {date_column!r}")
+
+        counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        with closing(connect_store(self.path)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = dict(conn.execute(
+                "SELECT row_index, row_hash FROM schedule WHERE sheet = ?", (sheet,)
+            ))
+            for i, row in enumerate(rows):
+                digest = rows_hash([row])
+                previous = stored.get(i)
+                if previous == digest:
+                    counts["unchanged"] += 1
+                    continue
+                counts["inserted" if previous is None else "updated"] += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO schedule"
+                    " (sheet, row_index, day, row_hash, payload) VALUES (?, ?, ?, ?, ?)",
+                    (sheet, i, str(row[date_column]), digest, json.dumps(row, default=str)),
+                )
+            deleted = conn.execute(
+                "DELETE FROM schedule WHERE sheet = ? AND row_index >= ?", (sheet, len(rows))
+            )
+            counts["deleted"] = deleted.rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO tabs (sheet, rows, synced_at) VALUES (?, ?, ?)",
+                (sheet, len(rows), time.time()),
+            )
+            conn.execute("COMMIT")
+        log.info("schedule_tab_synced", sheet=sheet, **counts)
+        return counts
+
+    def due(self, day: str, sheets: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the first row dated `day` in each of `sheets`, by tab name.
+
+        Tabs with no row for `day` are left out, as `find_today_task` would
+        return None for them.
+        """
+        sheets = list(dict.fromkeys(sheets))
+        if not sheets:
+            return {}
+        placeholders = ", ".join("?" for _ in sheets)
+        with closing(connect_store(self.path)) as conn:
+            found = conn.execute(
+                "SELECT sheet, payload FROM schedule"
+                f" WHERE day = ? AND sheet IN ({placeholders})"
+                " ORDER BY sheet, row_index",
+                (day, *sheets),
+            ).fetchall()
+        due: Dict[str, Dict[str, Any]] = {}
+        for sheet, payload in found:
+            if sheet not in due:
+                due[sheet] = json.loads(payload)
+        return due
+
+    def synced_tabs(self) -> Dict[str, float]:
+        """Return the time each stored tab was last synced, by tab name."""
+        with closing(connect_store(self.path)) as conn:
+            return dict(conn.execute("SELECT sheet, synced_at FROM tabs"))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a stored metadata value, or None if it was never set."""
+        with closing(connect_store(self.path)) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store a metadata value, replacing any previous one."""
+        with closing(connect_store(self.path)) as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
@@ -7,14 +7,17 @@ the one scheduled for today, based on a configured date column.
 from typing import Any, Dict, List, Optional
 
 from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
 from src.utils import get_today_str
 
 log = get_logger(__name__)
 
 
+@traced("scheduler.find_today_task")
 def find_today_task(
     rows: List[Dict[str, Any]],
     date_column: str = "Date",
+    day: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
     """Return the first row whose date equals today's date string.
 
@@ -25,6 +28,7 @@ def find_today_task(
     Args:
         rows: Rows pulled from the sheet, each as a dict keyed by column header.
         date_column: Column name that holds the date string. Defaults to "Date".
+        day: Date string to match instead of today's, e.g. to render ahead.
 
     Returns:
         The matching row if found; otherwise, None.
@@ -32,11 +36,11 @@ def find_today_task(
     Raises:
         KeyError: If `date_column` is missing in any examined row.
     """
-    today = get_today_str()
-    log.info("find_today_task_started",
-             rows=len(rows),
-             date_column=date_column,
-             today=today)
+    today = day or get_today_str()
+    log.debug("find_today_task_started",
+              rows=len(rows),
+              date_column=date_column,
+              today=today)
 
     for i, row in enumerate(rows):
         if date_column not in row:
@@ -0,0 +1,126 @@
+"""Change detection for watch mode.
+
+A spreadsheet's Drive `version` increases with every edit, so polling it is
+one cheap metadata call that says whether anything changed at all. When it
+has, the tabs the bot reads are fetched again and their row hashes compared
+with the snapshot taken after the last run, which pins the change down to
+individual tabs, and so to the Docs whose blocks read them.
+
+Drive push notifications were not used: a channel needs a publicly
+reachable HTTPS endpoint on a verified domain and expires within a day,
+which a bot running behind NAT or in a container cannot rely on.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from google.oauth2.service_account import Credentials
+from googleapiclient.errors import HttpError
+
+from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
+from src.sources import source_key
+from src.transport import shared_service
+from src.utils import content_hash
+
+log = get_logger(__name__)
+
+
+@traced("drive.version")
+def file_version(file_id: str, credentials: Credentials) -> str:
+    """Return the Drive version of a file, which increases on every change.
+
+    Raises:
+        HttpError: If the Drive API request fails.
+    """
+    try:
+        response = shared_service("drive", "v3", credentials).files().get(
+            fileId=file_id, fields="version", supportsAllDrives=True
+        ).execute()
+        return str(response["version"])
+    except HttpError as error:
+        log.exception("drive_version_failed", file_id=file_id, error=str(error))
+        raise
+
+
+def rows_hash(rows: List[Dict[str, Any]]) -> str:
+    """Return a stable fingerprint of a tab's rows."""
+    return content_hash(json.dumps(rows, sort_keys=True, default=str))
+
+
+@dataclass
+class SheetSnapshot:
+    """What the bot last saw of the spreadsheet.
+
+    Attributes:
+        day: Date the snapshot was taken for; tasks change with the day.
+        version: Drive version of the spreadsheet when it was read.
+        tabs: Row hash of every tab read, by tab name.
+    """
+    day: Optional[str] = None
+    version: Optional[str] = None
+    tabs: Dict[str, str] = field(default_factory=dict)
+
+    def changed_tabs(self, rows_by_sheet: Dict[str, List[Dict[str, Any]]]) -> Set[str]:
+        """Return the tabs in `rows_by_sheet` whose rows differ from the snapshot."""
+        return {
+            name for name, rows in rows_by_sheet.items()
+            if self.tabs.get(name) != rows_hash(rows)
+        }
+
+    def update(
+        self,
+        day: str,
+        version: Optional[str],
+        rows_by_sheet: Dict[str, List[Dict[str, Any]]],
+    ) -> None:
+        """Record the rows just read for `day` at `version`."""
+        if day != self.day:
+            self.tabs = {}
+        self.day = day
+        self.version = version
+        self.tabs.update({name: rows_hash(rows) for name, rows in rows_by_sheet.items()})
+
+
+class SnapshotStore:
+    """A `SheetSnapshot` persisted to a JSON file, written atomically.
+
+    Attributes:
+        path: JSON file backing the store, or None for in-memory only.
+    """
+
+    def __init__(self, path: Optional[Path] = None):  # noqa: D107
+        self.path = Path(path) if path else None
+
+    def load(self) -> SheetSnapshot:
+        """Return the stored snapshot, or an empty one if there is none."""
+        if not self.path or not self.path.exists():
+            return SheetSnapshot()
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            return SheetSnapshot(**raw)
+        except (ValueError, TypeError) as e:
+            log.warning("sheet_snapshot_unreadable", path=str(self.path), error=str(e))
+            return SheetSnapshot()
+
+    def save(self, snapshot: SheetSnapshot) -> None:
+        """Write `snapshot` to the file, if the store has one."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        payload = {"day": snapshot.day, "version": snapshot.version, "tabs": snapshot.tabs}
+        tmp.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def affected_docs(blocks: Iterable, changed_tabs: Set[str]) -> Set[str]:
+    """Return the Docs with at least one block reading a changed tab.
+
+    A Doc is rewritten as a whole, so every block of an affected Doc is
+    rendered again, including blocks on unchanged tabs.
+    """
+    return {block.doc_id for block in blocks if source_key(block) in changed_tabs}
@@ -0,0 +1,273 @@
+"""Local file output for Docs, as an alternative to Google Docs.
+
+Blocks with a `sink` in their config are written to files in a local
+directory instead of a Google Doc, with no API calls or quotas. The file is
+named after the block's `doc_id` and holds the same titled sections a Doc
+would, as plain text, Markdown, or HTML. Formatting compiled from Markdown
+templates is kept in the Markdown and HTML forms.
+
+Every file is written to a temporary name, flushed to disk, and renamed
+over the old file, so a reader never sees a partial file. Files are written
+by a pool of threads, and the directory entry updates of a whole batch are
+made durable with one directory fsync.
+
+Environment:
+    SINK_WRITERS: Threads writing files in parallel (default 8).
+    SINK_BATCH_SIZE: Finished Docs buffered before a batch is written
+        (default 64).
+    SINK_FSYNC: Set to 0 to skip fsync, e.g. for throwaway backfills.
+"""
+
+import html
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.docs_requests import Format, utf16_len
+from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
+
+log = get_logger(__name__)
+
+WRITERS = int(os.getenv("SINK_WRITERS", "8"))
+BATCH_SIZE = int(os.getenv("SINK_BATCH_SIZE", "64"))
+
+EXTENSIONS = {"text": ".txt", "markdown": ".md", "html": ".html"}
+
+_MARKDOWN_SPANS = {"bold": ("**", "**"), "italic": ("*", "*")}
+_HTML_SPANS = {"bold": ("<strong>", "</strong>"), "italic": ("<em>", "</em>")}
+
+
+def _python_index(text: str, offset: int) -> int:
+    """Return the index into `text` of UTF-16 offset `offset`."""
+    units = 0
+    for index, char in enumerate(text):
+        if units >= offset:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(text)
+
+
+def _markup_line(
+    line: str,
+    spans: Sequence[Tuple[int, int, Format]],
+    tags: Callable[[Format], Tuple[str, str]],
+    escape: Callable[[str], str],
+) -> str:
+    """Return `line` with each span wrapped in the tags `tags` gives it.
+
+    Spans are (start, end, format) with Python indices into the line. At a
+    shared position, spans close before others open, and an enclosing span
+    opens before and closes after the spans inside it.
+    """
+    events = []
+    for i, (start, end, fmt) in enumerate(spans):
+        opening, closing = tags(fmt)
+        events.append((start, 1, -end, i, opening))
+        events.append((end, 0, -start, -i, closing))
+    parts, position = [], 0
+    for at, _, _, _, tag in sorted(events):
+        parts.append(escape(line[position:at]))
+        parts.append(tag)
+        position = at
+    parts.append(escape(line[position:]))
+    return "".join(parts)
+
+
+def _lines(content: str, formatting: Sequence[Format]):
+    """Yield each line of `content` with its paragraph format and text spans."""
+    paragraphs = [f for f in formatting if f.kind in ("heading", "bullet", "numbered")]
+    inline = [f for f in formatting if f not in paragraphs]
+    offset = 0
+    for line in content.split("\n"):
+        length = utf16_len(line)
+        paragraph = next((f for f in paragraphs if f.start <= offset < f.end), None)
+        spans = [
+            (
+                _python_index(line, max(f.start, offset) - offset),
+                _python_index(line, min(f.end, offset + length) - offset),
+                f,
+            )
+            for f in inline
+            if f.start < offset + length and f.end > offset
+        ]
+        yield line, paragraph, spans
+        offset += length + 1
+
+
+def _markdown_tags(fmt: Format) -> Tuple[str, str]:
+    """Return the Markdown markers around a text span."""
+    if fmt.kind == "link":
+        return "[", f"]({fmt.value})"
+    return _MARKDOWN_SPANS.get(fmt.kind, ("", ""))
+
+
+def _html_tags(fmt: Format) -> Tuple[str, str]:
+    """Return the HTML tags around a text span."""
+    if fmt.kind == "link":
+        return f'<a href="{html.escape(fmt.value)}">', "</a>"
+    return _HTML_SPANS.get(fmt.kind, ("", ""))
+
+
+def _heading_level(fmt: Format) -> int:
+    """Return the level of a heading format's HEADING_N style."""
+    return int(fmt.value.rsplit("_", 1)[-1]) if fmt.value[-1:].isdigit() else 2
+
+
+def render_markdown(sections: Sequence, separator: str = "\n") -> str:
+    """Return sections as Markdown, each title as a level-2 heading."""
+    parts = []
+    for section in sections:
+        lines = [f"## {section.title}", ""] if section.title else []
+        for line, paragraph, spans in _lines(section.content, section.formatting):
+            text = _markup_line(line, spans, _markdown_tags, lambda s: s)
+            if paragraph is None or not line:
+                lines.append(text)
+            elif paragraph.kind == "heading":
+                lines.append("#" * _heading_level(paragraph) + " " + text)
+            else:
+                lines.append(("- " if paragraph.kind == "bullet" else "1. ") + text)
+        parts.append("\n".join(lines))
+    return (separator + "\n").join(parts) + "\n"
+
+
+def render_html(sections: Sequence, separator: str = "\n") -> str:
+    """Return sections as an HTML document, each title as an <h2>."""
+    body = []
+    for section in sections:
+        if section.title:
+            body.append(f"<h2>{html.escape(section.title)}</h2>")
+        open_list = None
+        for line, paragraph, spans in _lines(section.content, section.formatting):
+            kind = paragraph.kind if paragraph is not None and line else None
+            tag = {"bullet": "ul", "numbered": "ol"}.get(kind)
+            if open_list and tag != open_list:
+                body.append(f"</{open_list}>")
+                open_list = None
+            if tag and not open_list:
+                body.append(f"<{tag}>")
+                open_list = tag
+            text = _markup_line(line, spans, _html_tags, html.escape)
+            if tag:
+                body.append(f"<li>{text}</li>")
+            elif kind == "heading":
+                level = _heading_level(paragraph)
+                body.append(f"<h{level}>{text}</h{level}>")
+            elif line:
+                body.append(f"<p>{text}</p>")
+        if open_list:
+            body.append(f"</{open_list}>")
+    return (
+        '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"></head>\n<body>\n'
+        + "\n".join(body)
+        + "\n</body>\n</html>\n"
+    )
+
+
+class FileSink:
+    """Writes Docs as files in a local directory.
+
+    Attributes:
+        directory: Directory the files are written to.
+        format: "text", "markdown" or "html".
+        fsync: Flush every file, and the directory after each batch, to disk.
+    """
+
+    def __init__(
+        self, directory, format: str = "text", fsync: Optional[bool] = None
+    ):  # noqa: D107
+        self.directory = Path(directory)
+        self.format = format
+        self.fsync = fsync if fsync is not None else os.getenv("SINK_FSYNC", "1") != "0"
+
+    def path_for(self, doc_id: str) -> Path:
+        """Return the file a Doc is written to.
+
+        Raises:
+            ValueError: If `doc_id` is not usable as a file name.
+        """
+        if not doc_id or doc_id.startswith(".") or Path(doc_id).name != doc_id:
+            raise ValueError(f"Doc ID {doc_id!r} is not a valid file name")
+        return self.directory / f"{doc_id}{EXTENSIONS[self.format]}"
+
+    def render(self, output) -> str:
+        """Return the file contents for a `DocOutput`."""
+        if self.format == "markdown":
+            return render_markdown(output.sections, output.separator)
+        if self.format == "html":
+            return render_html(output.sections, output.separator)
+        return output.text + "\n"
+
+    def _write(self, output) -> None:
+        """Write one Doc's file atomically."""
+        path = self.path_for(output.doc_id)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.render(output))
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _sync_directory(self) -> None:
+        """Make the renames in the directory durable."""
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def write(self, output) -> None:
+        """Write one Doc's file and make it durable.
+
+        Raises:
+            OSError: If the file cannot be written.
+            ValueError: If the Doc ID is not usable as a file name.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._write(output)
+        self._sync_directory()
+
+    @traced("sink.write_files")
+    def write_many(self, outputs: List, writers: int = WRITERS) -> Dict[str, Optional[Exception]]:
+        """Write every Doc in `outputs` with up to `writers` threads.
+
+        A failure writing one Doc does not stop the others. If the directory
+        cannot be synced, every Doc in the batch is reported as failed.
+
+        Returns:
+            None for each Doc written, or the exception that stopped it, by
+            Doc ID.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        errors: Dict[str, Optional[Exception]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(writers, len(outputs)))) as pool:
+            futures = {output.doc_id: pool.submit(self._write, output) for output in outputs}
+            for doc_id, future in futures.items():
+                try:
+                    future.result()
+                    errors[doc_id] = None
+                except Exception as e:
+                    errors[doc_id] = e
+                    log.exception("file_write_failed", doc_id=doc_id,
+                                  directory=str(self.directory), error=str(e))
+        try:
+            self._sync_directory()
+        except OSError as e:
+            log.exception("directory_sync_failed", directory=str(self.directory), error=str(e))
+            errors = {doc_id: error or e for doc_id, error in errors.items()}
+        log.info(
+            "files_written",
+            directory=str(self.directory),
+            format=self.format,
+            files=sum(1 for e in errors.values() if e is None),
+            failed=sum(1 for e in errors.values() if e is not None),
+        )
+        return errors
@@ -0,0 +1,163 @@
+"""Local files a block can read its rows from instead of Google Sheets.
+
+A block with a `source` in its config reads the rows of its `sheet_name`
+from that file, with no API calls, and they go through the same date
+matching and rendering as rows read from Sheets:
+
+* ``csv``: the whole file is one tab, so `sheet_name` only names it. The
+  file is memory-mapped and parsed one line at a time.
+* ``xlsx``: `sheet_name` is the worksheet, read with openpyxl in read-only
+  mode, one row at a time. Requires ``pip install openpyxl``.
+* ``sqlite``: `sheet_name` is the table.
+
+As with `get_sheet_rows`, the first row (or the table's columns) gives the
+keys of every row. Unlike Sheets, CSV values are always strings; XLSX
+dates are returned as "YYYY-MM-DD" strings so they match `get_today_str()`.
+"""
+
+import csv
+import mmap
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
+
+log = get_logger(__name__)
+
+
+class RowSource(ABC):
+    """A local file holding one or more tabs of rows.
+
+    Attributes:
+        path: File the rows are read from.
+    """
+
+    def __init__(self, path):  # noqa: D107
+        self.path = Path(path)
+
+    @abstractmethod
+    def rows(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """Return every row of tab `sheet_name`, keyed by column header."""
+
+    def version(self) -> str:
+        """Return a string that changes whenever the file changes."""
+        stat = self.path.stat()
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class CsvSource(RowSource):
+    """A CSV file with a header row, parsed from a memory map."""
+
+    def _lines(self, mapped: mmap.mmap) -> Iterator[str]:
+        """Yield the decoded lines of the mapped file, newline included."""
+        encoding = "utf-8-sig"  # drop a byte order mark from the first line
+        for line in iter(mapped.readline, b""):
+            yield line.decode(encoding)
+            encoding = "utf-8"
+
+    def rows(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """Return every row of the file; `sheet_name` is not used."""
+        with open(self.path, "rb") as f:
+            if not f.seek(0, 2):
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return [dict(row) for row in csv.DictReader(self._lines(mapped))]
+
+
+def _cell_value(value: Any) -> Any:
+    """Return an XLSX cell value, with dates as ISO date strings."""
+    if isinstance(value, datetime) and value.time() == datetime.min.time():
+        return value.date().isoformat()
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class XlsxSource(RowSource):
+    """An Excel workbook, read in openpyxl's streaming read-only mode."""
+
+    def rows(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """Return every non-empty row of worksheet `sheet_name`."""
+        try:
+            import openpyxl
+        except ImportError as e:
+            log.exception("xlsx_support_missing", path=str(self.path), error=str(e))
+            raise ImportError("Reading .xlsx sources requires openpyxl") from e
+
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            values = workbook[sheet_name].iter_rows(values_only=True)
+            header = next(values, None)
+            if header is None:
+                return []
+            return [
+                dict(zip(header, (_cell_value(v) for v in row)))
+                for row in values
+                if any(v is not None for v in row)
+            ]
+        finally:
+            workbook.close()
+
+
+class SqliteSource(RowSource):
+    """A SQLite database, with one table per tab."""
+
+    def rows(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """Return every row of table `sheet_name`."""
+        table = '"' + sheet_name.replace('"', '""') + '"'
+        with closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(f"SELECT * FROM {table}")]
+
+
+SOURCE_TYPES = {"csv": CsvSource, "xlsx": XlsxSource, "sqlite": SqliteSource}
+
+
+def open_source(config) -> RowSource:
+    """Return the `RowSource` described by a block's `source` config."""
+    return SOURCE_TYPES[config.type](config.path)
+
+
+def source_key(block) -> str:
+    """Return the key a block's rows are read, cached and compared under.
+
+    Blocks reading the same tab of the same source share a key. Google
+    Sheets tabs are keyed by their name alone.
+    """
+    source = getattr(block, "source", None)
+    if source is None:
+        return block.sheet_name
+    return f"{source.type}:{source.path}#{block.sheet_name}"
+
+
+@traced("source.get_rows")
+def get_source_rows(config, sheet_name: str) -> List[Dict[str, Any]]:
+    """Return every row of tab `sheet_name` of a local source.
+
+    Raises:
+        FileNotFoundError: If the source file does not exist.
+        KeyError: If an XLSX workbook has no worksheet `sheet_name`.
+        sqlite3.Error: If a SQLite source has no table `sheet_name`.
+    """
+    try:
+        rows = open_source(config).rows(sheet_name)
+        log.info("source_rows_read", source=config.type, path=str(config.path),
+                 sheet_name=sheet_name, rows=len(rows))
+        return rows
+    except Exception as e:
+        log.exception("source_rows_read_failed", source=config.type, path=str(config.path),
+                      sheet_name=sheet_name, error=str(e))
+        raise
+
+
+def source_version(config) -> Optional[str]:
+    """Return the version of a local source, or None if it cannot be read."""
+    try:
+        return open_source(config).version()
+    except OSError:
+        return None
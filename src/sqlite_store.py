@@ -0,0 +1,41 @@
+"""Connections to the bot's local SQLite stores.
+
+The schedule store, work queue, Doc leases and render cache are SQLite files
+shared by threads, shard processes, and nodes on one volume. They all open
+connections the same way: in autocommit mode, so each store brackets its own
+transactions with `BEGIN IMMEDIATE`, with a busy timeout, so a writer waits
+for a lock held elsewhere instead of failing, and in WAL mode with
+`synchronous=NORMAL`, so readers never block the writer.
+"""
+
+import sqlite3
+from pathlib import Path
+
+# Seconds a connection waits for a lock held by another connection
+BUSY_TIMEOUT = 30
+
+
+def open_store(path) -> Path:
+    """Prepare the SQLite file at `path` for `connect_store` connections.
+
+    Creates the parent directory and switches the database to WAL mode,
+    which is stored in the file and so lasts for every later connection.
+
+    Returns:
+        `path` as a `Path`.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = connect_store(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+    return path
+
+
+def connect_store(path) -> sqlite3.Connection:
+    """Open a connection that waits on, rather than fails at, contention."""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
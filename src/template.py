@@ -1,20 +1,226 @@
 """Template rendering utilities for generating document content.
 
-This module provides a helper to load a Jinja2 template from disk and render
-it with a given context dictionary.
+This module provides helpers to render a Jinja2 template from disk or from an
+inline string with a given context dictionary. Templates loaded from disk are
+compiled once and reused until the file changes.
+
+Once `configure_render_cache()` has been called, renders of template files
+are also memoized in a SQLite file, keyed by a hash of the template source
+and a hash of the context. Reruns, retries and blocks sharing a template
+and row then skip rendering. The least recently used renders are evicted
+once the cache exceeds its entry or size limit.
+
+Environment:
+    RENDER_CACHE: Set to 0 to disable the render cache.
+    RENDER_CACHE_MAX_ENTRIES: Renders kept at most (default 10000).
+    RENDER_CACHE_MAX_BYTES: UTF-8 size of renders kept at most
+        (default 33554432, 32 MiB).
 """
 
+import json
+import os
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 from jinja2 import Template
 
+from src.observability.logging_setup import get_logger
+from src.observability.tracing import traced
+from src.sqlite_store import connect_store, open_store
+from src.utils import content_hash
+
+log = get_logger(__name__)
+
+# Compiled templates and their source hash keyed by resolved path, tagged
+# with the file's (mtime, size)
+_compiled: Dict[Path, Tuple[Tuple[int, int], Template, str]] = {}
+_compiled_lock = threading.Lock()
+
+_render_cache: Optional["RenderCache"] = None
+
+
+class RenderCache:
+    """Persistent LRU cache of rendered templates in a SQLite file.
+
+    Each thread keeps its own connection. Cache errors are logged and
+    treated as misses, so a broken cache never breaks rendering.
+
+    Attributes:
+        path: SQLite database file.
+        max_entries: Renders kept at most.
+        max_bytes: Total UTF-8 size of renders kept at most.
+    """
+
+    def __init__(
+        self, path, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024
+    ):  # noqa: D107
+        self.path = open_store(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "errors": 0}
+        self._counts_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS renders ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS renders_last_used ON renders (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_store(self.path)
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        """Add `n` to counter `name`."""
+        with self._counts_lock:
+            self._counts[name] += n
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the render stored under `key`, or None, marking it used."""
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value FROM renders WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE renders SET last_used = ? WHERE key = ?", (time.time(), key)
+                )
+        except sqlite3.Error as e:
+            self._count("errors")
+            log.warning("render_cache_read_failed", path=str(self.path), error=str(e))
+            return None
+        self._count("hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+
+    def put(self, key: str, value: str) -> None:
+        """Store `value` under `key`, then evict renders over the limits."""
+        size = len(value.encode("utf-8"))
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO renders (key, value, size, last_used)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time()),
+                )
+                evicted = self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._count("errors")
+            log.warning("render_cache_write_failed", path=str(self.path), error=str(e))
+            return
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Delete the least recently used renders until within the limits."""
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM renders"
+        ).fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM renders ORDER BY last_used"):
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            entries -= 1
+            total -= size
+        conn.executemany("DELETE FROM renders WHERE key = ?", victims)
+        return len(victims)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, eviction and error counts as metrics."""
+        with self._counts_lock:
+            return dict(self._counts)
+
+
+def configure_render_cache(
+    path=None, max_entries=None, max_bytes=None
+) -> Optional[RenderCache]:
+    """Memoize template file renders in a SQLite file at `path`.
+
+    Args:
+        path: Cache database file; None disables the cache.
+        max_entries: Renders kept at most; defaults to RENDER_CACHE_MAX_ENTRIES.
+        max_bytes: Total size kept at most; defaults to RENDER_CACHE_MAX_BYTES.
+
+    Returns:
+        The cache now in use, or None if caching is off.
+    """
+    global _render_cache
+    if path is None or os.getenv("RENDER_CACHE", "1") == "0":
+        _render_cache = None
+        return None
+    _render_cache = RenderCache(
+        path,
+        max_entries=max_entries or int(os.getenv("RENDER_CACHE_MAX_ENTRIES", "10000")),
+        max_bytes=max_bytes or int(os.getenv("RENDER_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    )
+    return _render_cache
+
+
+def render_cache_stats() -> Dict[str, int]:
+    """Return the render cache's metrics; empty when caching is off."""
+    cache = _render_cache
+    return cache.stats() if cache is not None else {}
+
+
+def _load(template_path: Path) -> Tuple[Template, str]:
+    """Return the compiled template for a file and the hash of its source."""
+    path = Path(template_path).resolve()
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
 
+    source = path.read_text(encoding="utf-8")
+    template = Template(source)
+    digest = content_hash(source)
+    with _compiled_lock:
+        _compiled[path] = (version, template, digest)
+    return template, digest
+
+
+def load_template(template_path: Path) -> Template:
+    """Return the compiled Jinja2 template for a file, compiling it at most once.
+
+    The compiled template is cached by resolved path and reused for as long as
+    the file's modification time and size are unchanged.
+
+    Args:
+        template_path: Filesystem path to the Jinja2 template file.
+
+    Returns:
+        The compiled template.
+
+    Raises:
+        FileNotFoundError: If the template file does not exist.
+        jinja2.TemplateSyntaxError: If the template contains invalid syntax.
+    """
+    return _load(template_path)[0]
+
+
+@traced("template.render")
 def render_template(template_path: Path, context: Dict[str, Any]) -> str:
     """Render a Jinja2 template file with the provided context.
 
-    Reads the template file from `template_path`, compiles it, and substitutes
-    variables using the keys/values in `context`.
+    Loads the compiled template for `template_path` (see `load_template`) and
+    substitutes variables using the keys/values in `context`. With the
+    render cache configured, a render of the same template source with an
+    equal context is returned from the cache.
 
     Args:
         template_path: Filesystem path to the Jinja2 template file.
@@ -27,8 +233,30 @@ def render_template(template_path: Path, context: Dict[str, Any]) -> str:
         FileNotFoundError: If the template file does not exist.
         jinja2.TemplateSyntaxError: If the template contains invalid syntax.
     """
-    with open(template_path, "r", encoding="utf-8") as file:
-        template_str = file.read()
+    template, source_hash = _load(template_path)
+    cache = _render_cache
+    if cache is None:
+        return template.render(**context)
+
+    key = content_hash(source_hash + "\0" + json.dumps(context, sort_keys=True, default=str))
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = template.render(**context)
+        cache.put(key, rendered)
+    return rendered
+
+
+def render_template_string(template_str: str, context: Dict[str, Any]) -> str:
+    """Render an inline Jinja2 template string with the provided context.
+
+    Args:
+        template_str: Jinja2 template source, e.g. a block title template.
+        context: Dictionary of variables to inject into the template.
 
-    template = Template(template_str)
-    return template.render(**context)
+    Returns:
+        The rendered template as a string.
+
+    Raises:
+        jinja2.TemplateSyntaxError: If the template contains invalid syntax.
+    """
+    return Template(template_str).render(**context)
@@ -0,0 +1,266 @@
+"""Shared, pooled HTTP transport for the Google API clients.
+
+gspread talks to Google through `requests`, while googleapiclient defaults
+to a fresh `httplib2.Http` per service, and both used to be rebuilt for
+every block and Doc, so each call paid for a new TLS handshake. This module
+keeps one `AuthorizedSession` per service account, backed by a keep-alive
+connection pool, and adapts it to the `httplib2` interface so both clients
+share the same connections to googleapis.com.
+
+The pool speaks HTTP/1.1 rather than HTTP/2: gspread is built on `requests`
+and googleapiclient on the `httplib2` interface, neither of which has an
+HTTP/2 transport, and an httpx-based client would add a dependency and a
+second adapter layer for both libraries. Keep-alive reuse removes the
+repeated handshakes, which was the cost being paid.
+
+The session is safe to share between threads: urllib3's connection pool and
+the session cookie jar are internally locked, and a concurrent token refresh
+at worst refreshes twice.
+
+Every request through the session, and every token refresh, has a timeout
+derived from the run deadline; see `src.deadline`.
+
+Environment:
+    GOOGLE_HTTP_POOL_SIZE: Maximum pooled connections per host (default 10).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import httplib2
+from google.auth.transport.requests import AuthorizedSession
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from requests.adapters import HTTPAdapter
+
+from src.concurrency import is_overload
+from src.deadline import call_timeout, http_timeout
+from src.observability.logging_setup import get_logger
+
+log = get_logger(__name__)
+
+# Sessions kept at once; older ones are closed when a new identity appears.
+_MAX_SESSIONS = 4
+
+_sessions: "OrderedDict[Hashable, AuthorizedSession]" = OrderedDict()
+_lock = threading.Lock()
+
+# Each thread's API services, by (name, version)
+_local = threading.local()
+
+
+def pool_size() -> int:
+    """Return the configured per-host connection pool size."""
+    return int(os.getenv("GOOGLE_HTTP_POOL_SIZE", "10"))
+
+
+def credentials_key(credentials) -> Hashable:
+    """Identify the account and scopes behind `credentials`, stable across reloads.
+
+    Service account credentials rebuilt for every run with the same scopes
+    map to the same key, so they reuse one session; credentials with other
+    scopes get their own session, whose tokens carry those scopes. Other
+    credentials are keyed by object.
+    """
+    email = getattr(credentials, "service_account_email", None)
+    if isinstance(email, str):
+        scopes = tuple(sorted(getattr(credentials, "scopes", None) or ()))
+        return ("service_account", email, scopes)
+    return ("object", id(credentials))
+
+
+def authorized_session(credentials) -> AuthorizedSession:
+    """Return the shared pooled session for the account behind `credentials`.
+
+    At most `_MAX_SESSIONS` sessions are kept; the least recently used one
+    is closed, releasing its connections, when another is created.
+    """
+    key = credentials_key(credentials)
+    with _lock:
+        session = _sessions.get(key)
+        if session is not None:
+            _sessions.move_to_end(key)
+            return session
+
+        size = pool_size()
+        session = AuthorizedSession(credentials, refresh_timeout=http_timeout())
+        session.mount("https://", HTTPAdapter(pool_connections=size, pool_maxsize=size))
+        _sessions[key] = session
+        while len(_sessions) > _MAX_SESSIONS:
+            _, evicted = _sessions.popitem(last=False)
+            evicted.close()
+        log.info("http_session_created", pool_size=size)
+        return session
+
+
+def close_sessions() -> None:
+    """Close every shared session and its pooled connections."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def build_service(name: str, version: str, credentials=None, http=None):
+    """Create an authenticated Google API service.
+
+    Args:
+        name: API name, e.g. "docs".
+        version: API version, e.g. "v1".
+        credentials: Google service account credentials.
+        http: Optional already-authorized HTTP transport to send requests
+            through instead of a new one built from `credentials`.
+
+    Returns:
+        Resource: An authenticated service client.
+
+    Raises:
+        HttpError: If the underlying client initialization fails.
+    """
+    try:
+        if http is not None:
+            service = build(name, version, http=http)
+        else:
+            service = build(name, version, credentials=credentials)
+        log.info("service_built", api=name, version=version)
+        return service
+    except HttpError as error:
+        log.exception("service_build_failed", api=name, version=version, error=str(error))
+        raise
+
+
+def shared_service(name: str, version: str, credentials):
+    """Return this thread's `name` API service for `credentials`, building it once.
+
+    googleapiclient resources are not documented as thread-safe, so each
+    thread (e.g. each queue writer) gets its own; all of them send requests
+    through the one pooled session for the account. The service is rebuilt
+    when the account or its session changes.
+    """
+    key = credentials_key(credentials)
+    session = authorized_session(credentials)
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    cached = services.get((name, version))
+    if cached is not None and cached[0] == key and cached[1] is session:
+        return cached[2]
+    service = build_service(name, version, http=RequestsHttp(session))
+    services[(name, version)] = (key, session, service)
+    return service
+
+
+class RequestsHttp:
+    """`httplib2.Http` stand-in that sends googleapiclient calls through a session.
+
+    Attributes:
+        session: The `requests` session whose connection pool is used.
+        timeout: Longest a request may take in seconds, or None for
+            GOOGLE_HTTP_TIMEOUT. Always cut to the time left before the
+            run deadline.
+    """
+
+    def __init__(self, session, timeout: Optional[float] = None):  # noqa: D107
+        self.session = session
+        self.timeout = timeout
+
+    def request(
+        self,
+        uri,
+        method="GET",
+        body=None,
+        headers=None,
+        redirections=httplib2.DEFAULT_MAX_REDIRECTS,
+        connection_type=None,
+    ):
+        """Send a request and return `(httplib2.Response, content)`.
+
+        Raises:
+            DeadlineExceeded: If the run deadline has passed.
+            requests.Timeout: If the request takes longer than its timeout.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        resp = self.session.request(
+            method, uri, data=body, headers=headers, timeout=call_timeout(self.timeout)
+        )
+        info = {key.lower(): value for key, value in resp.headers.items()}
+        info["status"] = str(resp.status_code)
+        response = httplib2.Response(info)
+        response.reason = resp.reason
+        return response, resp.content
+
+
+def execute_batch(
+    service, calls: Dict[str, Any], limit: int = 50, limiter=None
+) -> Dict[str, Tuple[Any, Optional[Exception]]]:
+    """Send googleapiclient calls keyed by ID as HTTP batch requests.
+
+    Calls are grouped into batches of at most `limit`, one round trip each.
+    A failure of a whole batch, including a connection error, timeout or
+    passed run deadline, is reported for every call in it; results of
+    earlier batches are kept and later batches are still sent.
+
+    Args:
+        service: The API service the calls belong to.
+        calls: Unexecuted API calls keyed by a unique ID (e.g. a Doc ID).
+        limit: Calls per batch request; Google accepts at most 100.
+        limiter: Optional `AimdLimiter`; each round trip takes one slot,
+            and counts as overloaded if any call in it was rejected with
+            429/503.
+
+    Returns:
+        `(response, error)` for each ID; exactly one of the two is None.
+    """
+    results: Dict[str, Tuple[Any, Optional[Exception]]] = {}
+
+    def callback(request_id, response, exception):
+        results[request_id] = (response, exception)
+
+    items = list(calls.items())
+    for start in range(0, len(items), limit):
+        chunk = items[start:start + limit]
+        batch = service.new_batch_http_request(callback=callback)
+        for call_id, call in chunk:
+            batch.add(call, request_id=call_id)
+        started = limiter.acquire() if limiter is not None else None
+        try:
+            batch.execute()
+        except Exception as error:  # noqa: BLE001 - reported per call
+            log.warning("batch_request_failed", calls=len(chunk), error=str(error))
+            for call_id, _ in chunk:
+                results.setdefault(call_id, (None, error))
+        finally:
+            if limiter is not None:
+                errors = [results.get(call_id, (None, None))[1] for call_id, _ in chunk]
+                limiter.release(started, next((e for e in errors if is_overload(e)), None))
+        for call_id, _ in chunk:
+            results.setdefault(call_id, (None, RuntimeError("No response in batch")))
+    return results
+
+
+def transport_stats() -> Dict[str, int]:
+    """Return connection-reuse counters summed over every shared session.
+
+    `connections_reused` is the number of requests that did not need a new
+    connection (and so no new TLS handshake).
+    """
+    requests_sent = connections = 0
+    with _lock:
+        sessions = list(_sessions.values())
+    for session in sessions:
+        for adapter in session.adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+    return {
+        "sessions": len(sessions),
+        "requests": requests_sent,
+        "connections_opened": connections,
+        "connections_reused": max(requests_sent - connections, 0),
+    }
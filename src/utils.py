@@ -1,19 +1,55 @@
-"""Utility functions for date and time formatting.
+"""Utility functions for date formatting and content hashing.
 
-Currently provides helpers for returning today's date string in a configurable format.
+Provides helpers for returning today's date string in a configurable format
+and for fingerprinting rendered content.
 """
 
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
 
 
-def get_today_str(fmt: str = "%Y-%m-%d") -> str:
+def get_today_str(fmt: str = "%Y-%m-%d", time_zone: Optional[str] = None) -> str:
     """Return today's date as a formatted string.
 
     Args:
         fmt: Format string following `datetime.strftime` syntax.
             Defaults to "%Y-%m-%d".
+        time_zone: IANA time zone whose calendar date counts as today;
+            defaults to the machine's local time.
 
     Returns:
         Today's date as a string formatted according to `fmt`.
     """
-    return datetime.today().strftime(fmt)
+    return get_date_str(0, time_zone=time_zone, fmt=fmt)
+
+
+def get_date_str(
+    days: int = 0, time_zone: Optional[str] = None, fmt: str = "%Y-%m-%d"
+) -> str:
+    """Return the date `days` after today as a formatted string.
+
+    Args:
+        days: Offset from today, e.g. 1 for tomorrow.
+        time_zone: IANA time zone whose calendar date counts as today;
+            defaults to the machine's local time.
+        fmt: Format string following `datetime.strftime` syntax.
+
+    Returns:
+        The date as a string formatted according to `fmt`.
+    """
+    now = datetime.now(ZoneInfo(time_zone)) if time_zone else datetime.today()
+    return (now + timedelta(days=days)).strftime(fmt)
+
+
+def content_hash(text: str) -> str:
+    """Return a stable fingerprint of `text`.
+
+    Args:
+        text: Content to fingerprint.
+
+    Returns:
+        The hex SHA-256 digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
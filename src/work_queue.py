@@ -0,0 +1,243 @@
+"""Durable local queue of Doc write jobs.
+
+Decouples reading and rendering from writing: a planner enqueues one job per
+rendered Doc and any number of writer workers, in this or other processes,
+claim and write them. The queue is a SQLite database in WAL mode, so
+enqueueing never blocks readers and jobs survive a crash.
+
+Delivery is at-least-once. A claimed job is leased for a limited time; if
+its worker dies before acknowledging it, the lease expires and another
+worker picks it up. Writers stay idempotent by comparing the job's content
+hash with the hash recorded after the last successful write of that Doc.
+"""
+
+import json
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.doc_output import BlockSection, DocOutput
+from src.docs_requests import Format
+from src.observability.logging_setup import get_logger
+from src.sqlite_store import connect_store, open_store
+
+log = get_logger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class WriteJob:
+    """A claimed Doc write.
+
+    Attributes:
+        job_id: Row ID of the job in the queue.
+        doc_id: Destination Google Doc ID.
+        content_hash: Fingerprint of the Doc text the job writes.
+        sections: Titled block sections to write, in order.
+        attempts: Number of times the job has been claimed, including this one.
+    """
+    job_id: int
+    doc_id: str
+    content_hash: str
+    sections: List[BlockSection]
+    attempts: int
+
+
+class WorkQueue:
+    """SQLite-backed queue of Doc write jobs with leased, retryable claims.
+
+    At most one unfinished job exists per Doc: enqueueing a Doc that already
+    has a pending job replaces that job's payload, so writers only ever
+    write the newest content.
+
+    Attributes:
+        path: SQLite database file.
+        lease_seconds: How long a claimed job stays invisible to other workers.
+        max_attempts: Claims after which a failing job is parked as failed.
+        retention_seconds: How long finished jobs are kept before `prune()`
+            deletes them.
+    """
+
+    def __init__(
+        self,
+        path,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 5,
+        retention_seconds: float = 7 * 86400,
+    ):  # noqa: D107
+        self.path = open_store(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        with closing(connect_store(self.path)) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " doc_id TEXT NOT NULL, content_hash TEXT NOT NULL,"
+                " payload TEXT NOT NULL, status TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " lease_until REAL NOT NULL DEFAULT 0,"
+                " error TEXT, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def enqueue(self, output: DocOutput) -> int:
+        """Queue a write of `output`, superseding any pending job for its Doc.
+
+        Returns:
+            The job ID.
+        """
+        payload = json.dumps(
+            [{"block": s.block_name, "title": s.title, "content": s.content,
+              "formatting": s.formatting}
+             for s in output.sections]
+        )
+        digest = output.content_hash
+        now = time.time()
+        with closing(connect_store(self.path)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE doc_id = ? AND status = ?",
+                (output.doc_id, PENDING),
+            ).fetchone()
+            if row:
+                job_id = row[0]
+                conn.execute(
+                    "UPDATE jobs SET content_hash = ?, payload = ?, attempts = 0,"
+                    " lease_until = 0, updated_at = ? WHERE id = ?",
+                    (digest, payload, now, job_id),
+                )
+            else:
+                job_id = conn.execute(
+                    "INSERT INTO jobs (doc_id, content_hash, payload, status, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (output.doc_id, digest, payload, PENDING, now),
+                ).lastrowid
+            conn.execute("COMMIT")
+        log.info("job_enqueued", job_id=job_id, doc_id=output.doc_id, replaced=bool(row))
+        return job_id
+
+    def claim(self) -> Optional[WriteJob]:
+        """Lease the oldest available job, or return None if there is none.
+
+        Available jobs are pending ones past their retry backoff and leased
+        ones whose lease expired. A Doc with a live lease is never handed to
+        a second worker.
+        """
+        now = time.time()
+        with closing(connect_store(self.path)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, doc_id, content_hash, payload, attempts FROM jobs"
+                " WHERE status IN (?, ?) AND lease_until <= ?"
+                " AND doc_id NOT IN ("
+                "  SELECT doc_id FROM jobs WHERE status = ? AND lease_until > ?)"
+                " ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            job_id, doc_id, digest, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, lease_until = ?, updated_at = ?"
+                " WHERE id = ?",
+                (LEASED, attempts + 1, now + self.lease_seconds, now, job_id),
+            )
+            conn.execute("COMMIT")
+        sections = [
+            BlockSection(
+                s["block"],
+                s["title"],
+                s["content"],
+                tuple(Format(*f) for f in s.get("formatting", ())),
+            )
+            for s in json.loads(payload)
+        ]
+        return WriteJob(job_id, doc_id, digest, sections, attempts + 1)
+
+    def complete(self, job: WriteJob) -> None:
+        """Acknowledge a job as written."""
+        self._finish(job, DONE, None)
+
+    def fail(self, job: WriteJob, error: str) -> None:
+        """Retry a failed job after an exponential backoff, or park it as failed.
+
+        Jobs are parked once they have been claimed `max_attempts` times.
+        """
+        status = FAILED if job.attempts >= self.max_attempts else PENDING
+        self._finish(job, status, error, retry_after=min(2 ** job.attempts, 60))
+        log.warning(
+            "job_failed",
+            job_id=job.job_id,
+            doc_id=job.doc_id,
+            attempts=job.attempts,
+            retrying=status == PENDING,
+            error=error,
+        )
+
+    def defer(self, job: WriteJob, retry_after: float, reason: str) -> None:
+        """Return a job unattempted, hidden from claims for `retry_after` seconds.
+
+        Unlike `fail`, the claim does not count as an attempt, so a job held
+        back (e.g. by an open circuit breaker) is never parked as failed.
+        """
+        now = time.time()
+        with closing(connect_store(self.path)) as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, lease_until = ?,"
+                " updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (PENDING, now + retry_after, now, job.job_id, LEASED, job.attempts),
+            ).rowcount
+        if not updated:
+            log.warning("job_lease_lost", job_id=job.job_id, doc_id=job.doc_id)
+            return
+        log.info("job_deferred", job_id=job.job_id, doc_id=job.doc_id,
+                 retry_after=retry_after, reason=reason)
+
+    def _finish(
+        self, job: WriteJob, status: str, error: Optional[str], retry_after: float = 0
+    ) -> None:
+        """Move a leased job to `status`, hidden from claims for `retry_after` seconds.
+
+        Only the claim that `job` came from can finish it: once its lease
+        expired and another worker re-claimed the job, `attempts` no longer
+        matches and the stale acknowledgement is ignored.
+        """
+        now = time.time()
+        with closing(connect_store(self.path)) as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = ?, updated_at = ?"
+                " WHERE id = ? AND status = ? AND attempts = ?",
+                (status, error, now + retry_after if retry_after else 0, now,
+                 job.job_id, LEASED, job.attempts),
+            ).rowcount
+        if not updated:
+            log.warning("job_lease_lost", job_id=job.job_id, doc_id=job.doc_id)
+
+    def prune(self) -> int:
+        """Delete finished jobs older than `retention_seconds`.
+
+        Returns:
+            The number of jobs deleted.
+        """
+        cutoff = time.time() - self.retention_seconds
+        with closing(connect_store(self.path)) as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, cutoff),
+            ).rowcount
+        if deleted:
+            log.info("jobs_pruned", deleted=deleted)
+        return deleted
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs in each status."""
+        with closing(connect_store(self.path)) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in (PENDING, LEASED, DONE, FAILED)} | dict(rows)
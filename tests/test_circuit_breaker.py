@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from googleapiclient.errors import HttpError
+from src.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerPolicy,
+    CircuitBreakerStore,
+    failure_scope,
+)
+from src.deadline import DeadlineExceeded
+
+
+def _http_error(status):
+    return HttpError(resp=MagicMock(status=status), content=b"error")
+
+
+def _store(path=None):
+    return CircuitBreakerStore(
+        path,
+        doc_policy=BreakerPolicy(threshold=2, cooldown=100, max_cooldown=300),
+        api_policy=BreakerPolicy(threshold=3, cooldown=10, max_cooldown=60),
+    )
+
+
+@pytest.mark.parametrize("error, scope", [
+    (_http_error(404), "doc"),
+    (_http_error(403), "doc"),
+    (_http_error(429), "api"),
+    (_http_error(503), "api"),
+    (requests.ConnectionError("reset"), "api"),
+    (requests.Timeout("slow"), "api"),
+    (DeadlineExceeded("late"), None),
+    (ValueError("bug"), None),
+])
+def test_failure_scope_blames_the_doc_or_the_api(error, scope):
+    """Client errors blame the Doc; overload and network errors the API."""
+    assert failure_scope(error) == scope
+
+
+def test_doc_breaker_opens_probes_once_and_backs_off():
+    """A failing Doc is skipped, probed after the cooldown, and backed off."""
+    store = _store()
+    with patch("src.circuit_breaker.time.time", return_value=1000):
+        for _ in range(2):
+            assert store.allow_write("doc-1")
+            store.record_write("doc-1", _http_error(404))
+        assert store.state("doc:doc-1") == OPEN
+        assert not store.allow_write("doc-1")
+        assert store.allow_write("doc-2")
+
+    with patch("src.circuit_breaker.time.time", return_value=1100):
+        assert store.state("doc:doc-1") == HALF_OPEN
+        assert store.allow_write("doc-1")
+        assert not store.allow_write("doc-1")  # one probe at a time
+        store.record_write("doc-1", _http_error(404))
+        assert store.retry_after("doc-1") == 200
+
+    with patch("src.circuit_breaker.time.time", return_value=1300):
+        assert store.allow_write("doc-1")
+        store.record_write("doc-1", None)
+        assert store.state("doc:doc-1") == CLOSED
+
+
+def test_api_outage_does_not_open_doc_breakers():
+    """Server errors open the API breaker, which then stops every write."""
+    store = _store()
+    for doc_id in ("a", "b", "c"):
+        assert store.allow_write(doc_id)
+        store.record_write(doc_id, _http_error(503))
+
+    assert store.state("api:docs") == OPEN
+    assert store.state("doc:a") == CLOSED
+    assert not store.allow_write("d")
+
+
+def test_doc_error_resets_the_api_failure_count():
+    """A 404 shows the API is answering."""
+    store = _store()
+    for error in (_http_error(503), _http_error(503), _http_error(404), _http_error(503)):
+        store.allow_write("doc-1")
+        store.record_write("doc-1", error)
+
+    assert store.state("api:docs") == CLOSED
+
+
+def test_breakers_persist_and_merge_across_stores(tmp_path):
+    """State saved by one process is seen by the next, without overwriting others."""
+    path = tmp_path / "circuit_breakers.json"
+    first, second = _store(path), _store(path)
+    for _ in range(2):
+        first.record_write("doc-1", _http_error(404))
+        second.record_write("doc-2", _http_error(403))
+    first.save()
+    second.save()
+
+    reloaded = _store(path)
+    assert not reloaded.allow_write("doc-1")
+    assert not reloaded.allow_write("doc-2")
@@ -0,0 +1,96 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+from src.concurrency import AimdLimiter, error_status, is_overload
+
+
+def _http_error(status):
+    return HttpError(resp=MagicMock(status=status), content=b"error")
+
+
+def test_error_status_reads_googleapiclient_and_gspread_errors():
+    """Both client libraries' errors expose their HTTP status."""
+    gspread_error = Exception("quota")
+    gspread_error.response = MagicMock(status_code=429)
+
+    assert error_status(_http_error(503)) == 503
+    assert error_status(gspread_error) == 429
+    assert error_status(ValueError("no status")) is None
+    assert is_overload(_http_error(429))
+    assert not is_overload(_http_error(400))
+
+
+def test_limit_grows_by_about_one_per_window_of_successes():
+    """Each healthy success adds 1/limit, so a full window adds one slot."""
+    limiter = AimdLimiter("api", initial=2, maximum=10)
+
+    for _ in range(3):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 3
+
+    for _ in range(3):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 4
+    assert limiter.stats()["successes"] == 6
+
+
+def test_overload_halves_the_limit_once_per_congestion_event():
+    """Calls started before the last cut do not cut the limit again."""
+    limiter = AimdLimiter("api", initial=8)
+    first, second = limiter.acquire(), limiter.acquire()
+
+    limiter.release(first, _http_error(429))
+    limiter.release(second, _http_error(429))
+    assert limiter.limit == 4
+
+    limiter.release(limiter.acquire(), _http_error(503))
+    assert limiter.limit == 2
+    assert limiter.stats()["overloads"] == 3
+
+
+def test_slow_successes_do_not_grow_the_limit():
+    """A success far slower than the fastest seen holds the limit steady."""
+    limiter = AimdLimiter("api", initial=2, latency_tolerance=2.0)
+    limiter.release(limiter.acquire())
+    grown = limiter.stats()
+
+    limiter.acquire()
+    limiter.release(time.monotonic() - 10)
+
+    assert limiter.stats()["limit"] == grown["limit"]
+    assert limiter.stats()["successes"] == 2
+
+
+def test_acquire_waits_for_a_free_slot():
+    """No more than `limit` calls are in flight at once."""
+    limiter = AimdLimiter("api", initial=1, maximum=1)
+    started = limiter.acquire()
+    acquired = threading.Event()
+
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.05)
+
+    limiter.release(started)
+    assert acquired.wait(1)
+    waiter.join()
+    assert limiter.stats()["max_in_flight"] == 1
+
+
+@patch("src.concurrency.time.sleep")
+def test_call_retries_overloads_then_returns(mock_sleep):
+    """429s are retried with backoff; other errors are raised at once."""
+    limiter = AimdLimiter("api", initial=4, retries=2)
+    func = MagicMock(side_effect=[_http_error(429), _http_error(429), "rows"])
+
+    assert limiter.call(func, "arg") == "rows"
+    assert func.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert limiter.stats()["retries"] == 2
+
+    with pytest.raises(HttpError):
+        limiter.call(MagicMock(side_effect=_http_error(404)))
+    assert mock_sleep.call_count == 2
@@ -0,0 +1,114 @@
+import os
+from dataclasses import FrozenInstanceError
+from unittest.mock import patch
+
+import pytest
+import yaml
+from pydantic import ValidationError
+from src.config_manager import ConfigManager
+
+
+def _write_config(path, template_path, spreadsheet_id="abc123"):
+    path.write_text(yaml.dump({
+        "google_sheets": {"spreadsheet_id": spreadsheet_id, "time_zone": "UTC"},
+        "doc_blocks": [{
+            "name": "Block A",
+            "sheet_name": "Sheet1",
+            "template_path": str(template_path),
+            "block_title_template": "A - {{ date }}",
+            "doc_id": "doc-1",
+        }],
+    }), encoding="utf-8")
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    template = tmp_path / "a.j2"
+    template.write_text("Hello {{ name }}", encoding="utf-8")
+    path = tmp_path / "config.yaml"
+    _write_config(path, template)
+    return path
+
+
+def test_current_builds_snapshot_with_validated_config(config_file):
+    """The snapshot holds the validated config."""
+    snapshot = ConfigManager(config_file).current
+
+    assert snapshot.config.google_sheets.spreadsheet_id == "abc123"
+    with pytest.raises(FrozenInstanceError):
+        snapshot.config = None
+
+
+def test_broken_template_rejects_reload(config_file, tmp_path):
+    """A config pointing at an invalid template is not swapped in."""
+    manager = ConfigManager(config_file)
+    good = manager.current
+    broken = tmp_path / "broken.j2"
+    broken.write_text("{% if %}", encoding="utf-8")
+    _write_config(config_file, broken, spreadsheet_id="new-id")
+
+    assert manager.refresh() is False
+    assert manager.current is good
+
+
+def test_refresh_revalidates_only_on_content_change(config_file):
+    """Unchanged or touched-but-identical files are not revalidated."""
+    manager = ConfigManager(config_file)
+    first = manager.current
+
+    with patch("src.config_manager.parse_config") as mock_parse:
+        assert manager.refresh() is False
+        os.utime(config_file, ns=(1, 1))
+        assert manager.refresh() is False
+        mock_parse.assert_not_called()
+
+    assert manager.current is first
+
+
+def test_refresh_swaps_snapshot_on_change(config_file, tmp_path):
+    """Editing the file swaps in a new snapshot."""
+    manager = ConfigManager(config_file)
+    assert manager.current.config.google_sheets.spreadsheet_id == "abc123"
+
+    _write_config(config_file, tmp_path / "a.j2", spreadsheet_id="new-id")
+
+    assert manager.refresh() is True
+    assert manager.current.config.google_sheets.spreadsheet_id == "new-id"
+
+
+def test_invalid_edit_keeps_previous_snapshot(config_file):
+    """A broken edit is logged and the last good snapshot stays active."""
+    manager = ConfigManager(config_file)
+    good = manager.current
+    config_file.write_text("google_sheets: {}\ndoc_blocks: []\n", encoding="utf-8")
+
+    assert manager.refresh() is False
+    assert manager.current is good
+    with pytest.raises(ValidationError):
+        ConfigManager(config_file).current
+
+
+def test_disk_cache_skips_parsing_in_new_process(config_file, tmp_path):
+    """A second manager loads the config from the hash-keyed JSON cache."""
+    cache_dir = tmp_path / "cache"
+    ConfigManager(config_file, cache_dir=cache_dir).current
+    assert len(list(cache_dir.glob("config-*.json"))) == 1
+
+    with patch("src.config_manager.parse_config") as mock_parse:
+        snapshot = ConfigManager(config_file, cache_dir=cache_dir).current
+
+    mock_parse.assert_not_called()
+    assert snapshot.config.doc_blocks[0].doc_id == "doc-1"
+
+
+def test_disk_cache_keeps_only_the_latest_config(config_file, tmp_path):
+    """Caching a new config removes entries for older content."""
+    cache_dir = tmp_path / "cache"
+    manager = ConfigManager(config_file, cache_dir=cache_dir)
+    manager.current
+    _write_config(config_file, tmp_path / "a.j2", spreadsheet_id="new-id")
+    manager.refresh()
+
+    cached = list(cache_dir.glob("config-*"))
+    assert len(cached) == 1
+    assert "new-id" in cached[0].read_text(encoding="utf-8")
@@ -1,9 +1,19 @@
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
-from src.config_schema import Config, DocBlockConfig, GoogleSheetsConfig
+import structlog
+from src.config_schema import (
+    Config,
+    DocBlockConfig,
+    GoogleCalendarConfig,
+    GoogleSheetsConfig,
+)
 from src.daily_task_bot import DailyTaskBot
+from src.docs_requests import document_text
+from src.utils import content_hash, get_today_str
 
 
 @pytest.fixture
@@ -78,7 +88,7 @@ def disabled_block_config(base_sheets_config):
     )
 
 
-@patch("src.daily_task_bot.overwrite_doc_contents")
+@patch("src.daily_task_bot.overwrite_doc_sections")
 @patch("src.daily_task_bot.render_template")
 @patch("src.daily_task_bot.find_today_task")
 @patch("src.daily_task_bot.get_sheet_rows")
@@ -111,15 +121,22 @@ def test_run_single_block_valid_task(
         credentials="creds"
     )
     mock_find_today_task.assert_called_once_with(
-        mock_get_rows.return_value, date_column="Date"
+        mock_get_rows.return_value,
+        date_column="Date",
+        day=get_today_str(time_zone=single_block_config.google_sheets.time_zone),
     )
     expected_preprocessed = {"Date": "2025-08-09", "Task_Name": "Lesson", "Topic": "X"}
     mock_render.assert_called_once_with(
         Path(block.template_path), expected_preprocessed)
-    mock_overwrite.assert_called_once_with(block.doc_id, "Rendered Content", "creds")
+    mock_overwrite.assert_called_once()
+    doc_id, sections, creds = mock_overwrite.call_args.args
+    assert (doc_id, creds) == (block.doc_id, "creds")
+    assert [(s.title, s.content) for s in sections] == [
+        ("Dummy Title", "Rendered Content")
+    ]
 
 
-@patch("src.daily_task_bot.overwrite_doc_contents")
+@patch("src.daily_task_bot.overwrite_doc_sections")
 @patch("src.daily_task_bot.render_template")
 @patch("src.daily_task_bot.find_today_task")
 @patch("src.daily_task_bot.get_sheet_rows")
@@ -148,10 +165,16 @@ def test_run_concatenates_multiple_blocks_same_doc(
     bot.run()
 
     assert mock_render.call_count == 2
-    mock_overwrite.assert_called_once_with("doc-joined", "Alpha\nBeta", "creds")
+    mock_overwrite.assert_called_once()
+    doc_id, sections, creds = mock_overwrite.call_args.args
+    assert (doc_id, creds) == ("doc-joined", "creds")
+    assert [(s.title, s.content) for s in sections] == [
+        ("Dummy Title", "Alpha"),
+        ("Dummy Title", "Beta"),
+    ]
 
 
-@patch("src.daily_task_bot.overwrite_doc_contents")
+@patch("src.daily_task_bot.overwrite_doc_sections")
 @patch("src.daily_task_bot.render_template")
 @patch("src.daily_task_bot.find_today_task")
 @patch("src.daily_task_bot.get_sheet_rows")
@@ -178,7 +201,7 @@ def test_run_skips_when_no_task(
     mock_overwrite.assert_not_called()
 
 
-@patch("src.daily_task_bot.overwrite_doc_contents")
+@patch("src.daily_task_bot.overwrite_doc_sections")
 @patch("src.daily_task_bot.get_service_account_credentials")
 def test_run_skips_disabled_block(
     mock_get_creds,
@@ -224,3 +247,727 @@ def test_run_raises_on_render_error(
         with pytest.raises(Exception):
             bot.run()
         mock_log.assert_any_call("content_build_error", error="Render fail")
+
+
+@pytest.fixture
+def two_docs_config(base_sheets_config):
+    return Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[
+            DocBlockConfig(
+                name="First",
+                sheet_name="SheetA",
+                template_path="templates/a.md",
+                block_title_template="Dummy Title",
+                doc_id="doc-first",
+            ),
+            DocBlockConfig(
+                name="Second",
+                sheet_name="SheetB",
+                template_path="templates/b.md",
+                block_title_template="Dummy Title",
+                doc_id="doc-second",
+            ),
+        ],
+    )
+
+
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_writes_each_doc_once_its_blocks_are_rendered(
+    mock_get_creds, mock_find, mock_render, two_docs_config
+):
+    """Writes a Doc before later blocks for other Docs are fetched."""
+    calls = []
+
+    def fake_rows(sheet_name, spreadsheet_id, credentials):
+        calls.append(("read", sheet_name))
+        return [{"Date": "2025-08-09"}]
+
+    def fake_write(doc_id, sections, credentials, revisions):
+        calls.append(("write", doc_id))
+
+    with patch("src.daily_task_bot.get_sheet_rows", side_effect=fake_rows), \
+         patch("src.daily_task_bot.overwrite_doc_sections", side_effect=fake_write):
+        DailyTaskBot(two_docs_config).run()
+
+    assert calls == [
+        ("read", "SheetA"),
+        ("write", "doc-first"),
+        ("read", "SheetB"),
+        ("write", "doc-second"),
+    ]
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task",
+       return_value={"Date": "2025-08-09", "Topic Name": "Graphs"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_renders_block_title_template(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    base_sheets_config,
+):
+    """Renders each block's title template with the row and today's date."""
+    config = Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[
+            DocBlockConfig(
+                name="Titled",
+                sheet_name="Sheet1",
+                template_path="templates/t.md",
+                block_title_template="{{ Topic_Name }} - {{ date }}",
+                doc_id="doc-1",
+            )
+        ],
+    )
+
+    with patch("src.daily_task_bot.get_today_str", return_value="2025-08-09"):
+        DailyTaskBot(config).run()
+
+    sections = mock_overwrite.call_args.args[1]
+    assert sections[0].title == "Graphs - 2025-08-09"
+    assert sections[0].content == "Body"
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", side_effect=["Alpha", "Beta"])
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_plan_reports_docs_without_writing(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    two_docs_config,
+):
+    """Plan mode renders every Doc, estimates API calls, and writes nothing."""
+    bot = DailyTaskBot(two_docs_config)
+    bot.revisions.set("doc-second", "rev-1", 10, content_hash("Dummy Title\nBeta"))
+
+    report = bot.plan()
+
+    mock_overwrite.assert_not_called()
+    by_doc = {d["doc_id"]: d for d in report["docs"]}
+    assert by_doc["doc-first"]["text"] == "Dummy Title\nAlpha"
+    assert by_doc["doc-first"]["changed"] is True
+    assert by_doc["doc-second"]["changed"] is False
+    assert report["api_calls"] == {
+        "sheet_reads": 2,
+        "docs_get": 1,
+        "docs_batch_update": 2,
+        "docs_round_trips": 3,
+    }
+
+
+@patch("src.daily_task_bot.render_template", side_effect=["Alpha", "Beta\n" * 4])
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_plan_counts_chunked_writes_and_batch_round_trips(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, two_docs_config, monkeypatch
+):
+    """A chunked Doc costs one update per chunk, outside the batch round trips."""
+    monkeypatch.setattr("src.google_docs.MAX_CHUNK_BYTES", 20)
+    bot = DailyTaskBot(two_docs_config, docs_batch_size=2)
+
+    report = bot.plan()
+
+    by_doc = {d["doc_id"]: d for d in report["docs"]}
+    assert by_doc["doc-first"]["docs_calls"] == 2
+    # 33 bytes, written as chunks of whole paragraphs of at most 20 bytes
+    assert by_doc["doc-second"]["docs_calls"] == 3
+    assert report["api_calls"] == {
+        "sheet_reads": 2,
+        "docs_get": 2,
+        "docs_batch_update": 3,
+        "docs_round_trips": 5,
+    }
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_reads_each_sheet_tab_once(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    base_sheets_config,
+):
+    """Blocks that share a sheet tab reuse a single read."""
+    config = Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[
+            DocBlockConfig(
+                name=f"Block {i}",
+                sheet_name="Shared",
+                template_path="templates/t.md",
+                block_title_template="T",
+                doc_id=f"doc-{i}",
+            )
+            for i in range(3)
+        ],
+    )
+
+    DailyTaskBot(config).run()
+
+    mock_get_rows.assert_called_once()
+    assert mock_overwrite.call_count == 3
+
+
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_resume_processes_only_outstanding_docs(
+    mock_get_creds, mock_find, mock_render, two_docs_config, tmp_path
+):
+    """A resumed run skips Docs the journal shows as already written."""
+    with patch("src.daily_task_bot.get_sheet_rows", return_value=[]), \
+         patch("src.daily_task_bot.overwrite_doc_sections",
+               side_effect=[None, Exception("killed")]):
+        DailyTaskBot(two_docs_config, state_dir=tmp_path).run()
+
+    with patch("src.daily_task_bot.get_sheet_rows", return_value=[]) as mock_rows, \
+         patch("src.daily_task_bot.overwrite_doc_sections") as mock_overwrite:
+        DailyTaskBot(two_docs_config, state_dir=tmp_path).run(resume=True)
+
+    mock_rows.assert_called_once_with(
+        sheet_name="SheetB", spreadsheet_id="spreadsheet-id", credentials="creds"
+    )
+    assert [c.args[0] for c in mock_overwrite.call_args_list] == ["doc-second"]
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_stop_halts_run_after_current_block(
+    mock_get_creds, mock_find, mock_render, mock_overwrite, two_docs_config
+):
+    """stop() lets the current block finish and starts no further blocks."""
+    bot = DailyTaskBot(two_docs_config)
+
+    def rows_then_stop(sheet_name, spreadsheet_id, credentials):
+        bot.stop()
+        return []
+
+    with patch("src.daily_task_bot.get_sheet_rows", side_effect=rows_then_stop) as rows:
+        bot.run()
+
+    rows.assert_called_once()
+    assert [c.args[0] for c in mock_overwrite.call_args_list] == ["doc-first"]
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_shards_write_disjoint_docs_covering_every_doc(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    base_sheets_config,
+):
+    """Each shard writes only its own Docs and together they write them all."""
+    config = Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[
+            DocBlockConfig(
+                name=f"Block {i}",
+                sheet_name="Shared",
+                template_path="templates/t.md",
+                block_title_template="T",
+                doc_id=f"doc-{i}",
+            )
+            for i in range(8)
+        ],
+    )
+
+    written = []
+    for index in range(3):
+        mock_overwrite.reset_mock()
+        DailyTaskBot(config, shard=(index, 3)).run()
+        written.append({c.args[0] for c in mock_overwrite.call_args_list})
+
+    assert sorted(set().union(*written)) == sorted(f"doc-{i}" for i in range(8))
+    assert sum(len(docs) for docs in written) == 8
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_skips_docs_leased_by_another_process(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    two_docs_config, tmp_path,
+):
+    """A Doc whose write lease is held elsewhere is left alone."""
+    bot = DailyTaskBot(two_docs_config, state_dir=tmp_path)
+    bot.leases.acquire("doc-first", "other-node")
+
+    result = bot.run()
+
+    assert [c.args[0] for c in mock_overwrite.call_args_list] == ["doc-second"]
+    assert result["docs_updated"] == 1
+    assert result["docs_leased"] == 1
+
+
+@patch("src.daily_task_bot.render_template", side_effect=["Alpha", "Beta"])
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_enqueue_then_drain_writes_each_doc_once(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, two_docs_config, tmp_path
+):
+    """Queued writes are drained by workers and unchanged Docs are not rewritten."""
+    def fake_write(doc_id, sections, credentials, revisions):
+        revisions.set(doc_id, "rev", 1, content_hash(document_text(sections)))
+
+    with patch("src.daily_task_bot.overwrite_doc_sections") as mock_overwrite:
+        enqueued = DailyTaskBot(two_docs_config, state_dir=tmp_path).enqueue()
+        mock_overwrite.assert_not_called()
+
+    with patch("src.daily_task_bot.overwrite_doc_sections",
+               side_effect=fake_write) as mock_overwrite:
+        drained = DailyTaskBot(two_docs_config, state_dir=tmp_path).drain(writers=2)
+
+    assert enqueued["jobs_enqueued"] == 2
+    assert sorted(c.args[0] for c in mock_overwrite.call_args_list) == ["doc-first", "doc-second"]
+    assert drained["docs_updated"] == 2
+    assert drained["pending"] == 0
+
+    mock_render.side_effect = ["Alpha", "Beta"]
+    with patch("src.daily_task_bot.overwrite_doc_sections") as mock_overwrite:
+        bot = DailyTaskBot(two_docs_config, state_dir=tmp_path)
+        bot.enqueue()
+        again = bot.drain()
+
+    mock_overwrite.assert_not_called()
+    assert again["docs_unchanged"] == 2
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_uses_latest_config_snapshot(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    disabled_block_config, two_docs_config,
+):
+    """Each run refreshes the config manager and uses its current config."""
+    manager = MagicMock()
+    manager.current.config = two_docs_config
+
+    DailyTaskBot(disabled_block_config, config_manager=manager).run()
+
+    manager.refresh.assert_called_once()
+    assert sorted(c.args[0] for c in mock_overwrite.call_args_list) == [
+        "doc-first", "doc-second"
+    ]
+
+
+@patch("src.daily_task_bot.render_template", side_effect=["Alpha", "Beta"])
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_drain_writers_inherit_the_drain_trace(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, two_docs_config, tmp_path
+):
+    """Writer threads log under the trace ID bound by drain()."""
+    trace_ids = []
+
+    def fake_write(doc_id, sections, credentials, revisions):
+        trace_ids.append(structlog.contextvars.get_contextvars().get("trace_id"))
+
+    bot = DailyTaskBot(two_docs_config, state_dir=tmp_path)
+    with patch("src.daily_task_bot.overwrite_doc_sections", side_effect=fake_write):
+        bot.enqueue()
+        bot.drain(writers=2)
+
+    assert len(trace_ids) == 2
+    assert trace_ids[0] is not None and len(set(trace_ids)) == 1
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_batched_run_maps_per_doc_errors_to_failures(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, mock_overwrite,
+    two_docs_config, tmp_path,
+):
+    """Docs are written in one batch and each Doc's error counts separately."""
+    bot = DailyTaskBot(two_docs_config, state_dir=tmp_path, docs_batch_size=2)
+
+    with patch(
+        "src.daily_task_bot.overwrite_docs_batch",
+        return_value={"doc-first": None, "doc-second": RuntimeError("boom")},
+    ) as mock_batch:
+        result = bot.run()
+
+    mock_overwrite.assert_not_called()
+    mock_batch.assert_called_once()
+    assert [doc_id for doc_id, _ in mock_batch.call_args.args[0]] == [
+        "doc-first", "doc-second"
+    ]
+    assert result["docs_updated"] == 1
+    assert result["docs_failed"] == 1
+    assert bot.journal.completed() == {"doc-first": content_hash("Dummy Title\nBody")}
+
+
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task",
+       return_value={"Date": "2025-08-09", "Topic Name": "Graphs"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_creates_events_only_for_written_docs(
+    mock_get_creds, mock_get_rows, mock_find, mock_render, two_docs_config, tmp_path
+):
+    """Calendar events are synced for blocks whose Doc write succeeded."""
+    config = two_docs_config.model_copy(update={
+        "google_calendar": GoogleCalendarConfig(
+            calendar_id="cal", summary_template="{{ block }}: {{ Topic_Name }}"
+        )
+    })
+
+    def fake_write(doc_id, sections, credentials, revisions):
+        if doc_id == "doc-second":
+            raise RuntimeError("boom")
+
+    with patch("src.daily_task_bot.overwrite_doc_sections", side_effect=fake_write), \
+         patch("src.daily_task_bot.sync_events", side_effect=lambda specs, *a: {
+             spec.event_id: None for spec in specs
+         }) as mock_sync:
+        result = DailyTaskBot(config, state_dir=tmp_path).run()
+
+    specs, calendar_id, time_zone, _ = mock_sync.call_args.args
+    assert [(s.block_name, s.doc_id, s.summary) for s in specs] == [
+        ("First", "doc-first", "First: Graphs")
+    ]
+    assert (calendar_id, time_zone) == ("cal", "UTC")
+    assert mock_get_creds.call_args.kwargs["scopes"][-1].endswith("/calendar.events")
+    assert result["events_synced"] == 1
+    assert result["events_failed"] == 0
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", side_effect=lambda path, task: task["Topic"])
+@patch("src.daily_task_bot.get_today_str", return_value="2025-08-09")
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_watch_rewrites_only_docs_on_changed_tabs(
+    mock_get_creds, mock_today, mock_render, mock_overwrite, two_docs_config, tmp_path
+):
+    """A full run first, then nothing until the version moves, then one Doc."""
+    sheets = {
+        "SheetA": [{"Date": "2025-08-09", "Topic": "Arrays"}],
+        "SheetB": [{"Date": "2025-08-09", "Topic": "Graphs"}],
+    }
+    versions = iter(["1", "1", "2"])
+    bot = DailyTaskBot(two_docs_config, state_dir=tmp_path)
+
+    def fake_version(spreadsheet_id, credentials):
+        version = next(versions, None)
+        if version is None:
+            bot.stop()
+            return "2"
+        if version == "2":
+            sheets["SheetB"] = [{"Date": "2025-08-09", "Topic": "Trees"}]
+        return version
+
+    with patch("src.daily_task_bot.file_version", side_effect=fake_version), \
+         patch("src.daily_task_bot.get_sheet_rows",
+               side_effect=lambda sheet_name, **kw: sheets[sheet_name]), \
+         patch("src.daily_task_bot.find_today_task", side_effect=lambda rows, **kw: rows[0]):
+        result = bot.watch(interval=0)
+
+    written = [c.args[0] for c in mock_overwrite.call_args_list]
+    assert written == ["doc-first", "doc-second", "doc-second"]
+    assert mock_overwrite.call_args.args[1][0].content == "Trees"
+    assert result == {"polls": 4, "runs": 2}
+    assert mock_get_creds.call_args_list[0].kwargs["scopes"][-1].endswith(
+        "drive.metadata.readonly"
+    )
+
+
+@patch("src.daily_task_bot.render_template", return_value="Body")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_prefetch_reads_every_tab_concurrently_before_writing(
+    mock_get_creds, mock_find, mock_render, two_docs_config
+):
+    """With prefetch_tabs, both tabs are in flight at once and each is read once."""
+    both_started = threading.Barrier(2, timeout=5)
+    reads = []
+
+    def fake_rows(sheet_name, spreadsheet_id, credentials):
+        reads.append(sheet_name)
+        both_started.wait()
+        return [{"Date": "2025-08-09"}]
+
+    with patch("src.daily_task_bot.get_sheet_rows", side_effect=fake_rows), \
+         patch("src.daily_task_bot.overwrite_doc_sections") as mock_write:
+        result = DailyTaskBot(two_docs_config, prefetch_tabs=True).run()
+
+    assert sorted(reads) == ["SheetA", "SheetB"]
+    assert [c.args[0] for c in mock_write.call_args_list] == ["doc-first", "doc-second"]
+    assert result["sheet_reads"] == 2
+
+
+@patch("src.daily_task_bot.render_template", side_effect=lambda path, task: task["Topic"])
+@patch("src.daily_task_bot.get_today_str", return_value="2025-08-09")
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_from_schedule_reads_no_sheets_after_sync(
+    mock_get_creds, mock_today, mock_render, two_docs_config, tmp_path
+):
+    """A sync copies each tab once; runs from the schedule then read no tabs."""
+    sheets = {
+        "SheetA": [{"Date": "2025-08-08", "Topic": "Old"},
+                   {"Date": "2025-08-09", "Topic": "Arrays"}],
+        "SheetB": [{"Date": "2025-08-09", "Topic": "Graphs"}],
+    }
+    bot = DailyTaskBot(two_docs_config, state_dir=tmp_path, from_schedule=True)
+
+    with patch("src.daily_task_bot.file_version", return_value="7"), \
+         patch("src.daily_task_bot.get_sheet_rows",
+               side_effect=lambda sheet_name, **kw: sheets[sheet_name]) as mock_rows, \
+         patch("src.daily_task_bot.overwrite_doc_sections") as mock_write:
+        synced = bot.sync_schedule()
+        unchanged = bot.sync_schedule()
+        mock_rows.reset_mock()
+        result = bot.run()
+
+    assert synced == {"tabs_synced": 2, "rows_written": 3, "skipped": False}
+    assert unchanged["skipped"] is True
+    mock_rows.assert_not_called()
+    assert result["sheet_reads"] == 0
+    assert [(c.args[0], c.args[1][0].content) for c in mock_write.call_args_list] == [
+        ("doc-first", "Arrays"), ("doc-second", "Graphs"),
+    ]
+
+
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_writes_prerendered_docs_whose_source_rows_are_unchanged(
+    mock_get_creds, base_sheets_config, tmp_path
+):
+    """Same version: no reads or renders. New version: only changed Docs render."""
+    blocks = []
+    for name, sheet, doc_id in [("First", "SheetA", "doc-first"),
+                                ("Second", "SheetB", "doc-second")]:
+        template = tmp_path / f"{name}.j2"
+        template.write_text("{{ Topic }}", encoding="utf-8")
+        blocks.append(DocBlockConfig(name=name, sheet_name=sheet, template_path=template,
+                                     block_title_template="{{ date }}", doc_id=doc_id))
+    config = Config(google_sheets=base_sheets_config, doc_blocks=blocks)
+    sheets = {
+        "SheetA": [{"Date": "2025-08-10", "Topic": "Arrays"}],
+        "SheetB": [{"Date": "2025-08-10", "Topic": "Graphs"}],
+    }
+    version = {"value": "5"}
+    bot = DailyTaskBot(config, state_dir=tmp_path / "state")
+
+    with patch("src.daily_task_bot.file_version", side_effect=lambda *a: version["value"]), \
+         patch("src.daily_task_bot.get_sheet_rows",
+               side_effect=lambda sheet_name, **kw: sheets[sheet_name]) as mock_rows, \
+         patch("src.daily_task_bot.overwrite_doc_sections") as mock_write:
+        with patch("src.daily_task_bot.get_today_str", return_value="2025-08-09"):
+            assert bot.prerender(day="2025-08-10")["docs_prerendered"] == 2
+        mock_rows.reset_mock()
+
+        with patch("src.daily_task_bot.get_today_str", return_value="2025-08-10"), \
+             patch("src.scheduler.get_today_str", return_value="2025-08-10"), \
+             patch("src.daily_task_bot.render_template") as mock_render:
+            unchanged = bot.run()
+            mock_rows.assert_not_called()
+            mock_render.assert_not_called()
+
+            sheets["SheetB"] = [{"Date": "2025-08-10", "Topic": "Trees"}]
+            version["value"] = "6"
+            mock_render.return_value = "Trees"
+            changed = bot.run()
+
+    assert (unchanged["docs_prerendered"], unchanged["sheet_reads"]) == (2, 0)
+    assert (changed["docs_prerendered"], changed["sheet_reads"]) == (1, 2)
+    mock_render.assert_called_once()
+    assert [(c.args[0], c.args[1][0].title, c.args[1][0].content)
+            for c in mock_write.call_args_list] == [
+        ("doc-first", "2025-08-10", "Arrays"),
+        ("doc-second", "2025-08-10", "Graphs"),
+        ("doc-first", "2025-08-10", "Arrays"),
+        ("doc-second", "2025-08-10", "Trees"),
+    ]
+
+
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_today_is_the_date_in_the_sheets_time_zone(mock_get_creds, monkeypatch, tmp_path):
+    """Prune, pre-render lookup, journal and matching all use the sheets' date."""
+    class FixedDate(datetime):
+        @classmethod
+        def today(cls):
+            return cls(2025, 8, 1, 2)
+
+        @classmethod
+        def now(cls, tz=None):
+            # The host's clock reads Aug 1, but it is still Jul 31 in New York
+            return cls(2025, 8, 1, 2, tzinfo=timezone.utc).astimezone(tz)
+
+    monkeypatch.setattr("src.utils.datetime", FixedDate)
+    template = tmp_path / "t.j2"
+    template.write_text("{{ Topic }}", encoding="utf-8")
+    config = Config(
+        google_sheets=GoogleSheetsConfig(
+            spreadsheet_id="spreadsheet-id",
+            time_zone="America/New_York",
+            date_column_name="Date",
+        ),
+        doc_blocks=[DocBlockConfig(
+            name="Only", sheet_name="Sheet1", template_path=template,
+            block_title_template="{{ date }}", doc_id="doc-1",
+        )],
+    )
+    rows = [{"Date": "2025-07-31", "Topic": "Arrays"}, {"Date": "2025-08-01", "Topic": "Graphs"}]
+    bot = DailyTaskBot(config, state_dir=tmp_path / "state")
+
+    with patch("src.daily_task_bot.file_version", return_value="5"), \
+         patch("src.daily_task_bot.get_sheet_rows", return_value=rows), \
+         patch("src.daily_task_bot.overwrite_doc_sections") as mock_write:
+        bot.prerender(day="2025-07-31")
+        from_prerender = bot.run()
+        (bot.state_dir / "prerender" / "2025-07-31.json").unlink()
+        rendered = bot.run()
+
+    assert from_prerender["docs_prerendered"] == 1
+    assert rendered["docs_prerendered"] == 0
+    assert [(c.args[1][0].title, c.args[1][0].content) for c in mock_write.call_args_list] == [
+        ("2025-07-31", "Arrays"), ("2025-07-31", "Arrays"),
+    ]
+    assert [p.name for p in (bot.state_dir / "journal").iterdir()] == ["2025-07-31.jsonl"]
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.get_sheet_rows")
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_blocks_with_a_local_source_read_no_sheets(
+    mock_get_creds, mock_rows, mock_write, base_sheets_config, tmp_path
+):
+    """A CSV-backed block goes through the same matching and rendering."""
+    csv_path = tmp_path / "plan.csv"
+    csv_path.write_text("Date,Topic Name\n2025-08-08,Old\n2025-08-09,Heaps\n", encoding="utf-8")
+    template = tmp_path / "t.j2"
+    template.write_text("Study {{ Topic_Name }}", encoding="utf-8")
+    config = Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[DocBlockConfig(
+            name="Local", sheet_name="Plan", template_path=template,
+            block_title_template="{{ date }}", doc_id="doc-local",
+            source={"type": "csv", "path": str(csv_path)},
+        )],
+    )
+
+    with patch("src.daily_task_bot.get_today_str", return_value="2025-08-09"), \
+         patch("src.scheduler.get_today_str", return_value="2025-08-09"):
+        result = DailyTaskBot(config).run()
+
+    mock_rows.assert_not_called()
+    assert result["sheet_reads"] == 1
+    sections = mock_write.call_args.args[1]
+    assert [(s.title, s.content) for s in sections] == [("2025-08-09", "Study Heaps")]
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.get_sheet_rows",
+       return_value=[{"Date": "2025-08-09", "Topic Name": "Heaps"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_blocks_with_a_file_sink_write_files_not_docs(
+    mock_get_creds, mock_rows, mock_write, base_sheets_config, tmp_path
+):
+    """A file-sink Doc is written to its directory without a Docs call."""
+    template = tmp_path / "t.j2"
+    template.write_text("Study **{{ Topic_Name }}**", encoding="utf-8")
+    config = Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[DocBlockConfig(
+            name="Local", sheet_name="Plan", template_path=template,
+            block_title_template="{{ date }}", doc_id="daily", format="markdown",
+            sink={"directory": str(tmp_path / "out"), "format": "html"},
+        )],
+    )
+
+    with patch("src.daily_task_bot.get_today_str", return_value="2025-08-09"), \
+         patch("src.scheduler.get_today_str", return_value="2025-08-09"):
+        result = DailyTaskBot(config).run()
+
+    mock_write.assert_not_called()
+    assert result["docs_updated"] == 1
+    written = (tmp_path / "out" / "daily.html").read_text(encoding="utf-8")
+    assert "<h2>2025-08-09</h2>" in written
+    assert "<p>Study <strong>Heaps</strong></p>" in written
+
+
+def test_blocks_sharing_a_doc_must_share_a_sink(base_sheets_config):
+    """A Doc cannot be split between Google Docs and a file."""
+    block = {"sheet_name": "S", "template_path": "t.md",
+             "block_title_template": "T", "doc_id": "doc-1"}
+    with pytest.raises(ValueError, match="same sink"):
+        Config(
+            google_sheets=base_sheets_config,
+            doc_blocks=[
+                DocBlockConfig(name="A", **block),
+                DocBlockConfig(name="B", sink={"directory": "out"}, **block),
+            ],
+        )
+
+
+@patch("src.daily_task_bot.overwrite_doc_sections")
+@patch("src.daily_task_bot.render_template", return_value="content")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_run_cuts_off_blocks_left_when_the_deadline_passes(
+    mock_get_creds, mock_find, mock_render, mock_write, base_sheets_config
+):
+    """A read that outlasts the deadline stops the run and is reported."""
+    config = Config(
+        google_sheets=base_sheets_config,
+        doc_blocks=[
+            DocBlockConfig(name=name, sheet_name=sheet, template_path="t.md",
+                           block_title_template="T", doc_id=doc_id)
+            for name, sheet, doc_id in [
+                ("A", "Fast", "doc-1"), ("B", "Hung", "doc-2"), ("C", "Fast", "doc-2"),
+            ]
+        ],
+    )
+
+    def read(sheet_name, spreadsheet_id, credentials):
+        if sheet_name == "Hung":
+            threading.Event().wait(0.2)
+            raise TimeoutError("read timed out")
+        return [{"Date": "2025-08-09"}]
+
+    with patch("src.daily_task_bot.get_sheet_rows", side_effect=read):
+        result = DailyTaskBot(config, deadline=0.1).run()
+
+    assert [c.args[0] for c in mock_write.call_args_list] == ["doc-1"]
+    assert result["deadline_exceeded"] is True
+    assert result["blocks_cut_off"] == ["B", "C"]
+    assert result["docs_cut_off"] == ["doc-2"]
+
+
+@patch("src.daily_task_bot.render_template", return_value="content")
+@patch("src.daily_task_bot.find_today_task", return_value={"Date": "2025-08-09"})
+@patch("src.daily_task_bot.get_sheet_rows", return_value=[{"Date": "2025-08-09"}])
+@patch("src.daily_task_bot.get_service_account_credentials", return_value="creds")
+def test_runs_stop_writing_a_deleted_doc(
+    mock_get_creds, mock_rows, mock_find, mock_render, single_block_config, tmp_path
+):
+    """Once its breaker opens, later runs skip a Doc that keeps returning 404."""
+    from googleapiclient.errors import HttpError
+
+    missing = HttpError(resp=MagicMock(status=404), content=b"not found")
+    with patch("src.daily_task_bot.overwrite_doc_sections", side_effect=missing) as mock_write:
+        results = [DailyTaskBot(single_block_config, state_dir=tmp_path).run()
+                   for _ in range(3)]
+
+    assert mock_write.call_count == 2
+    assert [r["docs_failed"] for r in results] == [1, 1, 0]
+    assert results[2]["docs_short_circuited"] == 1
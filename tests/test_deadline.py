@@ -0,0 +1,54 @@
+import contextvars
+import threading
+
+import pytest
+from src.deadline import (
+    DeadlineExceeded,
+    call_timeout,
+    expired,
+    remaining,
+    run_deadline,
+)
+
+
+def test_no_deadline_uses_the_configured_timeout(monkeypatch):
+    """Without a deadline, a call gets GOOGLE_HTTP_TIMEOUT."""
+    monkeypatch.setenv("GOOGLE_HTTP_TIMEOUT", "12")
+    assert remaining() is None
+    assert not expired()
+    assert call_timeout() == 12
+
+
+def test_call_timeout_is_cut_to_the_time_left():
+    """A call never gets longer than the time left before the deadline."""
+    with run_deadline(2):
+        assert 0 < call_timeout(60) <= 2
+        assert call_timeout(1) == 1
+    assert remaining() is None
+
+
+def test_nested_deadline_keeps_the_sooner_one():
+    """An inner budget cannot extend the outer deadline."""
+    with run_deadline(1):
+        with run_deadline(100):
+            assert remaining() <= 1
+
+
+def test_passed_deadline_refuses_calls():
+    """Once the deadline passes, no call is started."""
+    with run_deadline(0):
+        assert expired()
+        with pytest.raises(DeadlineExceeded):
+            call_timeout()
+
+
+def test_deadline_reaches_threads_run_in_a_copied_context():
+    """Worker threads started with the caller's context share its deadline."""
+    seen = []
+    with run_deadline(0):
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(lambda: seen.append(expired()),)
+        )
+        thread.start()
+        thread.join()
+    assert seen == [True]
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from src.doc_output import BlockSection, DocOutput, DocOutputBuilder
+
+
+def _blocks(*doc_ids):
+    return [SimpleNamespace(doc_id=doc_id) for doc_id in doc_ids]
+
+
+def test_builder_preserves_config_order_when_added_out_of_order():
+    """Sections are emitted in config order regardless of add order."""
+    ready = []
+    builder = DocOutputBuilder(_blocks("doc-a", "doc-a", "doc-a"), ready.append)
+
+    builder.add(2, "C", "Gamma")
+    builder.add(0, "A", "Alpha")
+    assert ready == []
+    builder.add(1, "B", "Beta")
+
+    assert len(ready) == 1
+    assert ready[0].doc_id == "doc-a"
+    assert ready[0].text == "Alpha\nBeta\nGamma"
+
+
+def test_builder_flushes_doc_as_soon_as_last_block_is_done():
+    """A Doc is flushed once its blocks finish, before later Docs are started."""
+    ready = []
+    builder = DocOutputBuilder(_blocks("doc-a", "doc-b", "doc-a"), ready.append)
+
+    builder.add(0, "A1", "one")
+    builder.skip(2)
+    assert [o.doc_id for o in ready] == ["doc-a"]
+    assert builder.pending_docs() == ["doc-b"]
+
+    builder.add(1, "B1", "two")
+    assert [o.doc_id for o in ready] == ["doc-a", "doc-b"]
+    assert builder.pending_docs() == []
+
+
+def test_builder_does_not_flush_doc_with_only_skipped_blocks():
+    """Docs whose blocks produced nothing are never handed to the writer."""
+    ready = []
+    builder = DocOutputBuilder(_blocks("doc-a", "doc-a"), ready.append)
+
+    builder.skip(0)
+    builder.skip(1)
+
+    assert ready == []
+
+
+def test_doc_output_records_byte_sizes():
+    """Per-block and total sizes are measured in UTF-8 bytes."""
+    output = DocOutput(
+        doc_id="doc-a",
+        sections=[BlockSection("A", "", "é"), BlockSection("B", "T", "abc")],
+    )
+
+    assert [s.size_bytes for s in output.sections] == [2, 5]
+    assert output.text == "é\nT\nabc"
+    assert output.size_bytes == len(output.text.encode("utf-8")) == 8
+
+
+def test_builder_keeps_section_titles():
+    """Titled sections contribute a heading line ahead of their body."""
+    ready = []
+    builder = DocOutputBuilder(_blocks("doc-a"), ready.append)
+
+    builder.add(0, "A", "Body", title="Heading")
+
+    assert ready[0].sections[0].title == "Heading"
+    assert ready[0].text == "Heading\nBody"
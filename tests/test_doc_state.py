@@ -0,0 +1,76 @@
+from src.doc_state import DocRevision, DocRevisionStore
+
+
+def test_store_round_trips_through_file(tmp_path):
+    """Persists recorded revisions and reloads them from disk."""
+    path = tmp_path / "state" / "doc_revisions.json"
+    store = DocRevisionStore(path)
+    store.set("doc-1", "rev-1", 42)
+    store.save()
+
+    reloaded = DocRevisionStore(path)
+    assert reloaded.get("doc-1") == DocRevision(revision_id="rev-1", end_index=42)
+
+
+def test_store_forget_removes_state(tmp_path):
+    """Forgetting a doc removes it from memory and from the saved file."""
+    path = tmp_path / "doc_revisions.json"
+    store = DocRevisionStore(path)
+    store.set("doc-1", "rev-1", 42)
+    store.forget("doc-1")
+    store.save()
+
+    assert store.get("doc-1") is None
+    assert DocRevisionStore(path).get("doc-1") is None
+
+
+def test_store_ignores_corrupt_file(tmp_path):
+    """Starts empty instead of failing when the state file is corrupt."""
+    path = tmp_path / "doc_revisions.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    assert DocRevisionStore(path).get("doc-1") is None
+
+
+def test_in_memory_store_never_writes(tmp_path):
+    """A store without a path keeps state in memory only."""
+    store = DocRevisionStore()
+    store.set("doc-1", "rev-1", 3)
+    store.save()
+
+    assert store.get("doc-1").end_index == 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_stores_merge_on_save(tmp_path):
+    """Stores sharing a file keep each other's Docs when saving."""
+    path = tmp_path / "doc_revisions.json"
+    first, second = DocRevisionStore(path), DocRevisionStore(path)
+    first.set("doc-1", "rev-1", 10)
+    second.set("doc-2", "rev-2", 20)
+    first.save()
+    second.save()
+
+    reloaded = DocRevisionStore(path)
+    assert reloaded.get("doc-1") == DocRevision("rev-1", 10)
+    assert reloaded.get("doc-2") == DocRevision("rev-2", 20)
+
+
+def test_reentrant_save_returns_instead_of_deadlocking(tmp_path):
+    """A save triggered during a save (e.g. by a signal) is skipped."""
+    path = tmp_path / "doc_revisions.json"
+    store = DocRevisionStore(path)
+    store.set("doc-1", "rev-1", 10)
+    original_read = store._read
+    nested = []
+
+    def read_and_reenter(p):
+        nested.append(store.save())
+        return original_read(p)
+
+    store._read = read_and_reenter
+    path.write_text("{}", encoding="utf-8")
+    store.save()
+
+    assert nested == [None]
+    assert DocRevisionStore(path).get("doc-1") == DocRevision("rev-1", 10)
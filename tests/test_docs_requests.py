@@ -0,0 +1,161 @@
+import pytest
+from src.docs_requests import (
+    DocSection,
+    Format,
+    build_chunked_overwrite_requests,
+    build_overwrite_requests,
+    build_rollback_requests,
+    document_fingerprint,
+    document_text,
+    split_paragraphs,
+    utf16_len,
+)
+from src.utils import content_hash
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("abc", 3),
+    ("é", 1),
+    ("🌸", 2),
+    ("", 0),
+])
+def test_utf16_len(text, expected):
+    """Counts UTF-16 code units, so astral characters count twice."""
+    assert utf16_len(text) == expected
+
+
+def test_build_overwrite_requests_styles_each_title():
+    """Inserts all sections at once and styles titles at local indices."""
+    sections = [DocSection("One", "alpha"), DocSection("🌸 Two", "beta")]
+
+    requests = build_overwrite_requests(sections, end_index=40)
+
+    assert requests[0] == {
+        "deleteContentRange": {"range": {"startIndex": 1, "endIndex": 39}}
+    }
+    assert requests[1]["insertText"]["text"] == "One\nalpha\n🌸 Two\nbeta"
+    ranges = [
+        (r["updateParagraphStyle"]["range"]["startIndex"],
+         r["updateParagraphStyle"]["range"]["endIndex"],
+         r["updateParagraphStyle"]["paragraphStyle"]["namedStyleType"])
+        for r in requests[2:]
+    ]
+    # "One\nalpha\n" is 10 units, so the second title starts at 1 + 10.
+    assert ranges == [
+        (1, 1 + utf16_len(document_text(sections)), "NORMAL_TEXT"),
+        (1, 4, "HEADING_2"),
+        (11, 11 + utf16_len("🌸 Two"), "HEADING_2"),
+    ]
+
+
+@pytest.mark.parametrize("end_index", [1, 2])
+def test_build_overwrite_requests_skips_delete_for_empty_doc(end_index):
+    """Does not emit an empty delete range for an empty document."""
+    requests = build_overwrite_requests([DocSection("", "text")], end_index)
+
+    assert "deleteContentRange" not in requests[0]
+    assert [list(r)[0] for r in requests] == ["insertText", "updateParagraphStyle"]
+
+
+def test_build_overwrite_requests_empty_text_has_no_styles():
+    """Emits no style requests when there is nothing to style."""
+    requests = build_overwrite_requests([DocSection("", "")], end_index=1)
+
+    assert requests == [{"insertText": {"location": {"index": 1}, "text": ""}}]
+
+
+def _apply(body, requests):
+    """Apply insert/delete requests to an ASCII body string (index 1 = body[0])."""
+    for request in requests:
+        if "insertText" in request:
+            at = request["insertText"]["location"]["index"] - 1
+            body = body[:at] + request["insertText"]["text"] + body[at:]
+        elif "deleteContentRange" in request:
+            r = request["deleteContentRange"]["range"]
+            body = body[:r["startIndex"] - 1] + body[r["endIndex"] - 1:]
+    return body
+
+
+def test_split_paragraphs_keeps_paragraphs_whole_within_the_limit():
+    """Chunks break after newlines and rejoin to the original text."""
+    text = "aaaa\nbb\ncccccc\nd"
+
+    chunks = split_paragraphs(text, 8)
+
+    assert chunks == ["aaaa\nbb\n", "cccccc\nd"]
+    assert "".join(chunks) == text
+
+
+def test_split_paragraphs_cuts_long_paragraphs_between_characters():
+    """A paragraph over the limit is cut without splitting a character."""
+    chunks = split_paragraphs("éééé\n", 5)
+
+    assert "".join(chunks) == "éééé\n"
+    assert all(len(c.encode("utf-8")) <= 5 for c in chunks)
+
+
+@pytest.mark.parametrize("old_body", ["\n", "old one\nold two\n"])
+def test_chunked_requests_replace_the_body(old_body):
+    """Applying every chunk in order leaves exactly the new text."""
+    sections = [DocSection("Title", "line one\nline two"), DocSection("", "tail")]
+    batches = build_chunked_overwrite_requests(sections, len(old_body) + 1, 10)
+
+    body = old_body
+    for requests in batches:
+        body = _apply(body, requests)
+
+    assert len(batches) > 2
+    assert body == document_text(sections) + "\n"
+    assert {"updateParagraphStyle"} <= {k for r in batches[-1] for k in r}
+
+
+def test_rollback_restores_the_old_body_after_partial_chunks():
+    """Deleting the chunks applied so far gives back the previous content."""
+    old_body = "old one\nold two\n"
+    batches = build_chunked_overwrite_requests(
+        [DocSection("Title", "a\nb\nc\nd")], len(old_body) + 1, 4
+    )
+
+    body = _apply(_apply(old_body, batches[0]), batches[1])
+    inserted = sum(utf16_len(b[0]["insertText"]["text"]) for b in batches[:2])
+
+    assert _apply(body, build_rollback_requests(inserted)) == old_body
+
+
+def test_build_overwrite_requests_applies_formatting_after_the_title():
+    """Format offsets are relative to the content, below the title line."""
+    sections = [
+        DocSection("🌸", "x"),
+        DocSection("T", "Head\nitem", (Format(0, 4, "heading", "HEADING_3"),
+                                       Format(5, 9, "bullet"),
+                                       Format(5, 7, "link", "https://e.x"))),
+    ]
+
+    requests = build_overwrite_requests(sections, end_index=1)
+
+    # "🌸\nx" is 4 units, then the separator; "T\n" puts the content at 8.
+    assert requests[-3:] == [
+        {"updateParagraphStyle": {
+            "range": {"startIndex": 8, "endIndex": 12},
+            "paragraphStyle": {"namedStyleType": "HEADING_3"},
+            "fields": "namedStyleType",
+        }},
+        {"createParagraphBullets": {
+            "range": {"startIndex": 13, "endIndex": 17},
+            "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE",
+        }},
+        {"updateTextStyle": {
+            "range": {"startIndex": 13, "endIndex": 15},
+            "textStyle": {"link": {"url": "https://e.x"}},
+            "fields": "link",
+        }},
+    ]
+
+
+def test_document_fingerprint_covers_formatting_only_when_present():
+    """Plain sections keep their text hash; formatting changes the fingerprint."""
+    plain = [DocSection("T", "body")]
+    bold = [DocSection("T", "body", (Format(0, 4, "bold"),))]
+
+    assert document_fingerprint(plain) == content_hash(document_text(plain))
+    assert document_fingerprint(bold) != document_fingerprint(plain)
@@ -0,0 +1,151 @@
+import re
+from datetime import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.oauth2.service_account import Credentials
+from googleapiclient.errors import HttpError
+from src.google_calendar import EventSpec, doc_url, event_id, sync_events
+
+
+@pytest.fixture
+def fake_credentials():
+    return MagicMock(spec=Credentials)
+
+
+def _spec(block_name="Study", doc_id="doc-1", summary="Graphs"):
+    return EventSpec(
+        block_name=block_name,
+        day="2025-08-09",
+        summary=summary,
+        description="",
+        doc_id=doc_id,
+        start=time(9, 0),
+        duration_minutes=30,
+    )
+
+
+class _FakeBatch:
+    def __init__(self, callback, log):
+        self.callback = callback
+        self.calls = []
+        self.log = log
+
+    def add(self, request, request_id=None):
+        self.calls.append((request_id, request))
+
+    def execute(self):
+        self.log.append([request_id for request_id, _ in self.calls])
+        for request_id, request in self.calls:
+            try:
+                self.callback(request_id, request(), None)
+            except HttpError as error:
+                self.callback(request_id, None, error)
+
+
+def _calendar_service(existing, insert_errors=None):
+    """A Calendar service listing `existing` whose writes run through `_FakeBatch`."""
+    rounds, writes = [], []
+    service = MagicMock()
+    service.new_batch_http_request.side_effect = lambda callback: _FakeBatch(callback, rounds)
+    events = service.events.return_value
+    events.list.return_value.execute.return_value = {"items": existing}
+
+    def insert(calendarId, body, supportsAttachments):
+        def call():
+            writes.append(("insert", body["id"]))
+            error = (insert_errors or {}).get(body["id"])
+            if error is not None:
+                raise error
+            return body
+        return call
+
+    def patch_event(calendarId, eventId, body, supportsAttachments):
+        def call():
+            writes.append(("patch", eventId))
+            return body
+        return call
+
+    events.insert.side_effect = insert
+    events.patch.side_effect = patch_event
+    return service, rounds, writes
+
+
+def test_event_id_is_deterministic_base32hex():
+    """IDs depend only on block and day and use Calendar's allowed alphabet."""
+    first = event_id("Study", "2025-08-09")
+
+    assert first == event_id("Study", "2025-08-09")
+    assert first != event_id("Study", "2025-08-10")
+    assert first != event_id("Review", "2025-08-09")
+    assert re.fullmatch(r"[a-v0-9]{5,1024}", first)
+
+
+def test_sync_events_inserts_patches_and_skips_in_one_batch(fake_credentials):
+    """Missing events are inserted, changed ones patched, matching ones left alone."""
+    unchanged, changed, missing = _spec("A", summary="Same"), _spec("B"), _spec("C")
+    existing = [
+        {**unchanged.body("UTC"), "start": {"dateTime": "2025-08-09T09:00:00Z"},
+         "end": {"dateTime": "2025-08-09T09:30:00Z"}},
+        {**changed.body("UTC"), "summary": "Old title"},
+    ]
+    service, rounds, writes = _calendar_service(existing)
+
+    with patch("src.transport.build_service", return_value=service):
+        results = sync_events([unchanged, changed, missing], "cal", "UTC", fake_credentials)
+
+    assert results == {unchanged.event_id: None, changed.event_id: None, missing.event_id: None}
+    assert sorted(writes) == [("insert", missing.event_id), ("patch", changed.event_id)]
+    service.events.return_value.list.assert_called_once()
+    assert len(rounds) == 2
+
+
+def test_sync_events_compares_start_and_end_as_instants(fake_credentials):
+    """Times are listed in the sync's zone; only a different instant is a change."""
+    same_offset, in_utc, moved = _spec("A"), _spec("B"), _spec("C")
+    existing = [
+        {**same_offset.body("America/New_York"),
+         "start": {"dateTime": "2025-08-09T09:00:00-04:00"},
+         "end": {"dateTime": "2025-08-09T09:30:00-04:00"}},
+        {**in_utc.body("America/New_York"),
+         "start": {"dateTime": "2025-08-09T13:00:00Z"},
+         "end": {"dateTime": "2025-08-09T13:30:00Z"}},
+        {**moved.body("America/New_York"),
+         "start": {"dateTime": "2025-08-09T09:00:00Z"},
+         "end": {"dateTime": "2025-08-09T09:30:00Z"}},
+    ]
+    service, _, writes = _calendar_service(existing)
+
+    with patch("src.transport.build_service", return_value=service):
+        sync_events([same_offset, in_utc, moved], "cal", "America/New_York", fake_credentials)
+
+    assert writes == [("patch", moved.event_id)]
+    list_call = service.events.return_value.list.call_args
+    assert list_call.kwargs["timeZone"] == "America/New_York"
+
+
+def test_sync_events_patches_on_insert_conflict(fake_credentials):
+    """An insert rejected with 409 (event outside the listed day) becomes a patch."""
+    spec = _spec()
+    conflict = HttpError(resp=MagicMock(status=409), content=b"duplicate")
+    service, _, writes = _calendar_service([], insert_errors={spec.event_id: conflict})
+
+    with patch("src.transport.build_service", return_value=service):
+        results = sync_events([spec], "cal", "UTC", fake_credentials)
+
+    assert results == {spec.event_id: None}
+    assert writes == [("insert", spec.event_id), ("patch", spec.event_id)]
+
+
+def test_sync_events_restores_cancelled_event(fake_credentials):
+    """A deleted event with the same ID is patched back to confirmed."""
+    spec = _spec()
+    service, _, writes = _calendar_service([{**spec.body("UTC"), "status": "cancelled"}])
+
+    with patch("src.transport.build_service", return_value=service):
+        sync_events([spec], "cal", "UTC", fake_credentials)
+
+    assert writes == [("patch", spec.event_id)]
+    body = service.events.return_value.patch.call_args.kwargs["body"]
+    assert body["status"] == "confirmed"
+    assert body["attachments"][0]["fileUrl"] == doc_url("doc-1")
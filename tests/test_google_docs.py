@@ -1,9 +1,18 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 from google.oauth2.service_account import Credentials
 from googleapiclient.errors import HttpError
-from src.google_docs import build_docs_service, overwrite_doc_contents
+from src.doc_state import DocRevision, DocRevisionStore
+from src.docs_requests import DocSection
+from src.google_docs import (
+    build_docs_service,
+    overwrite_doc_contents,
+    overwrite_doc_sections,
+    overwrite_docs_batch,
+)
+from src.utils import content_hash
 
 
 @pytest.fixture
@@ -41,7 +50,7 @@ def test_overwrite_doc_contents_sends_expected_requests(
     mock_docs_service = MagicMock()
     mock_docs_service.documents.return_value = mock_documents
 
-    with patch("src.google_docs.build_docs_service", return_value=mock_docs_service):
+    with patch("src.transport.build_service", return_value=mock_docs_service):
         overwrite_doc_contents("test-doc-id", new_content, fake_credentials)
 
     mock_documents.get.assert_called_once_with(documentId="test-doc-id")
@@ -55,7 +64,7 @@ def test_overwrite_doc_contents_handles_http_error(fake_credentials):
     mock_docs_service.documents().get.side_effect = HttpError(
         resp=MagicMock(), content=b"Error")
 
-    with patch("src.google_docs.build_docs_service", return_value=mock_docs_service):
+    with patch("src.transport.build_service", return_value=mock_docs_service):
         with pytest.raises(HttpError):
             overwrite_doc_contents("test-doc-id", "Content", fake_credentials)
 
@@ -75,3 +84,284 @@ def test_build_docs_service_failure(fake_credentials):
         side_effect=HttpError(resp=MagicMock(), content=b"Boom")):
         with pytest.raises(HttpError):
             build_docs_service(fake_credentials)
+
+
+def test_overwrite_doc_sections_uses_one_get_and_one_batch_update(fake_credentials):
+    """Writes every section with a single get and a single batchUpdate."""
+    mock_documents = MagicMock()
+    mock_documents.get.return_value.execute.return_value = {
+        "body": {"content": [{"endIndex": 10}]}
+    }
+    mock_docs_service = MagicMock()
+    mock_docs_service.documents.return_value = mock_documents
+    sections = [DocSection("A", "one"), DocSection("B", "two"), DocSection("C", "3")]
+
+    with patch("src.transport.build_service", return_value=mock_docs_service):
+        overwrite_doc_sections("doc-id", sections, fake_credentials)
+
+    mock_documents.get.assert_called_once_with(documentId="doc-id")
+    mock_documents.batchUpdate.assert_called_once()
+    requests = mock_documents.batchUpdate.call_args.kwargs["body"]["requests"]
+    headings = [r for r in requests if "updateParagraphStyle" in r
+                and r["updateParagraphStyle"]["paragraphStyle"]["namedStyleType"]
+                == "HEADING_2"]
+    assert len(headings) == 3
+
+
+def _docs_service_with(get_result=None, batch_results=None):
+    mock_documents = MagicMock()
+    mock_documents.get.return_value.execute.return_value = get_result or {
+        "revisionId": "rev-fetched",
+        "body": {"content": [{"endIndex": 10}]},
+    }
+    mock_documents.batchUpdate.return_value.execute.side_effect = batch_results or [
+        {"writeControl": {"requiredRevisionId": "rev-new"}}
+    ]
+    mock_docs_service = MagicMock()
+    mock_docs_service.documents.return_value = mock_documents
+    return mock_docs_service, mock_documents
+
+
+def test_overwrite_doc_sections_skips_get_with_known_revision(fake_credentials):
+    """Uses stored revision state instead of fetching the document."""
+    service, documents = _docs_service_with()
+    revisions = DocRevisionStore()
+    revisions.set("doc-id", "rev-old", 20)
+
+    with patch("src.transport.build_service", return_value=service):
+        overwrite_doc_sections(
+            "doc-id", [DocSection("", "abc")], fake_credentials, revisions=revisions
+        )
+
+    documents.get.assert_not_called()
+    body = documents.batchUpdate.call_args.kwargs["body"]
+    assert body["writeControl"] == {"requiredRevisionId": "rev-old"}
+    assert body["requests"][0]["deleteContentRange"]["range"]["endIndex"] == 19
+    assert revisions.get("doc-id") == DocRevision("rev-new", 5, content_hash("abc"))
+
+
+def _stale_error():
+    return HttpError(
+        resp=MagicMock(status=400),
+        content=b'{"error": {"code": 400, "message": "The required revision ID '
+                b'\'rev-old\' does not match the latest revision.", '
+                b'"status": "INVALID_ARGUMENT"}}',
+    )
+
+
+def test_overwrite_doc_sections_refetches_on_stale_revision(fake_credentials):
+    """Falls back to a fetch when the API rejects the stored revision."""
+    service, documents = _docs_service_with(batch_results=[
+        _stale_error(),
+        {"writeControl": {"requiredRevisionId": "rev-new"}},
+    ])
+    revisions = DocRevisionStore()
+    revisions.set("doc-id", "rev-old", 20)
+
+    with patch("src.transport.build_service", return_value=service):
+        overwrite_doc_sections(
+            "doc-id", [DocSection("", "abc")], fake_credentials, revisions=revisions
+        )
+
+    documents.get.assert_called_once_with(documentId="doc-id")
+    retry_body = documents.batchUpdate.call_args.kwargs["body"]
+    assert retry_body["writeControl"] == {"requiredRevisionId": "rev-fetched"}
+    assert revisions.get("doc-id") == DocRevision("rev-new", 5, content_hash("abc"))
+
+
+@pytest.mark.parametrize("status, content", [
+    (403, b"Forbidden"),
+    (400, b'{"error": {"code": 400, "message": "Invalid requests[0].deleteContentRange: '
+          b'Index 19 must be less than the end index of the referenced segment, 12.", '
+          b'"status": "INVALID_ARGUMENT"}}'),
+])
+def test_overwrite_doc_sections_raises_non_revision_errors(fake_credentials, status, content):
+    """Does not mask errors other than a rejected revision, even other 400s."""
+    error = HttpError(resp=MagicMock(status=status), content=content)
+    service, documents = _docs_service_with(batch_results=[error])
+    revisions = DocRevisionStore()
+    revisions.set("doc-id", "rev-old", 20)
+
+    with patch("src.transport.build_service", return_value=service):
+        with pytest.raises(HttpError):
+            overwrite_doc_sections(
+                "doc-id", [DocSection("", "abc")], fake_credentials,
+                revisions=revisions,
+            )
+
+    documents.get.assert_not_called()
+
+
+class _FakeBatch:
+    def __init__(self, callback, log):
+        self.callback = callback
+        self.calls = []
+        self.log = log
+
+    def add(self, request, request_id=None):
+        self.calls.append((request_id, request))
+
+    def execute(self):
+        self.log.append([request_id for request_id, _ in self.calls])
+        for request_id, request in self.calls:
+            try:
+                self.callback(request_id, request(), None)
+            except HttpError as error:
+                self.callback(request_id, None, error)
+
+
+def _batching_service(get_results, update_results):
+    """A Docs service whose calls run through `_FakeBatch` round trips.
+
+    `get_results`/`update_results` map doc IDs to a response or a list of
+    responses/exceptions consumed in order.
+    """
+    rounds = []
+    service = MagicMock()
+    service.new_batch_http_request.side_effect = lambda callback: _FakeBatch(callback, rounds)
+
+    def respond(results, doc_id):
+        outcomes = results[doc_id]
+        outcome = outcomes.pop(0) if isinstance(outcomes, list) else outcomes
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    documents = service.documents.return_value
+    documents.get.side_effect = lambda documentId: lambda: respond(get_results, documentId)
+    documents.batchUpdate.side_effect = (
+        lambda documentId, body: lambda: respond(update_results, documentId)
+    )
+    return service, rounds
+
+
+def test_overwrite_docs_batch_groups_gets_and_updates(fake_credentials):
+    """Gets for unknown Docs and all updates each take one round trip."""
+    fetched = {"revisionId": "rev-fetched", "body": {"content": [{"endIndex": 10}]}}
+    written = {"writeControl": {"requiredRevisionId": "rev-new"}}
+    service, rounds = _batching_service(
+        {"doc-a": fetched, "doc-b": fetched}, {"doc-a": written, "doc-b": written}
+    )
+    revisions = DocRevisionStore()
+
+    with patch("src.transport.build_service", return_value=service):
+        errors = overwrite_docs_batch(
+            [("doc-a", [DocSection("", "a")]), ("doc-b", [DocSection("", "b")])],
+            fake_credentials,
+            revisions=revisions,
+        )
+
+    assert errors == {"doc-a": None, "doc-b": None}
+    assert rounds == [["doc-a", "doc-b"], ["doc-a", "doc-b"]]
+    assert revisions.get("doc-b").revision_id == "rev-new"
+
+
+def test_overwrite_docs_batch_maps_errors_per_doc(fake_credentials):
+    """A failing Doc is reported without affecting the others; stale ones retry."""
+    fetched = {"revisionId": "rev-fetched", "body": {"content": [{"endIndex": 10}]}}
+    written = {"writeControl": {"requiredRevisionId": "rev-new"}}
+    boom = HttpError(resp=MagicMock(status=500), content=b"boom")
+    service, rounds = _batching_service(
+        {"doc-stale": fetched, "doc-bad": fetched},
+        {"doc-ok": written, "doc-stale": [_stale_error(), written], "doc-bad": boom},
+    )
+    revisions = DocRevisionStore()
+    revisions.set("doc-ok", "rev-1", 5)
+    revisions.set("doc-stale", "rev-old", 5)
+
+    with patch("src.transport.build_service", return_value=service):
+        errors = overwrite_docs_batch(
+            [(d, [DocSection("", "x")]) for d in ("doc-ok", "doc-stale", "doc-bad")],
+            fake_credentials,
+            revisions=revisions,
+        )
+
+    assert errors["doc-ok"] is None
+    assert errors["doc-stale"] is None
+    assert errors["doc-bad"] is boom
+    assert rounds == [
+        ["doc-bad"],
+        ["doc-ok", "doc-stale", "doc-bad"],
+        ["doc-stale"],
+        ["doc-stale"],
+    ]
+
+
+def test_overwrite_docs_batch_reports_transport_errors_per_chunk(fake_credentials):
+    """A round trip that fails to send fails only its own Docs."""
+    written = {"writeControl": {"requiredRevisionId": "rev-new"}}
+    service, rounds = _batching_service({}, {"doc-a": written, "doc-b": written})
+    make_batch = service.new_batch_http_request.side_effect
+
+    def flaky_batch(callback):
+        batch = make_batch(callback)
+        if len(rounds) == 1:  # the second round trip
+            batch.execute = MagicMock(side_effect=requests.ConnectionError("reset"))
+        return batch
+
+    service.new_batch_http_request.side_effect = flaky_batch
+    revisions = DocRevisionStore()
+    revisions.set("doc-a", "rev-1", 5)
+    revisions.set("doc-b", "rev-1", 5)
+
+    with patch("src.transport.build_service", return_value=service), \
+         patch("src.google_docs.BATCH_LIMIT", 1):
+        errors = overwrite_docs_batch(
+            [(d, [DocSection("", "x")]) for d in ("doc-a", "doc-b")],
+            fake_credentials,
+            revisions=revisions,
+        )
+
+    assert errors["doc-a"] is None
+    assert isinstance(errors["doc-b"], requests.ConnectionError)
+    assert revisions.get("doc-a").revision_id == "rev-new"
+
+
+def test_overwrite_docs_batch_reports_large_doc_timeouts(fake_credentials):
+    """A chunked Doc that times out is reported, not raised."""
+    timeout = requests.Timeout("slow")
+    with patch("src.google_docs.MAX_CHUNK_BYTES", 1), \
+         patch("src.transport.build_service"), \
+         patch("src.google_docs.overwrite_doc_sections", side_effect=timeout):
+        errors = overwrite_docs_batch([("doc-big", [DocSection("", "xx")])], fake_credentials)
+
+    assert errors == {"doc-big": timeout}
+
+
+def test_large_doc_is_written_in_chunks_and_rolled_back_on_failure(fake_credentials):
+    """A failed chunk deletes the chunks already inserted, then raises."""
+    service = MagicMock()
+    documents = service.documents.return_value
+    documents.get.return_value.execute.return_value = {
+        "revisionId": "rev-0", "body": {"content": [{"endIndex": 20}]}
+    }
+    bodies = []
+
+    def batch_update(documentId, body):
+        bodies.append(body)
+        call = MagicMock()
+        if len(bodies) == 3:
+            call.execute.side_effect = HttpError(resp=MagicMock(status=500), content=b"")
+        else:
+            call.execute.return_value = {
+                "writeControl": {"requiredRevisionId": f"rev-{len(bodies)}"}
+            }
+        return call
+
+    documents.batchUpdate.side_effect = batch_update
+    sections = [DocSection(title="", content="para\n" * 10)]
+
+    with patch("src.transport.build_service", return_value=service), \
+         patch("src.google_docs.MAX_CHUNK_BYTES", 12):
+        with pytest.raises(HttpError):
+            overwrite_doc_sections("doc-big", sections, fake_credentials)
+
+    assert [b["writeControl"] for b in bodies[:3]] == [
+        {"requiredRevisionId": "rev-0"},
+        {"requiredRevisionId": "rev-1"},
+        {"requiredRevisionId": "rev-2"},
+    ]
+    assert bodies[3] == {
+        "requests": [{"deleteContentRange": {"range": {"startIndex": 1, "endIndex": 21}}}],
+        "writeControl": {"targetRevisionId": "rev-2"},
+    }
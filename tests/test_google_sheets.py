@@ -47,7 +47,7 @@ def test_get_sheet_rows_returns_expected_data(
     monkeypatch, fake_credentials, sheet_name, data):
     """Returns expected records for various sheet names and row data."""
     monkeypatch.setattr("src.google_sheets.gspread.authorize",
-                        lambda creds: MockClient(sheet_name, data))
+                        lambda creds, **kwargs: MockClient(sheet_name, data))
     rows = get_sheet_rows(sheet_name, "spreadsheet-id", fake_credentials)
     assert rows == data
 
@@ -55,7 +55,7 @@ def test_get_sheet_rows_returns_expected_data(
 def test_get_sheet_rows_raises_on_invalid_worksheet(monkeypatch, fake_credentials):
     """Raises ValueError if the worksheet name is incorrect."""
     monkeypatch.setattr("src.google_sheets.gspread.authorize",
-                        lambda creds: MockClient("ExpectedSheet", []))
+                        lambda creds, **kwargs: MockClient("ExpectedSheet", []))
     with pytest.raises(ValueError):
         get_sheet_rows("WrongSheet", "spreadsheet-id", fake_credentials)
 
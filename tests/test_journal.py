@@ -0,0 +1,39 @@
+from src.journal import RunJournal
+
+
+def test_journal_persists_and_reports_completed(tmp_path):
+    """Completed writes are visible to a journal reopened for the same day."""
+    path = tmp_path / "journal" / "2025-08-09.jsonl"
+    journal = RunJournal(path, run_id="run-1")
+    journal.record_planned("doc-a", "hash-a")
+    journal.record_completed("doc-a", "hash-a")
+    journal.record_planned("doc-b", "hash-b")
+    journal.close()
+
+    reopened = RunJournal(path, run_id="run-2")
+    assert reopened.completed() == {"doc-a": "hash-a"}
+    assert reopened.outstanding() == ["doc-b"]
+    reopened.close()
+
+
+def test_journal_skips_torn_final_line(tmp_path):
+    """A partially written last record does not break a resumed run."""
+    path = tmp_path / "2025-08-09.jsonl"
+    journal = RunJournal(path, run_id="run-1")
+    journal.record_completed("doc-a", "hash-a")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"event": "compl')
+
+    assert RunJournal(path, run_id="run-2").completed() == {"doc-a": "hash-a"}
+
+
+def test_in_memory_journal(tmp_path):
+    """A journal without a path records events in memory only."""
+    journal = RunJournal(None, run_id="run-1")
+    journal.record_completed("doc-a", "hash-a")
+    journal.flush()
+    journal.close()
+
+    assert journal.completed() == {"doc-a": "hash-a"}
+    assert list(tmp_path.iterdir()) == []
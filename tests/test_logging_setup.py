@@ -0,0 +1,53 @@
+import json
+import logging
+
+import pytest
+import structlog
+from src.observability import logging_setup
+from src.observability.logging_setup import (
+    _debug_sampler,
+    configure_logging,
+    get_logger,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    shutdown_logging()
+    if logging_setup._handler is not None:
+        logging.getLogger().removeHandler(logging_setup._handler)
+        logging_setup._handler = None
+    structlog.reset_defaults()
+
+
+def test_debug_sampler_keeps_one_in_n_per_event():
+    """Keeps every Nth debug event per name and never drops other levels."""
+    sampler = _debug_sampler(3)
+    kept = 0
+    for _ in range(9):
+        try:
+            sampler(None, "debug", {"event": "row_scanned"})
+            kept += 1
+        except structlog.DropEvent:
+            pass
+
+    assert kept == 3
+    assert sampler(None, "info", {"event": "row_scanned"}) == {"event": "row_scanned"}
+
+
+@pytest.mark.parametrize("async_logging", [True, False])
+def test_configure_logging_emits_json(capsys, restore_logging, async_logging):
+    """Emits one JSON object per event in both queued and synchronous modes."""
+    log = configure_logging(service_name="svc", async_logging=async_logging)
+    log.info("first_event", answer=42)
+    get_logger("other").warning("second_event")
+    shutdown_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(line["event"], line["level"]) for line in lines] == [
+        ("first_event", "info"),
+        ("second_event", "warning"),
+    ]
+    assert lines[0]["service"] == "svc" and lines[0]["answer"] == 42
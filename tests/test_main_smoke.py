@@ -1,9 +1,10 @@
 from pathlib import Path
 from unittest.mock import patch
 
-import pytest  # noqa: F401
+import pytest
 from src.config_schema import Config, DocBlockConfig, GoogleSheetsConfig
 from src.daily_task_bot import DailyTaskBot
+from src.utils import get_today_str
 
 
 def test_main_smoke_with_daily_task_bot():
@@ -31,7 +32,7 @@ def test_main_smoke_with_daily_task_bot():
     PATCH_ROWS = "src.daily_task_bot.get_sheet_rows"
     PATCH_FIND = "src.daily_task_bot.find_today_task"
     PATCH_RENDER = "src.daily_task_bot.render_template"
-    PATCH_WRITE = "src.daily_task_bot.overwrite_doc_contents"
+    PATCH_WRITE = "src.daily_task_bot.overwrite_doc_sections"
 
     with (
         patch(PATCH_CREDS, return_value="creds") as mock_creds,
@@ -53,10 +54,44 @@ def test_main_smoke_with_daily_task_bot():
             credentials="creds",
         )
         mock_find.assert_called_once_with(
-            [{"Date": "2025-08-01", "Task": "X"}], date_column="Date")
+            [{"Date": "2025-08-01", "Task": "X"}], date_column="Date",
+            day=get_today_str(time_zone="UTC"))
         # render_template receives a Path and the preprocessed dict(spaces->underscores)
         mock_render.assert_called_once()
         args, kwargs = mock_render.call_args
         assert isinstance(args[0], Path)
         assert "Date" in args[1] and "Task" in args[1]
-        mock_write.assert_called_once_with("doc-smoke", "Rendered Smoke", "creds")
+        mock_write.assert_called_once()
+        doc_id, sections, creds = mock_write.call_args.args
+        assert (doc_id, creds) == ("doc-smoke", "creds")
+        assert [(s.title, s.content) for s in sections] == [
+            ("Smoke 2025-08-01", "Rendered Smoke")
+        ]
+
+
+@pytest.mark.parametrize("argv", [
+    ["--resume", "--plan"],
+    ["--resume", "--drain-only"],
+    ["--shards", "2", "--plan"],
+    ["--shards", "2", "--enqueue-only"],
+    ["--shards", "2", "--writers", "3"],
+    ["--enqueue-only", "--writers", "2"],
+    ["--watch", "--plan"],
+    ["--watch", "--shards", "2"],
+    ["--watch", "--watch-interval", "0"],
+    ["--prefetch-tabs", "--drain-only"],
+    ["--sync-schedule", "--plan"],
+    ["--sync-schedule", "--from-schedule"],
+    ["--from-schedule", "--watch"],
+    ["--from-schedule", "--drain-only"],
+    ["--prerender", "--shards", "2"],
+    ["--prerender", "--enqueue-only"],
+    ["--deadline", "0"],
+    ["--deadline", "30", "--plan"],
+])
+def test_parse_args_rejects_ignored_flag_combinations(argv):
+    """Flags that would be silently ignored are reported as usage errors."""
+    from src.__main__ import _parse_args
+
+    with pytest.raises(SystemExit):
+        _parse_args(argv)
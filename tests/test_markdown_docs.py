@@ -0,0 +1,60 @@
+from src.docs_requests import Format
+from src.markdown_docs import _compile_line, compile_markdown
+
+
+def test_headings_become_paragraph_formats():
+    """The hashes are stripped and the level picks the named style."""
+    text, formats = compile_markdown("# Plan\nbody\n### Detail ###")
+
+    assert text == "Plan\nbody\nDetail"
+    assert formats == (
+        Format(0, 4, "heading", "HEADING_1"),
+        Format(10, 16, "heading", "HEADING_3"),
+    )
+
+
+def test_consecutive_list_items_share_one_range():
+    """A run of items is one range; a different list kind starts a new one."""
+    text, formats = compile_markdown("- a\n* bb\n1. c\n2) d\n\n+ e")
+
+    assert text == "a\nbb\nc\nd\n\ne"
+    assert formats == (
+        Format(0, 4, "bullet"),
+        Format(5, 8, "numbered"),
+        Format(10, 11, "bullet"),
+    )
+
+
+def test_inline_markup_offsets_count_utf16_units():
+    """Offsets follow the stripped text, with astral characters counting twice."""
+    text, formats = compile_markdown("🌸 **bold** and *it* [link](https://e.x)")
+
+    assert text == "🌸 bold and it link"
+    assert formats == (
+        Format(3, 7, "bold"),
+        Format(12, 14, "italic"),
+        Format(15, 19, "link", "https://e.x"),
+    )
+
+
+def test_nested_markup_and_escapes():
+    """Markup nests inside bold, and escaped characters are kept literally."""
+    text, formats = compile_markdown(r"**see [docs](u)** \*not italic\*")
+
+    assert text == "see docs *not italic*"
+    assert formats == (Format(0, 8, "bold"), Format(4, 8, "link", "u"))
+
+
+def test_plain_text_has_no_formatting():
+    """Lone asterisks and hashes without a space are not markup."""
+    assert compile_markdown("2 * 3 = 6\n#tag") == ("2 * 3 = 6\n#tag", ())
+
+
+def test_lines_are_compiled_once():
+    """Repeated lines are served from the per-line cache."""
+    _compile_line.cache_clear()
+
+    compile_markdown("- same\n- same\nother")
+
+    info = _compile_line.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
@@ -0,0 +1,29 @@
+from src.doc_output import BlockSection, DocOutput
+from src.docs_requests import Format
+from src.prerender import Prerender, PrerenderedDoc, PrerenderStore, source_hash
+
+
+def test_store_round_trips_docs_and_prunes_past_days(tmp_path):
+    """Saved pre-renders load back intact; older days are pruned."""
+    store = PrerenderStore(tmp_path)
+    output = DocOutput("doc-1", [BlockSection("B", "T", "Body", (Format(0, 4, "bold"),))])
+    doc = PrerenderedDoc(output, [source_hash({"Topic": "x"}), None],
+                         [{"index": 0, "title": "T", "task": {"Topic": "x"}}])
+    store.save(Prerender("2025-08-10", "5", "cfg", {"doc-1": doc}))
+    store.save(Prerender("2025-08-08", None, "cfg"))
+
+    store.prune(before="2025-08-09")
+    loaded = store.load("2025-08-10")
+
+    assert store.load("2025-08-08") is None
+    assert (loaded.version, loaded.config) == ("5", "cfg")
+    assert loaded.docs["doc-1"].output.content_hash == output.content_hash
+    assert loaded.docs["doc-1"].sources == doc.sources
+    assert loaded.docs["doc-1"].rendered == doc.rendered
+
+
+def test_unreadable_file_is_ignored(tmp_path):
+    """A corrupt pre-render is treated as missing, so the run renders normally."""
+    (tmp_path / "2025-08-10.json").write_text("{not json", encoding="utf-8")
+
+    assert PrerenderStore(tmp_path).load("2025-08-10") is None
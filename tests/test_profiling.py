@@ -0,0 +1,91 @@
+import os
+import pstats
+import signal
+import time
+
+import pytest
+from src.observability import profiling
+from src.observability.profiling import (
+    checkpoint,
+    configure_profiling,
+    install_signal_handler,
+    parse_modes,
+    profile_run,
+    request_profile,
+)
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    configure_profiling(modes="", directory=tmp_path)
+    yield tmp_path
+    configure_profiling(modes="")
+
+
+def _busy(seconds=0.05):
+    end = time.perf_counter() + seconds
+    data = []
+    while time.perf_counter() < end:
+        data.append(bytearray(64))
+    return data
+
+
+def test_parse_modes():
+    """Modes are comma-separated; "all" means every mode; unknown ones fail."""
+    assert parse_modes(None) == frozenset()
+    assert parse_modes("") == frozenset()
+    assert parse_modes("cpu, wall") == {"cpu", "wall"}
+    assert parse_modes("all") == profiling.MODES
+    with pytest.raises(ValueError):
+        parse_modes("cpu,gpu")
+
+
+def test_unarmed_run_writes_nothing(profile_dir):
+    """Without a request, runs are not profiled."""
+    with profile_run("run"):
+        _busy(0.01)
+
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_armed_run_writes_each_view_once(profile_dir):
+    """One armed run writes pstats, allocation sites and folded stacks."""
+    request_profile()
+
+    with profile_run("run"):
+        _busy()
+    with profile_run("run"):
+        _busy(0.01)
+
+    files = sorted(p.name for p in profile_dir.iterdir())
+    assert [name.rsplit(".", 1)[-1] for name in files] == ["txt", "folded", "pstats"]
+    pstats_file = next(profile_dir.glob("*.pstats"))
+    assert any(f[2] == "_busy" for f in pstats.Stats(str(pstats_file)).stats)
+    assert "KiB" in next(profile_dir.glob("*.alloc.txt")).read_text(encoding="utf-8")
+    assert "_busy" in next(profile_dir.glob("*.folded")).read_text(encoding="utf-8")
+
+
+def test_request_during_run_starts_at_next_checkpoint(profile_dir):
+    """A request mid-run is picked up by `checkpoint()` and covers the nested run."""
+    with profile_run("run"):
+        request_profile(["cpu"])
+        with profile_run("inner"):
+            checkpoint()
+            _busy(0.01)
+
+    assert [p.name.split("-")[-1] for p in profile_dir.iterdir()] == ["run.pstats"]
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="needs SIGUSR1")
+def test_sigusr1_arms_next_run(profile_dir):
+    """SIGUSR1 arms a capture of the next run."""
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        assert install_signal_handler()
+        os.kill(os.getpid(), signal.SIGUSR1)
+        with profile_run("run"):
+            _busy(0.01)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+
+    assert len(list(profile_dir.glob("*.pstats"))) == 1
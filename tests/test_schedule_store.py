@@ -0,0 +1,51 @@
+import pytest
+from src.schedule_store import ScheduleStore
+
+
+def test_sync_writes_only_changed_rows(tmp_path):
+    """A resync rewrites changed rows, adds new ones and drops removed ones."""
+    store = ScheduleStore(tmp_path / "schedule.sqlite")
+    rows = [{"Date": "d1", "Topic": "a"}, {"Date": "d2", "Topic": "b"},
+            {"Date": "d3", "Topic": "c"}]
+    assert store.sync("Tab", rows) == {
+        "inserted": 3, "updated": 0, "deleted": 0, "unchanged": 0
+    }
+
+    counts = store.sync("Tab", [rows[0], {"Date": "d2", "Topic": "B"}])
+
+    assert counts == {"inserted": 0, "updated": 1, "deleted": 1, "unchanged": 1}
+    assert store.due("d2", ["Tab"]) == {"Tab": {"Date": "d2", "Topic": "B"}}
+    assert store.due("d3", ["Tab"]) == {}
+
+
+def test_due_returns_the_first_row_per_tab(tmp_path):
+    """Like find_today_task, the earliest row for the day wins in each tab."""
+    store = ScheduleStore(tmp_path / "schedule.sqlite")
+    store.sync("A", [{"Date": "d", "n": 1}, {"Date": "d", "n": 2}])
+    store.sync("B", [{"Date": "x", "n": 3}, {"Date": "d", "n": 4}])
+    store.sync("C", [{"Date": "d", "n": 5}])
+
+    assert store.due("d", ["A", "B", "A"]) == {
+        "A": {"Date": "d", "n": 1},
+        "B": {"Date": "d", "n": 4},
+    }
+    assert set(store.synced_tabs()) == {"A", "B", "C"}
+
+
+def test_sync_rejects_rows_without_the_date_column(tmp_path):
+    """A malformed tab leaves the stored copy untouched."""
+    store = ScheduleStore(tmp_path / "schedule.sqlite")
+    store.sync("Tab", [{"Day": "d1"}], date_column="Day")
+
+    with pytest.raises(KeyError):
+        store.sync("Tab", [{"Other": "d1"}], date_column="Day")
+
+    assert store.due("d1", ["Tab"]) == {"Tab": {"Day": "d1"}}
+
+
+def test_meta_round_trips(tmp_path):
+    """Metadata survives reopening the store."""
+    ScheduleStore(tmp_path / "s.sqlite").set_meta("version", "12")
+
+    assert ScheduleStore(tmp_path / "s.sqlite").get_meta("version") == "12"
+    assert ScheduleStore(tmp_path / "s.sqlite").get_meta("missing") is None
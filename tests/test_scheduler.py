@@ -84,3 +84,11 @@ def test_logging_on_missing_column():
         with pytest.raises(KeyError):
             find_today_task(rows)
         mock_exception.assert_called_once()
+
+
+def test_find_today_task_matches_an_explicit_day(monkeypatch):
+    """An explicit day is matched instead of today's date."""
+    monkeypatch.setattr("src.scheduler.get_today_str", lambda: "2025-08-01")
+    rows = [{"Date": "2025-08-01", "n": 1}, {"Date": "2025-08-02", "n": 2}]
+
+    assert find_today_task(rows, day="2025-08-02") == rows[1]
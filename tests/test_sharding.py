@@ -0,0 +1,67 @@
+import pytest
+from src.sharding import (
+    DocLeaseStore,
+    HashRing,
+    merge_results,
+    parse_shard,
+)
+
+
+def test_ring_is_stable_and_spreads_keys():
+    """Maps keys deterministically and uses every shard."""
+    keys = [f"doc-{i}" for i in range(200)]
+    first = [HashRing(4).shard_for(k) for k in keys]
+    second = [HashRing(4).shard_for(k) for k in keys]
+
+    assert first == second
+    assert set(first) == {0, 1, 2, 3}
+
+
+def test_growing_ring_moves_only_some_keys():
+    """Adding a shard reassigns a minority of keys."""
+    keys = [f"doc-{i}" for i in range(500)]
+    before, after = HashRing(4), HashRing(5)
+    moved = sum(before.shard_for(k) != after.shard_for(k) for k in keys)
+
+    assert 0 < moved < len(keys) / 2
+
+
+@pytest.mark.parametrize("spec", ["1", "a/2", "2/2", "0/0", "-1/3"])
+def test_parse_shard_rejects_bad_specs(spec):
+    """Rejects malformed and out-of-range shard specs."""
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def test_parse_shard():
+    """Parses an i/N spec."""
+    assert parse_shard("1/4") == (1, 4)
+
+
+def test_lease_excludes_other_owners_until_released(tmp_path):
+    """Only one owner holds a Doc lease at a time."""
+    leases = DocLeaseStore(tmp_path / "leases.sqlite")
+
+    assert leases.acquire("doc-1", "a")
+    assert leases.acquire("doc-1", "a")
+    assert not leases.acquire("doc-1", "b")
+    leases.release("doc-1", "a")
+    assert leases.acquire("doc-1", "b")
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    """A lease past its TTL no longer blocks other owners."""
+    leases = DocLeaseStore(tmp_path / "leases.sqlite", ttl=-1)
+
+    assert leases.acquire("doc-1", "a")
+    assert leases.acquire("doc-1", "b")
+
+
+def test_merge_results_sums_counts_and_ors_flags():
+    """Combines shard summaries into one."""
+    merged = merge_results([
+        {"docs_updated": 2, "docs_failed": 0, "interrupted": False},
+        {"docs_updated": 1, "docs_failed": 1, "interrupted": True},
+    ])
+
+    assert merged == {"docs_updated": 3, "docs_failed": 1, "interrupted": True}
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src.sheet_watch import (
+    SheetSnapshot,
+    SnapshotStore,
+    affected_docs,
+    file_version,
+    rows_hash,
+)
+
+
+def test_rows_hash_ignores_key_order():
+    """Rows that differ only in key order hash the same."""
+    assert rows_hash([{"a": 1, "b": 2}]) == rows_hash([{"b": 2, "a": 1}])
+    assert rows_hash([{"a": 1}]) != rows_hash([{"a": 2}])
+
+
+def test_snapshot_reports_only_changed_tabs():
+    """Tabs are compared one by one against the last recorded rows."""
+    snapshot = SheetSnapshot()
+    snapshot.update("2025-08-09", "7", {"A": [{"x": 1}], "B": [{"y": 1}]})
+
+    changed = snapshot.changed_tabs({"A": [{"x": 1}], "B": [{"y": 2}], "C": []})
+
+    assert changed == {"B", "C"}
+
+
+def test_snapshot_is_reset_for_a_new_day():
+    """Hashes from an earlier day are dropped when a new day is recorded."""
+    snapshot = SheetSnapshot()
+    snapshot.update("2025-08-09", "7", {"A": [], "B": []})
+    snapshot.update("2025-08-10", "8", {"A": []})
+
+    assert set(snapshot.tabs) == {"A"}
+    assert (snapshot.day, snapshot.version) == ("2025-08-10", "8")
+
+
+def test_snapshot_store_round_trips(tmp_path):
+    """A saved snapshot is loaded back unchanged; a corrupt file is ignored."""
+    store = SnapshotStore(tmp_path / "snap.json")
+    snapshot = SheetSnapshot()
+    snapshot.update("2025-08-09", "7", {"A": [{"x": 1}]})
+
+    store.save(snapshot)
+
+    assert store.load() == snapshot
+    (tmp_path / "snap.json").write_text("{not json", encoding="utf-8")
+    assert store.load() == SheetSnapshot()
+
+
+def test_affected_docs_maps_tabs_to_docs():
+    """Every Doc with a block on a changed tab is affected."""
+    blocks = [
+        SimpleNamespace(sheet_name="A", doc_id="doc-1"),
+        SimpleNamespace(sheet_name="B", doc_id="doc-1"),
+        SimpleNamespace(sheet_name="C", doc_id="doc-2"),
+    ]
+
+    assert affected_docs(blocks, {"B"}) == {"doc-1"}
+
+
+def test_file_version_requests_only_the_version_field():
+    """Polling asks Drive for the version field alone."""
+    service = MagicMock()
+    service.files.return_value.get.return_value.execute.return_value = {"version": "42"}
+
+    with patch("src.transport.build_service", return_value=service):
+        assert file_version("sheet-id", MagicMock()) == "42"
+
+    service.files.return_value.get.assert_called_once_with(
+        fileId="sheet-id", fields="version", supportsAllDrives=True
+    )
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from src.doc_output import BlockSection, DocOutput
+from src.docs_requests import Format
+from src.sinks import FileSink, render_html, render_markdown
+
+
+def _output(doc_id="daily"):
+    # "Read **Heaps** and [docs](https://x.y)\n- one\n- two"
+    content = "Read Heaps and docs\none\ntwo"
+    formatting = (
+        Format(5, 10, "bold"),
+        Format(15, 19, "link", "https://x.y"),
+        Format(20, 28, "bullet"),
+    )
+    return DocOutput(doc_id, [BlockSection("Block", "Today", content, formatting)])
+
+
+def test_markdown_restores_formatting():
+    """Formats compiled from Markdown are written back as Markdown."""
+    assert render_markdown(_output().sections) == (
+        "## Today\n\nRead **Heaps** and [docs](https://x.y)\n- one\n- two\n"
+    )
+
+
+def test_html_escapes_text_and_nests_spans():
+    """Text is escaped and an enclosing span wraps the spans inside it."""
+    section = BlockSection("Block", "A < B", "bold italic", (
+        Format(0, 11, "bold"), Format(5, 11, "italic"),
+    ))
+    rendered = render_html([section])
+    assert "<h2>A &lt; B</h2>" in rendered
+    assert "<p><strong>bold <em>italic</em></strong></p>" in rendered
+
+
+def test_html_groups_list_items():
+    """Consecutive bullet lines form one list."""
+    rendered = render_html(_output().sections)
+    assert "<ul>\n<li>one</li>\n<li>two</li>\n</ul>" in rendered
+
+
+def test_write_many_replaces_files_atomically(tmp_path):
+    """Files are replaced in place and no temporary files are left behind."""
+    sink = FileSink(tmp_path / "out", "markdown")
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "daily.md").write_text("old", encoding="utf-8")
+
+    errors = sink.write_many([_output("daily"), _output("other")])
+
+    assert errors == {"daily": None, "other": None}
+    assert (tmp_path / "out" / "daily.md").read_text(encoding="utf-8").startswith("## Today")
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["daily.md", "other.md"]
+
+
+def test_write_many_reports_each_failure(tmp_path):
+    """A Doc that cannot be written does not stop the others."""
+    sink = FileSink(tmp_path, "text", fsync=False)
+
+    errors = sink.write_many([_output("../escape"), _output("daily")])
+
+    assert isinstance(errors["../escape"], ValueError)
+    assert errors["daily"] is None
+    assert (tmp_path / "daily.txt").exists()
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    """An error while writing leaves the previous file untouched."""
+    sink = FileSink(tmp_path, "text")
+    (tmp_path / "daily.txt").write_text("old", encoding="utf-8")
+
+    with patch("src.sinks.os.fsync", side_effect=OSError("disk full")):
+        errors = sink.write_many([_output("daily")])
+
+    assert isinstance(errors["daily"], OSError)
+    assert (tmp_path / "daily.txt").read_text(encoding="utf-8") == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["daily.txt"]
@@ -0,0 +1,83 @@
+import sqlite3
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from src.config_schema import DataSourceConfig
+from src.sources import RowSource, _cell_value, get_source_rows, source_version
+
+
+def test_csv_rows_are_keyed_by_header(tmp_path):
+    """A byte order mark is dropped and quoted newlines stay inside a value."""
+    path = tmp_path / "plan.csv"
+    path.write_bytes('﻿Date,Topic\n2025-08-01,"Two\nlines"\n2025-08-02,é\n'.encode())
+
+    rows = get_source_rows(DataSourceConfig(type="csv", path=path), "Plan")
+
+    assert rows == [
+        {"Date": "2025-08-01", "Topic": "Two\nlines"},
+        {"Date": "2025-08-02", "Topic": "é"},
+    ]
+
+
+def test_empty_csv_has_no_rows(tmp_path):
+    """An empty file cannot be memory-mapped, so it is handled up front."""
+    path = tmp_path / "empty.csv"
+    path.write_bytes(b"")
+
+    assert get_source_rows(DataSourceConfig(type="csv", path=path), "Plan") == []
+
+
+def test_sqlite_rows_come_from_the_named_table(tmp_path):
+    """The tab name is the table, quoted so any name is safe."""
+    path = tmp_path / "plan.sqlite"
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE "My Plan" (Date TEXT, Topic TEXT)')
+        conn.execute("INSERT INTO \"My Plan\" VALUES ('2025-08-01', 'Graphs')")
+    conn.close()
+
+    rows = get_source_rows(DataSourceConfig(type="sqlite", path=path), "My Plan")
+
+    assert rows == [{"Date": "2025-08-01", "Topic": "Graphs"}]
+
+
+def test_xlsx_without_openpyxl_raises_a_clear_error(tmp_path):
+    """openpyxl is optional; using an XLSX source without it says so."""
+    config = DataSourceConfig(type="xlsx", path=tmp_path / "plan.xlsx")
+
+    with patch.dict(sys.modules, {"openpyxl": None}), pytest.raises(ImportError, match="openpyxl"):
+        get_source_rows(config, "Sheet1")
+
+
+@pytest.mark.parametrize("value,expected", [
+    (datetime(2025, 8, 1), "2025-08-01"),
+    (date(2025, 8, 1), "2025-08-01"),
+    (datetime(2025, 8, 1, 9, 30), datetime(2025, 8, 1, 9, 30)),
+    (3, 3),
+])
+def test_xlsx_dates_match_date_strings(value, expected):
+    """Date cells become the ISO strings the date column is matched against."""
+    assert _cell_value(value) == expected
+
+
+def test_source_version_changes_with_the_file(tmp_path):
+    """A rewrite changes the version; a missing file has none."""
+    path = tmp_path / "plan.csv"
+    config = DataSourceConfig(type="csv", path=path)
+    assert source_version(config) is None
+
+    path.write_text("Date\n", encoding="utf-8")
+    first = source_version(config)
+    path.write_text("Date\n2025-08-01\n", encoding="utf-8")
+
+    assert source_version(config) not in (None, first)
+
+
+def test_a_source_without_rows_cannot_be_created(tmp_path):
+    """A subclass that forgets `rows` fails when built, not when first read."""
+    class Incomplete(RowSource):
+        pass
+
+    with pytest.raises(TypeError, match="rows"):
+        Incomplete(tmp_path / "plan.csv")
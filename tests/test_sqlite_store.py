@@ -0,0 +1,14 @@
+from contextlib import closing
+
+from src.sqlite_store import connect_store, open_store
+
+
+def test_open_store_creates_the_directory_and_enables_wal(tmp_path):
+    """The database is created in WAL mode, which later connections see."""
+    path = open_store(tmp_path / "state" / "store.sqlite")
+
+    assert path.parent.is_dir()
+    with closing(connect_store(path)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert conn.isolation_level is None
+        assert conn.execute("PRAGMA synchronous").fetchone() == (1,)
@@ -1,6 +1,15 @@
+from unittest.mock import patch
+
 import pytest
 from jinja2 import TemplateSyntaxError
-from src.template import render_template
+from src.template import (
+    RenderCache,
+    configure_render_cache,
+    load_template,
+    render_cache_stats,
+    render_template,
+    render_template_string,
+)
 
 
 @pytest.mark.parametrize(
@@ -42,3 +51,76 @@ def test_render_template_unicode_and_emoji(tmp_path):
     template_path.write_text(template_content, encoding="utf-8")
     result = render_template(template_path, {"name": "太郎"})
     assert result == "こんにちは、太郎 🌸"
+
+
+def test_render_template_string():
+    """Renders an inline template string such as a block title."""
+    assert render_template_string("{{ a }} - {{ date }}",
+                                  {"a": "X", "date": "2025-08-01"}) == "X - 2025-08-01"
+
+
+def test_load_template_compiles_once_until_file_changes(tmp_path):
+    """Reuses the compiled template until the file is modified."""
+    template_path = tmp_path / "cached.md"
+    template_path.write_text("v1 {{ x }}", encoding="utf-8")
+
+    first = load_template(template_path)
+    assert load_template(template_path) is first
+
+    template_path.write_text("version2 {{ x }}", encoding="utf-8")
+    assert render_template(template_path, {"x": 1}) == "version2 1"
+
+
+@pytest.fixture
+def render_cache(tmp_path):
+    cache = configure_render_cache(tmp_path / "renders.sqlite")
+    yield cache
+    configure_render_cache(None)
+
+
+def test_render_cache_survives_a_restart(tmp_path, render_cache):
+    """A repeated render is served from the cache, also after reopening it."""
+    template_path = tmp_path / "t.md"
+    template_path.write_text("Hi {{ name }}", encoding="utf-8")
+
+    with patch("src.template.Template.render", autospec=True,
+               side_effect=lambda self, **ctx: f"Hi {ctx['name']}") as mock_render:
+        assert render_template(template_path, {"name": "A"}) == "Hi A"
+        configure_render_cache(render_cache.path)
+        assert render_template(template_path, {"name": "A"}) == "Hi A"
+        assert render_template(template_path, {"name": "B"}) == "Hi B"
+
+    assert mock_render.call_count == 2
+    assert render_cache_stats() == {"hits": 1, "misses": 1, "evictions": 0, "errors": 0}
+
+
+def test_render_cache_key_follows_the_template_source(tmp_path, render_cache):
+    """Editing the template invalidates its cached renders."""
+    template_path = tmp_path / "t.md"
+    template_path.write_text("v1 {{ x }}", encoding="utf-8")
+    assert render_template(template_path, {"x": 1}) == "v1 1"
+
+    template_path.write_text("version2 {{ x }}", encoding="utf-8")
+
+    assert render_template(template_path, {"x": 1}) == "version2 1"
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    """Past the entry limit, the render used longest ago is dropped."""
+    cache = RenderCache(tmp_path / "renders.sqlite", max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_render_cache_evicts_by_size(tmp_path):
+    """Renders are dropped until the total size fits."""
+    cache = RenderCache(tmp_path / "renders.sqlite", max_bytes=5)
+    cache.put("a", "xxx")
+    cache.put("b", "yyyy")
+
+    assert (cache.get("a"), cache.get("b")) == (None, "yyyy")
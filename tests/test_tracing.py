@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import structlog
+from src.observability import tracing
+from src.observability.tracing import (
+    configure_tracing,
+    flush_tracing,
+    span,
+    start_trace,
+    traced,
+)
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    configure_tracing(service_name="svc", path=str(path))
+    yield path
+    tracing._exporter = None
+    structlog.contextvars.clear_contextvars()
+
+
+def _exported_spans(path):
+    spans = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        for resource in json.loads(line)["resourceSpans"]:
+            for scope in resource["scopeSpans"]:
+                spans.extend(scope["spans"])
+    return {s["name"]: s for s in spans}
+
+
+def test_spans_nest_and_export_as_otlp_json(trace_file):
+    """Child spans link to their parent and share the run's trace ID."""
+    trace_id = start_trace()
+
+    @traced("child.op")
+    def child():
+        return "ok"
+
+    with span("run", resume=False):
+        with span("block", block="A"):
+            assert child() == "ok"
+
+    assert flush_tracing() == 3
+    spans = _exported_spans(trace_file)
+    assert {s["traceId"] for s in spans.values()} == {trace_id}
+    assert "parentSpanId" not in spans["run"]
+    assert spans["block"]["parentSpanId"] == spans["run"]["spanId"]
+    assert spans["child.op"]["parentSpanId"] == spans["block"]["spanId"]
+    assert {"key": "block", "value": {"stringValue": "A"}} in spans["block"]["attributes"]
+
+
+def test_span_records_errors(trace_file):
+    """An exception marks the span as failed and still propagates."""
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("nope")
+
+    flush_tracing()
+    status = _exported_spans(trace_file)["failing"]["status"]
+    assert status == {"code": 2, "message": "ValueError: nope"}
+
+
+def test_start_trace_binds_trace_id_to_log_context(trace_file):
+    """The run's trace ID is merged into every structlog event."""
+    trace_id = start_trace()
+    assert structlog.contextvars.get_contextvars()["trace_id"] == trace_id
+
+
+def test_tracing_disabled_without_exporter(monkeypatch):
+    """With no exporter configured, spans are no-ops."""
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT", raising=False)
+    monkeypatch.delenv("TRACE_EXPORT_PATH", raising=False)
+    assert configure_tracing() is None
+    with span("noop") as current:
+        assert current is None
+    assert flush_tracing() == 0
@@ -0,0 +1,217 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.errors import HttpError
+from src.concurrency import AimdLimiter
+from src.deadline import DeadlineExceeded, run_deadline
+from src.transport import (
+    RequestsHttp,
+    authorized_session,
+    close_sessions,
+    execute_batch,
+    shared_service,
+    transport_stats,
+)
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # noqa: N802
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    close_sessions()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions():
+    close_sessions()
+    yield
+    close_sessions()
+
+
+def test_session_is_shared_per_credentials(monkeypatch):
+    """Returns one pooled session per credentials object."""
+    monkeypatch.setenv("GOOGLE_HTTP_POOL_SIZE", "3")
+    creds = AnonymousCredentials()
+
+    session = authorized_session(creds)
+
+    assert authorized_session(creds) is session
+    assert authorized_session(AnonymousCredentials()) is not session
+    assert session.get_adapter("https://docs.googleapis.com")._pool_maxsize == 3
+
+
+def test_session_is_shared_per_service_account():
+    """Credentials rebuilt for the same service account reuse one session."""
+    first, second = AnonymousCredentials(), AnonymousCredentials()
+    first.service_account_email = second.service_account_email = "bot@example.com"
+
+    assert authorized_session(first) is authorized_session(second)
+
+
+def test_each_scope_set_gets_its_own_session():
+    """Wider-scoped credentials never reuse a session built on narrower ones."""
+    narrow, wide = AnonymousCredentials(), AnonymousCredentials()
+    narrow.service_account_email = wide.service_account_email = "bot@example.com"
+    narrow.scopes = ["sheets", "docs"]
+    wide.scopes = ["docs", "sheets", "drive"]
+
+    session = authorized_session(wide)
+
+    assert session is not authorized_session(narrow)
+    assert session.credentials.scopes == ["docs", "sheets", "drive"]
+
+
+def test_shared_service_is_built_once_per_thread_and_api():
+    """Each thread and API gets one service, all on the account's session."""
+    creds = AnonymousCredentials()
+    built = []
+
+    def fake_build(name, version, http):
+        built.append((name, threading.get_ident(), http.session))
+        return object()
+
+    with patch("src.transport.build", side_effect=fake_build):
+        docs = shared_service("docs", "v1", creds)
+        assert shared_service("docs", "v1", creds) is docs
+        assert shared_service("drive", "v3", creds) is not docs
+        worker = threading.Thread(target=shared_service, args=("docs", "v1", creds))
+        worker.start()
+        worker.join()
+
+    assert [name for name, _, _ in built] == ["docs", "drive", "docs"]
+    assert built[0][1] != built[2][1]
+    assert all(session is authorized_session(creds) for _, _, session in built)
+
+
+def test_old_sessions_are_closed_when_evicted():
+    """Keeps a bounded number of sessions, closing the ones it drops."""
+    with patch("src.transport.AuthorizedSession.close") as mock_close:
+        for _ in range(6):
+            authorized_session(AnonymousCredentials())
+
+    assert transport_stats()["sessions"] == 4
+    assert mock_close.call_count == 2
+
+
+def test_requests_http_returns_httplib2_style_response():
+    """Adapts a requests response to the (response, content) httplib2 shape."""
+    session = MagicMock()
+    session.request.return_value = MagicMock(
+        status_code=404, reason="Not Found", headers={"Content-Type": "text/plain"},
+        content=b"missing",
+    )
+
+    response, content = RequestsHttp(session).request("https://x", "POST", body="é")
+
+    assert response.status == 404
+    assert response.reason == "Not Found"
+    assert response["content-type"] == "text/plain"
+    assert content == b"missing"
+    assert session.request.call_args.kwargs["data"] == "é".encode("utf-8")
+
+
+def test_requests_http_timeout_is_cut_to_the_run_deadline():
+    """Requests always get a timeout, never more than the time left."""
+    session = MagicMock()
+    session.request.return_value = MagicMock(status_code=200, reason="OK", headers={})
+    http = RequestsHttp(session, timeout=30)
+
+    http.request("https://x")
+    assert session.request.call_args.kwargs["timeout"] == 30
+    with run_deadline(5):
+        http.request("https://x")
+    assert 0 < session.request.call_args.kwargs["timeout"] <= 5
+    with run_deadline(0), pytest.raises(DeadlineExceeded):
+        http.request("https://x")
+
+
+def test_requests_reuse_pooled_connections(local_server):
+    """Sequential requests through the shared session reuse one connection."""
+    before = transport_stats()
+    http = RequestsHttp(authorized_session(AnonymousCredentials()))
+
+    for _ in range(3):
+        response, content = http.request(local_server + "/")
+        assert response.status == 200
+
+    after = transport_stats()
+    assert after["requests"] - before["requests"] == 3
+    assert after["connections_opened"] - before["connections_opened"] == 1
+
+
+def test_execute_batch_takes_a_limiter_slot_per_round_trip():
+    """Each batch round trip holds one slot and reports overloads in it."""
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback, self.ids = callback, []
+
+        def add(self, request, request_id=None):
+            self.ids.append(request_id)
+
+        def execute(self):
+            assert limiter.stats()["in_flight"] == 1
+            for request_id in self.ids:
+                error = HttpError(resp=MagicMock(status=429), content=b"") \
+                    if request_id == "c" else None
+                self.callback(request_id, None if error else {}, error)
+
+    limiter = AimdLimiter("docs", initial=4)
+    service = MagicMock()
+    service.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback)
+
+    results = execute_batch(service, {k: object() for k in "abc"}, limit=2, limiter=limiter)
+
+    assert [error is None for _, error in results.values()] == [True, True, False]
+    assert limiter.stats()["successes"] == 1
+    assert limiter.stats()["overloads"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_execute_batch_reports_a_failed_round_trip_for_its_calls_only():
+    """A connection error in one round trip does not lose the others' results."""
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback, self.ids = callback, []
+
+        def add(self, request, request_id=None):
+            self.ids.append(request_id)
+
+        def execute(self):
+            if "c" in self.ids:
+                raise requests.ConnectionError("reset")
+            for request_id in self.ids:
+                self.callback(request_id, {"id": request_id}, None)
+
+    service = MagicMock()
+    service.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback)
+
+    results = execute_batch(service, {k: object() for k in "abcd"}, limit=2)
+
+    assert results["a"] == ({"id": "a"}, None)
+    assert results["b"] == ({"id": "b"}, None)
+    assert isinstance(results["c"][1], requests.ConnectionError)
+    assert isinstance(results["d"][1], requests.ConnectionError)
@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 import pytest
-from src.utils import get_today_str
+from src.utils import get_date_str, get_today_str
 
 
 def test_get_today_str_default(monkeypatch):
@@ -46,3 +46,16 @@ def test_get_today_str_invalid_format(monkeypatch):
     result = get_today_str(fmt="%Q")
     assert result == "%Q"
 
+
+def test_get_date_str_uses_the_time_zone_calendar(monkeypatch):
+    """Tomorrow is computed from the date in the given time zone."""
+    class FixedDate(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # 02:00 UTC on Aug 1 is still Jul 31 in New York
+            return cls(2025, 8, 1, 2, tzinfo=timezone.utc).astimezone(tz)
+
+    monkeypatch.setattr("src.utils.datetime", FixedDate)
+
+    assert get_date_str(1, time_zone="America/New_York") == "2025-08-01"
+    assert get_date_str(1, time_zone="UTC") == "2025-08-02"
@@ -0,0 +1,127 @@
+import time
+
+from src.doc_output import BlockSection, DocOutput
+from src.docs_requests import Format
+from src.work_queue import WorkQueue
+
+
+def _output(doc_id, content="Body"):
+    return DocOutput(doc_id, [BlockSection("Block", "Title", content)])
+
+
+def test_claimed_job_round_trips_payload(tmp_path):
+    """Claims return the enqueued sections and content hash."""
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    output = _output("doc-1")
+    queue.enqueue(output)
+
+    job = queue.claim()
+
+    assert job.doc_id == "doc-1"
+    assert job.content_hash == output.content_hash
+    assert [(s.block_name, s.title, s.content) for s in job.sections] == [
+        ("Block", "Title", "Body")
+    ]
+    assert job.attempts == 1
+
+
+def test_claimed_job_keeps_section_formatting(tmp_path):
+    """Markdown formatting survives the queue and keeps the content hash."""
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    formatting = (Format(0, 4, "link", "https://e.x"),)
+    output = DocOutput("doc-1", [BlockSection("Block", "Title", "Body", formatting)])
+    queue.enqueue(output)
+
+    job = queue.claim()
+
+    assert job.sections[0].formatting == formatting
+    assert job.content_hash == output.content_hash
+
+
+def test_enqueue_supersedes_pending_job_for_same_doc(tmp_path):
+    """Only the newest content for a Doc stays queued."""
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    first = queue.enqueue(_output("doc-1", "old"))
+    second = queue.enqueue(_output("doc-1", "new"))
+
+    job = queue.claim()
+
+    assert first == second
+    assert job.sections[0].content == "new"
+    assert queue.claim() is None
+
+
+def test_leased_doc_is_not_claimed_twice(tmp_path):
+    """A Doc with a live lease is not handed to a second worker."""
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(_output("doc-1", "v1"))
+    leased = queue.claim()
+    queue.enqueue(_output("doc-1", "v2"))
+
+    assert queue.claim() is None
+    queue.complete(leased)
+    assert queue.claim().sections[0].content == "v2"
+
+
+def test_expired_lease_is_redelivered(tmp_path):
+    """A job whose worker never acknowledged it is delivered again."""
+    queue = WorkQueue(tmp_path / "queue.sqlite", lease_seconds=0)
+    queue.enqueue(_output("doc-1"))
+    queue.claim()
+    time.sleep(0.01)
+
+    job = queue.claim()
+
+    assert job.doc_id == "doc-1"
+    assert job.attempts == 2
+
+
+def test_failed_job_is_parked_after_max_attempts(tmp_path):
+    """Failures back off and are parked once attempts run out."""
+    queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=1)
+    queue.enqueue(_output("doc-1"))
+    queue.fail(queue.claim(), "boom")
+
+    assert queue.claim() is None
+    assert queue.counts()["failed"] == 1
+
+
+def test_deferred_job_keeps_its_attempts(tmp_path):
+    """A deferred job is hidden for a while but never parked as failed."""
+    queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=1)
+    queue.enqueue(_output("doc-1"))
+    queue.defer(queue.claim(), 0.05, "circuit_open")
+
+    assert queue.claim() is None
+    time.sleep(0.06)
+    job = queue.claim()
+    assert job.attempts == 1
+    queue.fail(job, "boom")
+    assert queue.counts()["failed"] == 1
+
+
+def test_stale_claim_cannot_finish_a_reclaimed_job(tmp_path):
+    """A worker whose lease expired cannot acknowledge the new claim."""
+    queue = WorkQueue(tmp_path / "queue.sqlite", lease_seconds=0)
+    queue.enqueue(_output("doc-1"))
+    stale = queue.claim()
+    time.sleep(0.01)
+    queue.lease_seconds = 300
+    current = queue.claim()
+
+    queue.complete(stale)
+
+    assert queue.counts()["leased"] == 1
+    queue.complete(current)
+    assert queue.counts()["done"] == 1
+
+
+def test_prune_deletes_old_finished_jobs(tmp_path):
+    """Finished jobs past the retention window are removed."""
+    queue = WorkQueue(tmp_path / "queue.sqlite", retention_seconds=-1)
+    queue.enqueue(_output("doc-1"))
+    queue.complete(queue.claim())
+    queue.enqueue(_output("doc-2"))
+
+    assert queue.prune() == 1
+    assert queue.counts() == {"pending": 1, "leased": 0, "done": 0, "failed": 0}